@@ -0,0 +1,159 @@
+"""
+Preprocessing benchmark for FractureSense AI
+
+Compares the original full-resolution decode (convert RGB -> resize ->
+astype/255) with utils.preprocess.load_image_array (JPEG draft decoding,
+grayscale path, single float conversion) on large synthetic radiographs.
+
+Each (implementation, input) pair runs in a fresh process so the reported
+peak RSS belongs to that run alone.
+
+    python benchmarks/bench_preprocess.py --sizes 2000 3000 4000 --json out.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployment"))
+
+from utils.memory import peak_rss_mb, reset_peak_rss
+
+
+IMG_SIZE = (224, 224)
+
+
+# ---------------------------------------------
+# IMPLEMENTATIONS
+# ---------------------------------------------
+def legacy_preprocess(image_path):
+
+    img = Image.open(image_path).convert("RGB")
+    img = img.resize(IMG_SIZE)
+
+    img_array = np.array(img).astype("float32") / 255.0
+    return np.expand_dims(img_array, axis=0)
+
+
+def fast_preprocess(image_path):
+
+    from utils.preprocess import load_image_array
+    return load_image_array(image_path, IMG_SIZE)
+
+
+IMPLEMENTATIONS = {
+    "legacy": legacy_preprocess,
+    "fast": fast_preprocess
+}
+
+
+# ---------------------------------------------
+# INPUTS
+# ---------------------------------------------
+def make_radiograph(path, side, mode):
+
+    # Smooth gradient plus noise: compresses like a real radiograph
+    rng = np.random.default_rng(side)
+    yy, xx = np.mgrid[0:side, 0:side].astype(np.float32) / side
+    pixels = 60 + 140 * np.exp(-((xx - 0.5) ** 2 + (yy - 0.5) ** 2) * 8)
+    pixels += rng.normal(0, 12, size=pixels.shape)
+    pixels = np.clip(pixels, 0, 255).astype(np.uint8)
+
+    img = Image.fromarray(pixels, mode="L")
+    if mode == "RGB":
+        img = img.convert("RGB")
+
+    img.save(path, quality=90)
+
+
+def build_inputs(workdir, sizes):
+
+    inputs = []
+
+    for side in sizes:
+        for mode, ext in (("L", "jpg"), ("RGB", "jpg"), ("L", "png")):
+            path = os.path.join(workdir, f"xray_{side}_{mode}.{ext}")
+            make_radiograph(path, side, mode)
+            inputs.append(path)
+
+    return inputs
+
+
+# ---------------------------------------------
+# MEASUREMENT
+# ---------------------------------------------
+def _run(impl_name, image_path, repeats, result_queue):
+
+    preprocess = IMPLEMENTATIONS[impl_name]
+
+    reset_peak_rss()
+    preprocess(image_path)
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        preprocess(image_path)
+        latencies.append(time.perf_counter() - start)
+
+    result_queue.put({
+        "impl": impl_name,
+        "input": os.path.basename(image_path),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_ms_min": round(min(latencies) * 1000, 2),
+        "peak_rss_mb": peak_rss_mb()
+    })
+
+
+def measure(impl_name, image_path, repeats):
+
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+
+    proc = ctx.Process(target=_run, args=(impl_name, image_path, repeats, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+
+    return result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[2000, 3000, 4000],
+                        help="Square input sizes in pixels")
+    parser.add_argument("--repeats", type=int, default=10,
+                        help="Timed runs per input")
+    parser.add_argument("--json", help="Write results to this JSON file")
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+
+        inputs = build_inputs(workdir, args.sizes)
+        results = []
+
+        print(f"{'input':<24}{'impl':<8}{'p50 ms':>10}{'min ms':>10}{'peak RSS MB':>14}")
+
+        for image_path in inputs:
+            for impl_name in IMPLEMENTATIONS:
+                r = measure(impl_name, image_path, args.repeats)
+                results.append(r)
+                print(f"{r['input']:<24}{r['impl']:<8}{r['latency_ms_p50']:>10}"
+                      f"{r['latency_ms_min']:>10}{r['peak_rss_mb']:>14}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
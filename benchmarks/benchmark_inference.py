@@ -0,0 +1,336 @@
+"""
+Inference benchmark and load generator for FractureSense AI
+
+Predictor benchmark (runs FracturePredictor in a fresh process):
+    - cold start: import + model load + warmup
+    - warm single-image latency p50/p95/p99 per input resolution
+    - batched throughput of predict_batch at several batch sizes
+    - peak RSS of the process
+
+HTTP load test (against a running server):
+    - POST /predict at several concurrency levels
+    - latency p50/p95/p99, requests/sec and status codes per level
+
+Inputs are synthetic radiographs from training/generate_test_images.py at
+the requested resolutions. Every HTTP request sends a unique payload so
+the result cache does not answer it.
+
+    python benchmarks/benchmark_inference.py --sizes 512 2048 --json bench.json
+    python benchmarks/benchmark_inference.py --skip-predictor \\
+        --url http://localhost:10000 --concurrency 1 4 16 --requests 200
+
+The JSON output carries the git commit, so runs can be compared between
+commits.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_DIR = os.path.join(REPO_DIR, "deployment")
+
+sys.path.insert(0, os.path.join(REPO_DIR, "training"))
+sys.path.insert(0, APP_DIR)
+
+from generate_test_images import render_xray
+from utils.memory import peak_rss_mb, reset_peak_rss
+
+
+# ---------------------------------------------
+# INPUTS
+# ---------------------------------------------
+def make_xray(side, has_fracture=True, seed=0):
+
+    img, _ = render_xray((side, side), has_fracture, np.random.default_rng(seed))
+    return img
+
+
+def encode_jpeg(img, quality=90):
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def build_inputs(workdir, sizes):
+
+    inputs = {}
+
+    for side in sizes:
+        path = os.path.join(workdir, f"xray_{side}.jpg")
+        with open(path, "wb") as f:
+            f.write(encode_jpeg(make_xray(side, seed=side)))
+        inputs[side] = path
+
+    return inputs
+
+
+def percentiles(latencies):
+
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "mean_ms": round(float(ms.mean()), 2)
+    }
+
+
+# ---------------------------------------------
+# PREDICTOR BENCHMARK
+# ---------------------------------------------
+def _run_predictor(app_dir, options, inputs, repeats, batch_sizes, batch_images, result_queue):
+
+    reset_peak_rss()
+
+    # Model paths are relative to the working directory (model/...)
+    os.chdir(app_dir)
+    sys.path.insert(0, APP_DIR)
+
+    start = time.perf_counter()
+    from utils.predict import FracturePredictor
+    predictor = FracturePredictor(**options)
+    cold_start = time.perf_counter() - start
+
+    first_path = next(iter(inputs.values()))
+    start = time.perf_counter()
+    predictor.predict(first_path)
+    first_predict = time.perf_counter() - start
+
+    latency = {}
+    for side, path in inputs.items():
+        predictor.predict(path)
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predictor.predict(path)
+            times.append(time.perf_counter() - start)
+        latency[str(side)] = percentiles(times)
+
+    throughput = {}
+    smallest = inputs[min(inputs)]
+    for batch_size in batch_sizes:
+        images = [smallest] * batch_images
+        predictor.predict_batch(images[:batch_size], batch_size=batch_size)
+        start = time.perf_counter()
+        predictor.predict_batch(images, batch_size=batch_size)
+        throughput[str(batch_size)] = round(batch_images / (time.perf_counter() - start), 2)
+
+    result_queue.put({
+        "options": options,
+        "cold_start_s": round(cold_start, 3),
+        "first_predict_ms": round(first_predict * 1000, 2),
+        "latency": latency,
+        "throughput_images_per_sec": throughput,
+        "peak_rss_mb": peak_rss_mb()
+    })
+
+
+def benchmark_predictor(app_dir, options, inputs, repeats, batch_sizes, batch_images):
+
+    # A fresh process, so cold start and peak RSS are not shared with this one
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+
+    proc = ctx.Process(
+        target=_run_predictor,
+        args=(app_dir, options, inputs, repeats, batch_sizes, batch_images, result_queue)
+    )
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+
+    return result
+
+
+# ---------------------------------------------
+# HTTP LOAD TEST
+# ---------------------------------------------
+def multipart_body(field, filename, data, content_type="image/jpeg"):
+
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def post_image(url, payload, timeout):
+
+    body, content_type = multipart_body("file", "bench.jpg", payload)
+    request = urllib.request.Request(
+        url, data=body, method="POST", headers={"Content-Type": content_type}
+    )
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+
+    return status, time.perf_counter() - start
+
+
+def load_test(url, image_bytes, concurrency, requests, timeout):
+
+    # Bytes after the JPEG end-of-image marker are ignored by decoders but
+    # change the content hash, so every request misses the result cache
+    payloads = [image_bytes + uuid.uuid4().bytes for _ in range(requests)]
+
+    # One untimed request to make sure the models are loaded
+    post_image(url, image_bytes + uuid.uuid4().bytes, timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda p: post_image(url, p, timeout), payloads))
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    ok = [latency for status, latency in results if status == 200]
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 2),
+        "statuses": statuses,
+        "latency": percentiles(ok) if ok else None
+    }
+
+
+# ---------------------------------------------
+# REPORT
+# ---------------------------------------------
+def environment():
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def print_predictor(result):
+
+    print(f"\nPredictor {result['options']}")
+    print(f"  cold start       {result['cold_start_s']} s")
+    print(f"  first predict    {result['first_predict_ms']} ms")
+    print(f"  peak RSS         {result['peak_rss_mb']} MB")
+
+    print(f"\n  {'input':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for side, r in result["latency"].items():
+        print(f"  {side + 'px':<10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+    print(f"\n  {'batch':<10}{'images/sec':>12}")
+    for batch_size, rate in result["throughput_images_per_sec"].items():
+        print(f"  {batch_size:<10}{rate:>12}")
+
+
+def print_http(results):
+
+    print(f"\n  {'conc':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for r in results:
+        lat = r["latency"] or {"p50_ms": "-", "p95_ms": "-", "p99_ms": "-"}
+        print(f"  {r['concurrency']:<6}{r['requests_per_sec']:>10}{lat['p50_ms']:>10}"
+              f"{lat['p95_ms']:>10}{lat['p99_ms']:>10}  {r['statuses']}")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark FracturePredictor and the /predict API")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[512, 1024, 2048],
+                        help="Square input resolutions in pixels")
+    parser.add_argument("--repeats", type=int, default=50,
+                        help="Timed single-image predictions per resolution")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--batch-images", type=int, default=64,
+                        help="Images per predict_batch throughput run")
+    parser.add_argument("--backend", default="keras", help="keras or tflite")
+    parser.add_argument("--no-fused", action="store_true", help="Disable the shared backbone")
+    parser.add_argument("--no-compiled", action="store_true", help="Disable tf.function inference")
+    parser.add_argument("--app-dir", default=APP_DIR,
+                        help="Folder containing model/ (defaults to deployment/)")
+    parser.add_argument("--skip-predictor", action="store_true")
+
+    parser.add_argument("--url", help="Base URL of a running server for the HTTP load test")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--http-size", type=int, default=1024, help="Resolution of HTTP payloads")
+    parser.add_argument("--timeout", type=float, default=60)
+
+    parser.add_argument("--json", help="Write results to this JSON file")
+
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "args": vars(args)}
+
+    if not args.skip_predictor:
+
+        options = {"backend": args.backend}
+        if args.no_fused:
+            options["fused"] = False
+        if args.no_compiled:
+            options["compiled"] = False
+
+        with tempfile.TemporaryDirectory() as workdir:
+            inputs = build_inputs(workdir, args.sizes)
+            report["predictor"] = benchmark_predictor(
+                os.path.abspath(args.app_dir), options, inputs, args.repeats, args.batch_sizes, args.batch_images
+            )
+
+        print_predictor(report["predictor"])
+
+    if args.url:
+
+        url = args.url.rstrip("/") + "/predict"
+        image_bytes = encode_jpeg(make_xray(args.http_size, seed=args.http_size))
+
+        print(f"\nLoad testing {url} ({args.requests} requests per level)")
+        report["http"] = [
+            load_test(url, image_bytes, c, args.requests, args.timeout)
+            for c in args.concurrency
+        ]
+        print_http(report["http"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
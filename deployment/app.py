@@ -1,20 +1,100 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, url_for
+import hashlib
+import json
 import os
+import threading
+import time
+import uuid
+import zipfile
+from werkzeug.exceptions import BadRequest, HTTPException
 from werkzeug.utils import secure_filename
 
-# Lazy import predictor
-predictor = None
+from utils.ingest import (IngestRequest, check_image_bytes, is_raw_upload, read_raw_body,
+                          read_upload)
+from utils.explain import EXPLAIN_FORMATS
+from utils.tta import MAX_VIEWS
+from utils.metrics import CACHE_REQUESTS, QUEUE_DEPTH, REGISTRY, REQUEST_SECONDS, STAGE_SECONDS
+
+# Model registry: versioned bundles, loaded lazily per version
+registry = None
+predictor_lock = threading.Lock()
+load_error = None
+
+# A model/ folder with the files directly is one bundle; a folder of version
+# subfolders (+ routing.json) is a registry with hot reload and traffic split
+MODEL_DIR = os.environ.get('MODEL_DIR', 'model')
+MODEL_POLL_SECONDS = float(os.environ.get('MODEL_POLL_SECONDS', '10'))
+
+# Models loaded in the gunicorn master before it forks the workers (see
+# gunicorn.conf.py); interpreters and threads are only created after the fork
+GUNICORN_PRELOAD = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+forked = False
+
+
+# lazy: load on first /predict; eager: load at import, before serving;
+# background: load in a thread at import while /health reports not ready
+MODEL_LOAD_MODE = os.environ.get('MODEL_LOAD_MODE', 'lazy')
+
+# Result cache: keyed on a hash of the uploaded bytes, the model version and
+# the predictor settings (0 entries disables)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '256'))
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '0'))
+CACHE_DIR = os.environ.get('CACHE_DIR')
+
+# Micro-batching: 0 disables the scheduler (one model call per request)
+BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', '0'))
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', '16'))
+
+# Async jobs: bounded queue drained by a pool of worker threads
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'inprocess')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '32'))
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', '600'))
+jobs = None
+jobs_lock = threading.Lock()
+
+# Confidence gate between detection and classification (see GATE_POLICIES)
+GATE_POLICY = os.environ.get('GATE_POLICY', 'none')
+GATE_THRESHOLD = float(os.environ.get('GATE_THRESHOLD', '0.7'))
+GATE_TTA_VIEWS = int(os.environ.get('GATE_TTA_VIEWS', '4'))
+
+# Batch endpoint limits
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', '64'))
+MAX_ARCHIVE_BYTES = int(os.environ.get('MAX_ARCHIVE_MB', '256')) * 1024 * 1024
 
 # ---------------- Flask Setup ----------------
 app = Flask(__name__)
 
+# Uploads are sniffed and size-checked while the body streams in
+app.request_class = IngestRequest
+
 # Render writable directory
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', '16')) * 1024 * 1024
+
+# Per-image limits, enforced before the whole file is read or decoded
+app.config['MAX_IMAGE_BYTES'] = int(
+    os.environ.get('MAX_IMAGE_MB', os.environ.get('MAX_UPLOAD_MB', '16'))
+) * 1024 * 1024
+app.config['MAX_IMAGE_PIXELS'] = int(os.environ.get('MAX_IMAGE_PIXELS', '50000000'))
+
+# Checked while the batch streams in and again for the members of zip archives
+app.config['MAX_BATCH_FILES'] = MAX_BATCH_FILES
+
+# Uploads are decoded in memory; keeping a copy on disk is opt-in
+app.config['PERSIST_UPLOADS'] = os.environ.get('PERSIST_UPLOADS', '0') == '1'
+app.config['UPLOAD_RETENTION_SECONDS'] = int(os.environ.get('UPLOAD_RETENTION_SECONDS', '3600'))
+app.config['UPLOAD_MAX_FILES'] = int(os.environ.get('UPLOAD_MAX_FILES', '1000'))
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'dcm', 'dicom'}
 
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+if app.config['PERSIST_UPLOADS']:
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+result_cache = None
+if CACHE_MAX_ENTRIES > 0:
+    from utils.cache import ResultCache
+    result_cache = ResultCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_DIR)
 
 
 # ---------------- File Validation ----------------
@@ -22,6 +102,91 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def http_error(e):
+    return jsonify({'error': e.description}), e.code
+
+
+def explain_format():
+
+    # ?explain=png (or 1/true) for a base64 overlay, ?explain=array for the raw map
+    value = request.args.get('explain', '').lower()
+
+    if value in ('', '0', 'false'):
+        return None
+
+    if value in ('1', 'true'):
+        return 'png'
+
+    if value not in EXPLAIN_FORMATS:
+        raise BadRequest(f"explain must be one of {', '.join(EXPLAIN_FORMATS)}")
+
+    return value
+
+
+def tta_views():
+
+    # ?tta=K runs K augmented views as one batch (0 or missing: off)
+    value = request.args.get('tta', '0')
+
+    try:
+        views = int(value)
+    except ValueError:
+        views = -1
+
+    if not 0 <= views <= MAX_VIEWS:
+        raise BadRequest(f'tta must be a number of views between 0 and {MAX_VIEWS}')
+
+    return views or None
+
+
+# ---------------- Upload Persistence ----------------
+last_cleanup = 0.0
+
+
+def persist_upload(filename, data):
+
+    # Unique prefix so concurrent uploads with the same name don't collide
+    filename = f"{uuid.uuid4().hex[:12]}_{secure_filename(filename)}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
+    cleanup_uploads()
+
+    return filepath
+
+
+def cleanup_uploads(min_interval=60):
+
+    global last_cleanup
+
+    now = time.time()
+    if now - last_cleanup < min_interval:
+        return
+    last_cleanup = now
+
+    folder = app.config['UPLOAD_FOLDER']
+    retention = app.config['UPLOAD_RETENTION_SECONDS']
+
+    uploads = []
+    for entry in os.scandir(folder):
+        if entry.is_file():
+            uploads.append((entry.stat().st_mtime, entry.path))
+
+    uploads.sort()
+
+    # Drop expired files, then the oldest ones beyond the file limit
+    excess = len(uploads) - app.config['UPLOAD_MAX_FILES']
+
+    for i, (mtime, path) in enumerate(uploads):
+        if i < excess or now - mtime > retention:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
 # ---------------- Treatment Engine ----------------
 def get_treatment_recommendation(fracture_type, severity):
 
@@ -85,6 +250,242 @@ def get_treatment_recommendation(fracture_type, severity):
     })
 
 
+def build_result(prediction):
+
+    with STAGE_SECONDS.time(stage='treatment'):
+        treatment = get_treatment_recommendation(
+            prediction['fracture_type'],
+            prediction['severity']
+        )
+
+    result = {
+        'fracture_type': prediction['fracture_type'],
+        'severity': prediction['severity'],
+        'confidence': prediction['confidence'],
+        'treatment': treatment
+    }
+
+    # Multi-frame DICOM: which frame the result comes from; TTA: spread
+    # across the augmented views; gate: policy applied to a marginal detection
+    for key in ('frame', 'frames', 'fracture_frames', 'uncertainty', 'gated'):
+        if key in prediction:
+            result[key] = prediction[key]
+
+    return result
+
+
+def lookup_cache(data, *options):
+
+    if result_cache is None:
+        return None, None
+
+    cache_key = ResultCache.key_for(data, *options)
+    cached = result_cache.get(cache_key)
+
+    CACHE_REQUESTS.inc(result='hit' if cached is not None else 'miss')
+
+    return cache_key, cached
+
+
+def run_prediction(data, tta=None, model=None):
+
+    # -------- Model Version --------
+    # Routing only reads the registry config; no model is loaded yet
+    if model is None:
+        model = get_registry().route(data)
+
+    # -------- Result Cache --------
+    # A hit returns the stored result without loading TensorFlow
+    options = [f'tta={tta}'] if tta else []
+    cache_key, cached = lookup_cache(data, cache_namespace(model), *options)
+
+    if cached is not None:
+        return cached, True
+
+    # -------- Lazy Load Predictor --------
+    predictor = registry.ensure_loaded(model).predictor
+
+    if tta:
+        # The views are already a batch of their own
+        prediction = predictor.predict_tta(data, tta)
+
+    elif model.scheduler is not None:
+        img_array = predictor.preprocess_image(data)
+
+        # Multi-frame studies are already a batch of their own
+        if len(img_array) > 1:
+            prediction = predictor.combine_frames(predictor.predict_arrays(img_array))
+        else:
+            prediction = model.scheduler.predict(img_array)
+    else:
+        prediction = predictor.predict(data)
+
+    result = dict(build_result(prediction), model_version=model.version)
+
+    if cache_key is not None:
+        result_cache.set(cache_key, result)
+
+    return result, False
+
+
+def run_explained(data, fmt):
+
+    model = get_registry().route(data)
+    predictor = registry.ensure_loaded(model).predictor
+
+    if not predictor.can_explain:
+        # TFLite backend: the usual result with heatmap: null
+        result, cached = run_prediction(data, model=model)
+        return dict(result, heatmap=None), cached
+
+    cache_key, cached = lookup_cache(data, cache_namespace(model))
+
+    if cached is not None:
+        # Only the heatmap is computed; detection and classification are
+        # not run again
+        result, heatmap = cached, None
+
+        if result['fracture_type'] in predictor.classify_classes:
+            heatmap = predictor.explain(data, result['fracture_type'], result.get('frame', 0))
+
+    else:
+        # One forward pass that keeps the feature maps for the heatmap
+        prediction = predictor.predict(data, explain=True)
+        result = dict(build_result(prediction), model_version=model.version)
+
+        if cache_key is not None:
+            result_cache.set(cache_key, result)
+
+        # Normal results have no classification stage to explain
+        heatmap = prediction.get('heatmap')
+
+    with STAGE_SECONDS.time(stage='explain'):
+        heatmap = heatmap.to_json(fmt) if heatmap is not None else None
+
+    return dict(result, heatmap=heatmap), cached is not None
+
+
+# ---------------- Predictor Loading ----------------
+def in_preload_master():
+
+    # Loading in the gunicorn master: nothing may run a model or start a
+    # thread until the workers are forked
+    return GUNICORN_PRELOAD and not forked
+
+
+def get_registry():
+
+    global registry
+
+    with predictor_lock:
+
+        if registry is None:
+            from utils.registry import ModelRegistry
+            registry = ModelRegistry(MODEL_DIR, create_predictor,
+                                     on_load=start_scheduler,
+                                     on_unload=stop_scheduler,
+                                     poll_seconds=MODEL_POLL_SECONDS)
+
+            # A preloading master never serves traffic: the watcher runs in
+            # the workers, started by after_fork
+            if not in_preload_master():
+                registry.start()
+
+    return registry
+
+
+def predictor_config(bundle):
+
+    num_threads = os.environ.get('TFLITE_THREADS')
+
+    # Gate thresholds are tuned per model, so a bundle may set its own
+    return {
+        'fused': os.environ.get('FUSED_BACKBONE', '1') == '1',
+        'compiled': os.environ.get('COMPILED_INFERENCE', '1') == '1',
+        'backend': os.environ.get('PREDICTOR_BACKEND', 'keras'),
+        'tflite_variant': os.environ.get('TFLITE_VARIANT', 'fp16'),
+        'num_threads': int(num_threads) if num_threads else None,
+        'gate_policy': bundle.get('gate_policy', GATE_POLICY),
+        'gate_threshold': bundle.get('gate_threshold', GATE_THRESHOLD),
+        'gate_views': GATE_TTA_VIEWS
+    }
+
+
+def create_predictor(model_dir, bundle):
+
+    from utils.predict import FracturePredictor
+
+    config = predictor_config(bundle)
+    preload = in_preload_master() and config['backend'] == 'tflite'
+
+    return FracturePredictor(model_dir=model_dir, preload=preload, **config)
+
+
+def cache_namespace(model):
+
+    # Results depend on the weights (a republished version keeps its name, so
+    # the bundle stamp) and the predictor settings; the disk tier outlives
+    # restarts, so a change to either must change the key
+    config = json.dumps(predictor_config(model.bundle), sort_keys=True)
+    digest = hashlib.sha256(f"{model.stamp}:{config}".encode()).hexdigest()[:16]
+
+    return f"{model.version}:{digest}"
+
+
+def load_predictor():
+
+    # Every version that currently receives traffic
+    get_registry().load_all()
+
+
+def start_scheduler(model):
+
+    # Started in each worker by after_fork instead
+    if in_preload_master():
+        return
+
+    if BATCH_WINDOW_MS > 0:
+        from utils.batching import BatchScheduler
+        model.scheduler = BatchScheduler(model.predictor, BATCH_WINDOW_MS, BATCH_MAX_SIZE)
+
+
+def stop_scheduler(model):
+
+    if model.scheduler is not None:
+        model.scheduler.close()
+
+
+def models_loaded():
+
+    return registry is not None and bool(registry.loaded_models())
+
+
+def background_load():
+
+    global load_error
+
+    try:
+        load_predictor()
+    except Exception as e:
+        load_error = str(e)
+        print(f"❌ Model loading failed: {e}")
+
+
+def after_fork():
+
+    global forked
+    forked = True
+
+    # Threads do not survive fork(): models preloaded in the gunicorn master
+    # need their interpreters and batching threads, and the registry its
+    # watcher, started in each worker
+    if registry is not None:
+        for model in registry.loaded_models():
+            model.predictor.after_fork()
+
+        registry.after_fork()
+
+
 # ---------------- Routes ----------------
 @app.route('/')
 def index():
@@ -94,73 +495,397 @@ def index():
 @app.route('/predict', methods=['POST'])
 def predict():
 
-    global predictor
-
     try:
 
-        # -------- Lazy Load Predictor --------
-        if predictor is None:
-            from utils.predict import FracturePredictor
-            predictor = FracturePredictor()
+        explain = explain_format()
+        tta = tta_views()
+
+        if explain and tta:
+            return jsonify({'error': 'explain and tta cannot be combined'}), 400
 
         # -------- Validate File --------
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file uploaded'}), 400
+        with STAGE_SECONDS.time(stage='receive'):
+
+            # Raw body (image/* or application/dicom) instead of a form upload
+            if is_raw_upload(request):
+                data = read_raw_body(request)
+                filename = 'upload.' + request.mimetype.split('/', 1)[1]
+
+            else:
+                if 'file' not in request.files:
+                    return jsonify({'error': 'No file uploaded'}), 400
+
+                file = request.files['file']
 
-        file = request.files['file']
+                if file.filename == '':
+                    return jsonify({'error': 'No file selected'}), 400
 
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
+                if not allowed_file(file.filename):
+                    return jsonify({'error': 'Invalid file type'}), 400
 
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file type'}), 400
+                data = read_upload(file)
+                filename = file.filename
 
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        filepath = None
+        if app.config['PERSIST_UPLOADS']:
+            filepath = persist_upload(filename, data)
 
         # -------- AI Prediction --------
-        prediction = predictor.predict(filepath)
+        if explain is not None:
+            result, cached = run_explained(data, explain)
+        else:
+            result, cached = run_prediction(data, tta)
 
-        treatment = get_treatment_recommendation(
-            prediction['fracture_type'],
-            prediction['severity']
-        )
+        with STAGE_SECONDS.time(stage='serialize'):
+            return jsonify(dict(result, success=True, cached=cached,
+                                image_path=filepath))
+
+    # Rejected uploads: 400 / 413 / 415 from the ingestion checks
+    except HTTPException as e:
+        return http_error(e)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# ---------------- Batch Prediction ----------------
+def archive_members(archive):
+
+    # Images inside a zip archive, skipping folders and other file types
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir() and allowed_file(info.filename)
+    ]
+
+
+def count_batch_uploads(files):
+
+    # Only zip central directories are read; nothing is decompressed
+    count = 0
+
+    for file in files:
+
+        if file.filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                count += len(archive_members(archive))
+        else:
+            count += 1
+
+    return count
+
+
+def extract_archive(file):
+
+    items = []
+    total_bytes = 0
+
+    with zipfile.ZipFile(file.stream) as archive:
+
+        for info in archive_members(archive):
+
+            # Guard against zip bombs before decompressing
+            total_bytes += info.file_size
+            if total_bytes > MAX_ARCHIVE_BYTES:
+                raise ValueError('Archive too large when decompressed')
+
+            try:
+                items.append((info.filename, check_image_bytes(archive.read(info)), None))
+            except HTTPException as e:
+                items.append((info.filename, None, e.description))
+
+    return items
+
+
+def collect_batch_uploads():
+
+    files = [f for f in request.files.getlist('files') if f.filename != '']
+
+    # Reject an oversized batch before any image is read or unpacked
+    if count_batch_uploads(files) > MAX_BATCH_FILES:
+        raise BadRequest(f'Too many files (max {MAX_BATCH_FILES})')
+
+    items = []
+
+    for file in files:
+
+        if file.filename.lower().endswith('.zip'):
+            items.extend(extract_archive(file))
+        elif not allowed_file(file.filename):
+            items.append((file.filename, None, 'Invalid file type'))
+        else:
+            # Bad images are reported per file instead of failing the batch
+            try:
+                items.append((file.filename, read_upload(file), None))
+            except HTTPException as e:
+                items.append((file.filename, None, e.description))
+
+    return items
+
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+
+    try:
+
+        # -------- Validate Files --------
+        try:
+            with STAGE_SECONDS.time(stage='receive'):
+                items = collect_batch_uploads()
+        except (zipfile.BadZipFile, ValueError) as e:
+            return jsonify({'error': f'Invalid archive: {e}'}), 400
+        except HTTPException as e:
+            return http_error(e)
+
+        if not items:
+            return jsonify({'error': 'No files uploaded'}), 400
+
+        results = [None] * len(items)
+        pending = {}
+
+        for i, (filename, data, error) in enumerate(items):
+
+            if error is not None:
+                results[i] = {'filename': filename, 'error': error}
+                continue
+
+            model = get_registry().route(data)
+
+            # -------- Result Cache --------
+            _, cached = lookup_cache(data, cache_namespace(model))
+            if cached is not None:
+                results[i] = dict(cached, filename=filename, cached=True)
+                continue
+
+            pending.setdefault(model.version, (model, []))[1].append(i)
+
+        # -------- AI Prediction --------
+        # One stacked run per model version the items were routed to
+        for model, rows in pending.values():
+
+            predictor = registry.ensure_loaded(model).predictor
+            predictions = predictor.predict_batch([items[i][1] for i in rows])
+
+            for i, prediction in zip(rows, predictions):
+
+                filename, data, _ = items[i]
+
+                if 'error' in prediction:
+                    results[i] = {'filename': filename, 'error': prediction['error']}
+                    continue
+
+                result = dict(build_result(prediction), model_version=model.version)
+
+                if result_cache is not None:
+                    result_cache.set(ResultCache.key_for(data, cache_namespace(model)), result)
+
+                results[i] = dict(result, filename=filename, cached=False)
 
-        return jsonify({
-            'success': True,
-            'fracture_type': prediction['fracture_type'],
-            'severity': prediction['severity'],
-            'confidence': prediction['confidence'],
-            'treatment': treatment,
-            'image_path': filepath
-        })
+        with STAGE_SECONDS.time(stage='serialize'):
+            return jsonify({
+                'success': True,
+                'count': len(results),
+                'results': results
+            })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# ---------------- Async Jobs ----------------
+def get_jobs():
+
+    global jobs
+
+    # Created on first use so the worker threads start after any fork
+    with jobs_lock:
+
+        if jobs is None:
+            from utils.jobs import create_job_backend
+            jobs = create_job_backend(
+                JOB_BACKEND,
+                run_job,
+                workers=JOB_WORKERS,
+                max_queue=JOB_QUEUE_SIZE,
+                result_ttl=JOB_RESULT_TTL
+            )
+
+    return jobs
+
+
+def run_job(data):
+
+    result, cached = run_prediction(data)
+
+    return dict(result, cached=cached)
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+
+    from utils.jobs import QueueFull
+
+    # -------- Validate File --------
+    try:
+
+        if is_raw_upload(request):
+            data = read_raw_body(request)
+
+        else:
+            if 'file' not in request.files:
+                return jsonify({'error': 'No file uploaded'}), 400
+
+            file = request.files['file']
+
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+
+            if not allowed_file(file.filename):
+                return jsonify({'error': 'Invalid file type'}), 400
+
+            data = read_upload(file)
+
+    except HTTPException as e:
+        return http_error(e)
+
+    # -------- Enqueue --------
+    try:
+        job_id = get_jobs().submit(data)
+    except QueueFull as e:
+        response = jsonify({'error': 'Server busy, retry later'})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+
+    status_url = url_for('get_job', job_id=job_id)
+
+    response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+
+    # ?wait=N long-polls up to N seconds for the job to finish
+    try:
+        wait = float(request.args.get('wait') or 0)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+
+    # NaN and negative values mean no wait
+    wait = min(wait, 30.0) if wait > 0 else 0.0
+
+    if wait > 0:
+        job = get_jobs().wait(job_id, wait)
+    else:
+        job = get_jobs().get(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    return jsonify(job)
+
+
+@app.route('/jobs/<job_id>/stream')
+def stream_job(job_id):
+
+    backend = get_jobs()
+
+    if backend.get(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def events():
+
+        # Server-sent events: a status update every few seconds until done
+        while True:
+            job = backend.wait(job_id, 5.0)
+
+            if job is None:
+                return
+
+            yield f"data: {json.dumps(job)}\n\n"
+
+            if job['status'] in ('done', 'failed'):
+                return
+
+    return Response(events(), mimetype='text/event-stream')
+
+
 @app.route('/about')
 def about():
 
-    global predictor
+    model = get_registry().primary()
 
-    classes = []
-    if predictor is not None:
-        classes = predictor.get_classes()
+    if model.predictor is not None:
+        classes = model.predictor.get_classes()
+    else:
+        from utils.predict import load_class_maps
+        detect_classes, classify_classes = load_class_maps(model.model_dir)
+        classes = {
+            "Detection Classes": list(detect_classes.keys()),
+            "Fracture Classes": list(classify_classes.keys())
+        }
 
     return jsonify({
         'model_name': 'FractureSense AI Dual Model',
         'model_type': 'MobileNetV2 Transfer Learning',
+        'model_version': model.version,
+        'versions': registry.describe(),
         'classes': classes,
         'description': 'Multi-stage fracture detection and classification AI'
     })
 
 
+# ---------------- Metrics ----------------
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_time(response):
+
+    if request.endpoint in ('predict', 'predict_batch', 'submit_job'):
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start,
+                                endpoint=request.endpoint)
+
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+
+    if registry is not None:
+        depth = sum(m.scheduler.queue_depth() for m in registry.loaded_models()
+                    if m.scheduler is not None)
+        QUEUE_DEPTH.set(depth, queue='batch')
+
+    if jobs is not None:
+        QUEUE_DEPTH.set(jobs.queue_depth(), queue='jobs')
+
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 # ---------------- Health Check ----------------
 @app.route('/health')
 def health():
-    return jsonify({"status": "healthy"})
+
+    ready = models_loaded()
+
+    if load_error is not None:
+        return jsonify({"status": "error", "ready": False, "error": load_error}), 503
+
+    # Lazy mode loads on demand, so the process is healthy before loading
+    if not ready and MODEL_LOAD_MODE != 'lazy':
+        return jsonify({"status": "loading", "ready": False}), 503
+
+    return jsonify({"status": "healthy", "ready": ready, "models_loaded": ready})
+
+
+# ---------------- Startup Loading ----------------
+if MODEL_LOAD_MODE == 'eager':
+    load_predictor()
+elif MODEL_LOAD_MODE == 'background':
+    threading.Thread(target=background_load, name="model-loader", daemon=True).start()
 
 
 # ---------------- Run Server ----------------
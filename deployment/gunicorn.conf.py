@@ -0,0 +1,37 @@
+"""Gunicorn settings for FractureSense AI.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Set GUNICORN_PRELOAD=1 with PREDICTOR_BACKEND=tflite and MODEL_LOAD_MODE=eager
+to read the models once in the master and share the model bytes
+copy-on-write across the forked workers. Neither TensorFlow's thread pools
+nor a multi-threaded TFLite interpreter survive fork(), so the master never
+runs a model: each worker creates its interpreters and warms them up in
+post_fork. With the Keras backend each worker loads its own models instead.
+"""
+
+import os
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+timeout = 120
+
+backend = os.environ.get('PREDICTOR_BACKEND', 'keras')
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+if preload_app and backend != 'tflite':
+    print("⚠️ GUNICORN_PRELOAD needs PREDICTOR_BACKEND=tflite; loading per worker")
+    preload_app = False
+
+# The app reads the effective setting: while preloading it starts no threads
+# in the master and leaves them to post_fork
+os.environ['GUNICORN_PRELOAD'] = '1' if preload_app else '0'
+
+
+def post_fork(server, worker):
+
+    if preload_app:
+        import app
+        app.after_fork()
@@ -0,0 +1,124 @@
+"""Dynamic micro-batching for FracturePredictor.
+
+Requests arriving within a short window are stacked into one tensor and run
+through the models together; every caller gets back its own result.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchScheduler:
+
+    def __init__(self, predictor, window_ms=10, max_batch=16):
+
+        self.predictor = predictor
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, int(max_batch))
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._worker = threading.Thread(
+            target=self._run, name="batch-scheduler", daemon=True
+        )
+        self._worker.start()
+
+
+    # ---------------------------------------------
+    # SUBMISSION
+    # ---------------------------------------------
+    def submit(self, img_array):
+
+        future = Future()
+
+        with self._lock:
+            if not self._closed:
+                self._queue.put((img_array, future))
+                return future
+
+        # Closed (its model version was swapped out): run the request inline
+        try:
+            future.set_result(self.predictor.predict_arrays(img_array)[0])
+        except Exception as e:
+            future.set_exception(e)
+
+        return future
+
+
+    def predict(self, img_array, timeout=None):
+
+        return self.submit(img_array).result(timeout=timeout)
+
+
+    def queue_depth(self):
+
+        return self._queue.qsize()
+
+
+    def close(self):
+
+        # Requests already queued are still answered, then the thread exits
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+
+
+    # ---------------------------------------------
+    # WORKER LOOP
+    # ---------------------------------------------
+    def _collect(self):
+
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.window
+
+        while len(batch) < self.max_batch:
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if item is None:
+                # Closing: finish this batch first
+                self._queue.put(None)
+                break
+
+            batch.append(item)
+
+        return batch
+
+
+    def _run(self):
+
+        while True:
+
+            batch = self._collect()
+            if not batch:
+                return
+
+            futures = [future for _, future in batch]
+
+            try:
+                img_batch = np.concatenate([img for img, _ in batch], axis=0)
+                results = self.predictor.predict_arrays(img_batch)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
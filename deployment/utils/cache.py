@@ -0,0 +1,209 @@
+"""Content-hash result cache for predictions.
+
+Results are keyed on a SHA-256 of the uploaded bytes. The in-memory tier is
+a bounded LRU with an optional TTL; the optional on-disk tier stores one JSON
+file per key so entries survive gunicorn worker restarts and are shared by
+all workers on the host.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+
+    def __init__(self, max_entries=256, ttl=None, disk_dir=None, max_disk_entries=10000):
+
+        self.max_entries = max_entries
+        self.ttl = ttl or None
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+
+    @staticmethod
+    def key_for(data, *parts):
+
+        digest = hashlib.sha256(data)
+        for part in parts:
+            digest.update(b"\0" + str(part).encode())
+
+        return digest.hexdigest()
+
+
+    # ---------------------------------------------
+    # LOOKUP
+    # ---------------------------------------------
+    def get(self, key):
+
+        now = time.time()
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                expires_at, value = entry
+
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._entries[key]
+
+        entry = self._disk_get(key, now)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        expires_at, value = entry
+        self._memory_set(key, value, expires_at)
+
+        return value
+
+
+    def set(self, key, value):
+
+        expires_at = self._expiry(time.time())
+
+        self._memory_set(key, value, expires_at)
+        self._disk_set(key, value, expires_at)
+
+
+    def stats(self):
+
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+    def _expiry(self, now):
+
+        return now + self.ttl if self.ttl else None
+
+
+    # ---------------------------------------------
+    # MEMORY TIER (LRU)
+    # ---------------------------------------------
+    def _memory_set(self, key, value, expires_at):
+
+        with self._lock:
+
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    # ---------------------------------------------
+    # DISK TIER
+    # ---------------------------------------------
+    def _disk_path(self, key):
+
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+
+    def _disk_get(self, key, now):
+
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        expires_at = entry.get("expires_at")
+
+        if expires_at is not None and expires_at <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # Touch the file so disk pruning also evicts least recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return expires_at, entry.get("value")
+
+
+    def _disk_set(self, key, value, expires_at):
+
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        # Listing the tier is O(n), so only check the bound periodically
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+
+    def _prune_disk(self):
+
+        entries = []
+
+        for shard in os.scandir(self.disk_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    entries.append(entry)
+
+        overflow = len(entries) - self.max_disk_entries
+        if overflow <= 0:
+            return
+
+        # Least recently used files go first, plus 10% headroom
+        entries.sort(key=lambda e: e.stat().st_mtime)
+
+        for entry in entries[:overflow + self.max_disk_entries // 10]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,239 @@
+"""DICOM decoding for the model input.
+
+Needs the optional ``pydicom`` package (3.x). Only the header and the pixel
+data of the frames that are used are read. Each frame is block-averaged down
+to about twice the model size while still in its stored 12/16-bit form, then
+the modality rescale (slope/intercept), window/level and MONOCHROME1
+inversion are applied to the small array before the final resize.
+
+Multi-frame files are sampled evenly up to ``MAX_FRAMES`` and returned as one
+stacked batch, one row per frame.
+"""
+
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+from utils.preprocess import REDUCING_GAP, to_model_input
+
+try:
+    import pydicom
+    from pydicom.pixels import pixel_array
+except ImportError:
+    pydicom = None
+
+
+MAGIC_OFFSET = 128
+MAGIC = b"DICM"
+
+MAX_FRAMES = 32
+
+# Without a stored window, map this percentile range to the display range
+AUTO_WINDOW_PERCENTILES = (0.5, 99.5)
+
+DICOM_EXTENSIONS = (".dcm", ".dicom")
+
+
+def has_magic(head):
+
+    return head[MAGIC_OFFSET:MAGIC_OFFSET + len(MAGIC)] == MAGIC
+
+
+def is_dicom(image):
+
+    # Accepts a file path, raw bytes or a seekable file-like object
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return has_magic(bytes(image[:MAGIC_OFFSET + len(MAGIC)]))
+
+    if isinstance(image, (str, os.PathLike)):
+        if str(image).lower().endswith(DICOM_EXTENSIONS):
+            return True
+        with open(image, "rb") as f:
+            return has_magic(f.read(MAGIC_OFFSET + len(MAGIC)))
+
+    position = image.tell()
+    head = image.read(MAGIC_OFFSET + len(MAGIC))
+    image.seek(position)
+
+    return has_magic(head)
+
+
+def require_pydicom():
+
+    if pydicom is None:
+        raise RuntimeError("DICOM input needs the 'pydicom' package")
+
+
+def _source(image):
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return io.BytesIO(image)
+
+    return image
+
+
+def read_header(image):
+
+    require_pydicom()
+
+    src = _source(image)
+    header = pydicom.dcmread(src, stop_before_pixels=True)
+
+    if hasattr(src, "seek"):
+        src.seek(0)
+
+    return header
+
+
+def frame_indices(frames, max_frames=MAX_FRAMES):
+
+    if frames <= max_frames:
+        return list(range(frames))
+
+    # Evenly spaced frames across the whole study
+    return sorted({int(i) for i in np.linspace(0, frames - 1, max_frames)})
+
+
+# ---------------------------------------------
+# PIXEL PIPELINE
+# ---------------------------------------------
+def downsample(pixels, size):
+
+    # Integer block mean down to ~2x the target, on the stored values
+    height, width = pixels.shape[:2]
+    factor = max(1, min(height // (2 * size[1]), width // (2 * size[0])))
+
+    if factor == 1:
+        return pixels.astype(np.float32)
+
+    h, w = height // factor * factor, width // factor * factor
+    blocks = pixels[:h, :w].reshape(h // factor, factor, w // factor, factor, *pixels.shape[2:])
+
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def _first(value, default):
+
+    if value is None or value == "":
+        return default
+
+    # Window tags may hold several values; the first is the default view
+    if isinstance(value, (list, tuple)) or type(value).__name__ == "MultiValue":
+        value = value[0]
+
+    return float(value)
+
+
+def window_level(values, header):
+
+    center = _first(header.get("WindowCenter"), None)
+    width = _first(header.get("WindowWidth"), None)
+
+    if center is not None and width is not None and width > 0:
+        low, high = center - width / 2, center + width / 2
+    else:
+        low, high = np.percentile(values, AUTO_WINDOW_PERCENTILES)
+
+    scaled = (values - low) * (255.0 / max(high - low, 1e-6))
+    pixels = np.clip(scaled, 0, 255).astype(np.uint8)
+
+    # MONOCHROME1 stores bone dark; the models were trained on bone bright
+    if header.get("PhotometricInterpretation") == "MONOCHROME1":
+        pixels = 255 - pixels
+
+    return pixels
+
+
+def to_display(frame, header, size):
+
+    values = downsample(frame, size)
+
+    # Colour (e.g. secondary capture) is already display-ready
+    if values.ndim == 3:
+        return np.clip(values, 0, 255).astype(np.uint8)
+
+    slope = _first(header.get("RescaleSlope"), 1.0)
+    intercept = _first(header.get("RescaleIntercept"), 0.0)
+
+    # The rescale is linear, so applying it after the block mean is exact
+    return window_level(values * slope + intercept, header)
+
+
+def load_dicom_array(image, size=(224, 224), max_frames=MAX_FRAMES):
+
+    header = read_header(image)
+    frames = int(header.get("NumberOfFrames", 1) or 1)
+
+    src = _source(image)
+    batch = []
+
+    for index in frame_indices(frames, max_frames):
+
+        # Decodes only the requested frame
+        frame = pixel_array(src, index=index if frames > 1 else None)
+
+        if hasattr(src, "seek"):
+            src.seek(0)
+
+        img = Image.fromarray(to_display(frame, header, size))
+        img = img.resize(size, reducing_gap=REDUCING_GAP)
+
+        batch.append(to_model_input(np.asarray(img), size))
+
+    return np.concatenate(batch, axis=0)
+
+
+def complete(data):
+
+    # For utils.ingest: is the (uncompressed) pixel data all there?
+    if pydicom is None:
+        return True
+
+    src = io.BytesIO(data)
+
+    try:
+        header = pydicom.dcmread(src, stop_before_pixels=True)
+    except Exception:
+        return False
+
+    # Without a transfer syntax the pixel data cannot be decoded at all
+    transfer_syntax = getattr(getattr(header, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax is None:
+        return False
+
+    # Compressed frames are length-prefixed; pydicom checks them on decode
+    if transfer_syntax.is_compressed:
+        return True
+
+    if "Rows" not in header or "BitsAllocated" not in header:
+        return False
+
+    frames = int(header.get("NumberOfFrames", 1) or 1)
+    samples = int(header.get("SamplesPerPixel", 1))
+    bits = header.Rows * header.Columns * frames * samples * header.BitsAllocated
+
+    # dcmread stops at the pixel data tag: tag and length take 8 bytes, or
+    # 12 with an explicit OB/OW VR
+    start = src.tell()
+    element = 12 if data[start + 4:start + 6] in (b"OB", b"OW") else 8
+
+    return len(data) - start >= (bits + 7) // 8 + element
+
+
+def sniff(head):
+
+    # For utils.ingest: (format, width, height), None while not known yet
+    if len(head) < MAGIC_OFFSET + len(MAGIC) or not has_magic(head):
+        return None
+
+    if pydicom is None:
+        return "DICOM", None, None
+
+    try:
+        header = pydicom.dcmread(io.BytesIO(head), stop_before_pixels=True)
+        return "DICOM", int(header.Columns), int(header.Rows)
+    except Exception:
+        # Header not complete in the data received so far
+        return "DICOM", None, None
@@ -0,0 +1,304 @@
+"""Streaming upload ingestion.
+
+Uploaded images are checked while the request body arrives. The first bytes
+must carry a PNG, JPEG or DICOM signature, the header dimensions must be within
+``MAX_IMAGE_PIXELS`` and the file may not grow past ``MAX_IMAGE_BYTES``, so
+bad uploads are rejected before the rest of the body is read or anything is
+decoded. Accepted files stay in memory (no spooling to a temp file) and go
+straight to the decoder once a final truncation check has passed.
+
+Errors are werkzeug HTTP exceptions (400, 413, 415); routes must handle them
+before any generic ``except Exception``.
+"""
+
+import io
+
+from flask import Request, current_app
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+from utils import dicom
+
+
+# Give up looking for dimensions after this much data; the decoder's own
+# limits still apply to files whose header could not be sniffed
+SNIFF_LIMIT = 1024 * 1024
+
+# End-of-image markers are looked for in this many trailing bytes, which
+# leaves room for small trailers some encoders append
+TAIL_BYTES = 4096
+
+READ_CHUNK = 64 * 1024
+
+# JPEG start-of-frame markers carry the image size; C4/C8/CC are not frames
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# ---------------------------------------------
+# SNIFFERS
+# ---------------------------------------------
+# Each sniffer returns None if the data is not its format, otherwise
+# (format, width, height) with width/height None while more data is needed.
+def sniff_png(head):
+
+    if not head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return None
+
+    if len(head) < 24:
+        return "PNG", None, None
+
+    if head[12:16] != b"IHDR":
+        raise UnsupportedMediaType("Corrupt PNG header")
+
+    return "PNG", int.from_bytes(head[16:20], "big"), int.from_bytes(head[20:24], "big")
+
+
+def sniff_jpeg(head):
+
+    if not head.startswith(b"\xff\xd8\xff"):
+        return None
+
+    i = 2
+
+    # Walk the marker segments up to the first start-of-frame
+    while i + 4 <= len(head):
+
+        if head[i] != 0xFF:
+            raise UnsupportedMediaType("Corrupt JPEG header")
+
+        marker = head[i + 1]
+
+        if marker == 0xFF:
+            i += 1
+            continue
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+
+        if marker in JPEG_SOF:
+            if i + 9 > len(head):
+                break
+            height = int.from_bytes(head[i + 5:i + 7], "big")
+            width = int.from_bytes(head[i + 7:i + 9], "big")
+            return "JPEG", width, height
+
+        if marker in (0xD9, 0xDA):
+            raise UnsupportedMediaType("JPEG has no frame header")
+
+        i += 2 + int.from_bytes(head[i + 2:i + 4], "big")
+
+    return "JPEG", None, None
+
+
+def png_complete(data):
+    return b"IEND" in data[-TAIL_BYTES:]
+
+
+def jpeg_complete(data):
+    return b"\xff\xd9" in data[-TAIL_BYTES:]
+
+
+SNIFFERS = [sniff_png, sniff_jpeg, dicom.sniff]
+
+COMPLETENESS = {
+    "PNG": png_complete,
+    "JPEG": jpeg_complete,
+    "DICOM": dicom.complete
+}
+
+# Enough for every signature, including the DICOM preamble + "DICM"
+SIGNATURE_BYTES = 132
+
+UNSUPPORTED = "Unsupported image format (expected PNG, JPEG or DICOM)"
+
+# Raw (non-multipart) bodies accepted by /predict and /jobs
+RAW_MIMETYPES = ("application/dicom",)
+
+
+# ---------------------------------------------
+# BUFFER
+# ---------------------------------------------
+class SniffingBuffer(io.BytesIO):
+
+    def __init__(self, max_bytes=None, max_pixels=None, strict=True):
+
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.strict = strict
+
+        self.format = None
+        self.size = None
+        self.error = None
+        self._sniffed = False
+
+
+    def write(self, data):
+
+        if self.error is not None:
+            # Non-strict: drop the rest of a rejected file
+            return len(data)
+
+        written = super().write(data)
+
+        try:
+            self._check()
+        except (BadRequest, RequestEntityTooLarge, UnsupportedMediaType) as e:
+            if self.strict:
+                raise
+            self.error = e
+            self.seek(0)
+            self.truncate()
+
+        return written
+
+
+    def _check(self):
+
+        length = self.tell()
+
+        if self.max_bytes is not None and length > self.max_bytes:
+            raise RequestEntityTooLarge(
+                f"Image exceeds {self.max_bytes // (1024 * 1024)} MB"
+            )
+
+        if self._sniffed or length < SIGNATURE_BYTES:
+            return
+
+        self._sniff(length)
+
+
+    def _sniff(self, length):
+
+        head = self.getvalue()[:SNIFF_LIMIT]
+
+        for sniffer in SNIFFERS:
+            found = sniffer(head)
+            if found is not None:
+                break
+        else:
+            raise UnsupportedMediaType(UNSUPPORTED)
+
+        self.format, width, height = found
+
+        if width is None:
+            # Dimensions not seen yet: try again with the next chunk
+            self._sniffed = length >= SNIFF_LIMIT
+            return
+
+        self._sniffed = True
+        self.size = (width, height)
+
+        if width == 0 or height == 0:
+            raise UnsupportedMediaType("Image has zero width or height")
+
+        if self.max_pixels is not None and width * height > self.max_pixels:
+            raise RequestEntityTooLarge(
+                f"Image is {width}x{height}, larger than {self.max_pixels:,} pixels"
+            )
+
+
+    def finish(self):
+
+        # Raise a deferred error, then reject empty or truncated files
+        if self.error is not None:
+            raise self.error
+
+        data = self.getvalue()
+
+        if not data:
+            raise BadRequest("Empty upload")
+
+        if self.format is None:
+            # Files shorter than SIGNATURE_BYTES are only sniffed here
+            self._sniff(len(data))
+
+        complete = COMPLETENESS.get(self.format)
+        if complete is not None and not complete(data):
+            raise BadRequest(f"Truncated {self.format} upload")
+
+        return data
+
+
+def new_buffer(strict=True):
+
+    config = current_app.config
+
+    return SniffingBuffer(
+        max_bytes=config.get("MAX_IMAGE_BYTES"),
+        max_pixels=config.get("MAX_IMAGE_PIXELS"),
+        strict=strict
+    )
+
+
+# ---------------------------------------------
+# REQUEST INTEGRATION
+# ---------------------------------------------
+class IngestRequest(Request):
+
+    # Endpoints that report bad files per item instead of failing the request
+    lenient_endpoints = {"predict_batch"}
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+
+        if filename and self.endpoint in self.lenient_endpoints:
+            self._check_file_count()
+
+        # Archives are unpacked later and checked file by file
+        if filename and filename.lower().endswith(".zip"):
+            return super()._get_file_stream(
+                total_content_length, content_type, filename, content_length
+            )
+
+        return new_buffer(strict=self.endpoint not in self.lenient_endpoints)
+
+
+    def _check_file_count(self):
+
+        # Counted as each part starts, so an oversized batch is rejected
+        # before the remaining files are buffered
+        self._file_count = getattr(self, "_file_count", 0) + 1
+        limit = current_app.config.get("MAX_BATCH_FILES")
+
+        if limit is not None and self._file_count > limit:
+            raise BadRequest(f"Too many files (max {limit})")
+
+
+def is_raw_upload(request):
+
+    return request.mimetype.startswith("image/") or request.mimetype in RAW_MIMETYPES
+
+
+def read_upload(file):
+
+    # FileStorage from request.files
+    stream = file.stream
+
+    if isinstance(stream, SniffingBuffer):
+        return stream.finish()
+
+    return file.read()
+
+
+def read_raw_body(request):
+
+    # Body sent as image/* instead of multipart: same checks, chunk by chunk
+    buffer = new_buffer()
+
+    while True:
+        chunk = request.stream.read(READ_CHUNK)
+        if not chunk:
+            break
+        buffer.write(chunk)
+
+    return buffer.finish()
+
+
+def check_image_bytes(data):
+
+    # For images that did not arrive through a SniffingBuffer (zip members)
+    buffer = new_buffer()
+    buffer.write(data)
+
+    return buffer.finish()
@@ -0,0 +1,186 @@
+"""Asynchronous prediction jobs.
+
+``JobBackend`` is the interface the Flask routes talk to; ``InProcessJobQueue``
+implements it with a bounded queue drained by a pool of worker threads. Jobs
+live in the memory of one process, so run a single gunicorn worker (with
+threads) or route clients back to the same worker. A shared backend such as
+Redis can be added by implementing the same methods.
+"""
+
+import abc
+import math
+import queue
+import threading
+import time
+import uuid
+
+
+class QueueFull(Exception):
+
+    def __init__(self, retry_after):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+class JobBackend(abc.ABC):
+
+    # A backend missing one of these fails when it is created, not on the
+    # first job
+
+    @abc.abstractmethod
+    def submit(self, payload):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def wait(self, job_id, timeout):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def queue_depth(self):
+        raise NotImplementedError
+
+
+class InProcessJobQueue(JobBackend):
+
+    def __init__(self, handler, workers=2, max_queue=32, result_ttl=600):
+
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.result_ttl = result_ttl
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+        # Moving average of job run time, used to compute Retry-After
+        self._avg_seconds = 1.0
+
+        for i in range(self.workers):
+            threading.Thread(
+                target=self._run, name=f"job-worker-{i}", daemon=True
+            ).start()
+
+
+    # ---------------------------------------------
+    # CLIENT API
+    # ---------------------------------------------
+    def submit(self, payload):
+
+        self._prune()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": time.time()
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._events[job_id] = threading.Event()
+
+        try:
+            self._queue.put_nowait((job_id, payload))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+                del self._events[job_id]
+            raise QueueFull(self.retry_after())
+
+        return job_id
+
+
+    def get(self, job_id):
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+
+    def wait(self, job_id, timeout):
+
+        event = self._events.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+
+        return self.get(job_id)
+
+
+    def queue_depth(self):
+
+        return self._queue.qsize()
+
+
+    def retry_after(self):
+
+        # Seconds until the workers have drained the current backlog
+        backlog = self._queue.qsize() * self._avg_seconds / self.workers
+        return max(1, math.ceil(backlog))
+
+
+    # ---------------------------------------------
+    # WORKERS
+    # ---------------------------------------------
+    def _run(self):
+
+        while True:
+
+            job_id, payload = self._queue.get()
+
+            with self._lock:
+                done_event = self._events[job_id]
+
+            self._update(job_id, status="running", started_at=time.time())
+
+            start = time.perf_counter()
+
+            try:
+                result = self.handler(payload)
+                self._update(job_id, status="done", result=result)
+            except Exception as e:
+                self._update(job_id, status="failed", error=str(e))
+
+            elapsed = time.perf_counter() - start
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+
+            self._update(job_id, finished_at=time.time())
+            done_event.set()
+
+
+    def _update(self, job_id, **fields):
+
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+
+    def _prune(self):
+
+        # Forget finished jobs once their results have expired
+        cutoff = time.time() - self.result_ttl
+
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get("finished_at", cutoff + 1) < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+                del self._events[job_id]
+
+
+JOB_BACKENDS = {
+    "inprocess": InProcessJobQueue
+}
+
+
+def create_job_backend(name, handler, **options):
+
+    if name not in JOB_BACKENDS:
+        raise ValueError(f"Unknown job backend '{name}', expected one of {sorted(JOB_BACKENDS)}")
+
+    return JOB_BACKENDS[name](handler, **options)
@@ -0,0 +1,32 @@
+"""Peak resident memory of the current process.
+
+Used by the benchmarks and training/export_tflite.py, which run each
+measurement in a fresh process and report its high-water mark.
+"""
+
+import resource
+
+
+def reset_peak_rss():
+
+    # Linux: writing 5 to clear_refs resets the VmHWM high-water mark, which
+    # a spawned child otherwise inherits from its parent
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    # ru_maxrss is reported in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
@@ -0,0 +1,208 @@
+"""Prometheus-style metrics for the inference pipeline.
+
+A small in-process registry rendered in the Prometheus text exposition format
+on ``/metrics``. Values are per process, so with several gunicorn workers each
+scrape sees the worker that answered it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labelnames, labels):
+
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, key)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+    def inc(self, amount=1, **labels):
+
+        key = _label_key(self.labelnames, labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+    def samples(self):
+
+        with self._lock:
+            return [
+                (self.name + _format_labels(self.labelnames, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+
+        key = _label_key(self.labelnames, labels)
+
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+
+    def observe(self, value, **labels):
+
+        key = _label_key(self.labelnames, labels)
+
+        with self._lock:
+
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0
+                }
+
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+
+            series["sum"] += value
+            series["count"] += 1
+
+
+    @contextmanager
+    def time(self, **labels):
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+    def samples(self):
+
+        out = []
+
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labelnames, key, [("le", bound)])
+                    out.append((f"{self.name}_bucket{labels}", count))
+
+                labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+                out.append((f"{self.name}_bucket{labels}", series["count"]))
+
+                labels = _format_labels(self.labelnames, key)
+                out.append((f"{self.name}_sum{labels}", series["sum"]))
+                out.append((f"{self.name}_count{labels}", series["count"]))
+
+        return out
+
+
+class Registry:
+
+    def __init__(self):
+
+        self._metrics = []
+
+
+    def register(self, metric):
+
+        self._metrics.append(metric)
+        return metric
+
+
+    def render(self):
+
+        lines = []
+
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------
+# PIPELINE METRICS
+# ---------------------------------------------
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fracturesense_stage_seconds",
+    "Time spent in each stage of the prediction pipeline",
+    ["stage"]
+))
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "fracturesense_request_seconds",
+    "End-to-end request latency by endpoint",
+    ["endpoint"]
+))
+
+INFERENCE_BATCH_SIZE = REGISTRY.register(Histogram(
+    "fracturesense_inference_batch_size",
+    "Images per detection model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+))
+
+DETECTION_RESULTS = REGISTRY.register(Counter(
+    "fracturesense_detection_results_total",
+    "Detection outcomes; 'fracture' images go on to classification",
+    ["result"]
+))
+
+GATE_DECISIONS = REGISTRY.register(Counter(
+    "fracturesense_gate_decisions_total",
+    "Images below the detection confidence gate, by policy",
+    ["policy"]
+))
+
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "fracturesense_cache_requests_total",
+    "Result cache lookups",
+    ["result"]
+))
+
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "fracturesense_queue_depth",
+    "Items waiting in the micro-batching and job queues",
+    ["queue"]
+))
@@ -1,79 +1,636 @@
-import tensorflow as tf
 import numpy as np
 import json
-from PIL import Image
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import DETECTION_RESULTS, GATE_DECISIONS, INFERENCE_BATCH_SIZE, STAGE_SECONDS
+from utils.dicom import is_dicom, load_dicom_array
+from utils.explain import LazyHeatmap
+from utils.preprocess import load_image_array
+from utils.registry import read_bundle
+from utils.tta import DEFAULT_VIEWS, tta_batch
+
+# TFLite-only deployments ship tflite-runtime instead of TensorFlow
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+
+BACKENDS = ("keras", "tflite")
+
+# What to do with detections below the gate threshold:
+#   skip      - marginal fractures are reported without running the classifier
+#   uncertain - marginal images (fracture or normal) are reported as "Uncertain"
+#   tta       - marginal images are re-run with test-time augmentation
+GATE_POLICIES = ("none", "skip", "uncertain", "tta")
+
+
+def load_class_maps(model_dir="model"):
+
+    with open(os.path.join(model_dir, "detect_classes.json")) as f:
+        detect_classes = json.load(f)
+
+    with open(os.path.join(model_dir, "classify_classes.json")) as f:
+        classify_classes = json.load(f)
+
+    return detect_classes, classify_classes
 
 
 class FracturePredictor:
 
-    def __init__(self):
+    def __init__(self, fused=True, compiled=True, backend="keras",
+                 tflite_variant="fp16", num_threads=None,
+                 gate_policy="none", gate_threshold=0.7, gate_views=DEFAULT_VIEWS,
+                 model_dir="model", preload=False):
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+        if preload and backend != "tflite":
+            raise ValueError("Preloading before fork() needs the tflite backend")
+
+        if gate_policy not in GATE_POLICIES:
+            raise ValueError(f"Unknown gate policy '{gate_policy}', expected one of {GATE_POLICIES}")
+
+        # Weights, class maps and bundle.json (preprocessing config)
+        self.model_dir = model_dir
+        self.bundle = read_bundle(model_dir)
+
+        self.img_size = tuple(self.bundle.get("img_size", (224, 224)))
+        self.backend = backend
+
+        # -------- Confidence Gate --------
+        # Applied to the detection confidence (max softmax probability)
+        self.gate_policy = gate_policy
+        self.gate_threshold = gate_threshold
+        self.gate_views = gate_views
+
+        # Grad-CAM parts, built on the first explain request
+        self._explainer = None
+        self._explain_lock = threading.Lock()
+
+        # -------- Load Class Maps --------
+        self.detect_classes, self.classify_classes = load_class_maps(model_dir)
+
+        # Reverse dictionary
+        self.detect_labels = {v: k for k, v in self.detect_classes.items()}
+        self.classify_labels = {v: k for k, v in self.classify_classes.items()}
+
+        # -------- Load Models --------
+        # preload: loading in a gunicorn master that will fork. Only the TFLite
+        # files are read; each worker creates its interpreters in after_fork()
+        if backend == "tflite":
+            self._load_tflite(tflite_variant, num_threads, lazy=preload)
+        else:
+            self._load_keras(fused, compiled)
 
-        self.img_size = (224, 224)
+        if not preload:
+            self.warmup()
+
+        print(f"✅ Dual AI Models Loaded Successfully ({backend} backend)")
+        if self.fused:
+            print("✅ Shared backbone enabled (fused inference)")
+
+
+    # ---------------------------------------------
+    # KERAS BACKEND
+    # ---------------------------------------------
+    def _load_keras(self, fused, compiled):
 
         # -------- Load Detection Model --------
         self.detect_model = tf.keras.models.load_model(
-            "model/fracture_detection_model.h5"
+            os.path.join(self.model_dir, "fracture_detection_model.h5")
         )
 
         # -------- Load Classification Model --------
         self.classify_model = tf.keras.models.load_model(
-            "model/fracture_classification_model.h5"
+            os.path.join(self.model_dir, "fracture_classification_model.h5")
         )
 
-        # -------- Load Class Maps --------
-        with open("model/detect_classes.json") as f:
-            self.detect_classes = json.load(f)
+        # -------- Shared Backbone (Fused Mode) --------
+        # Both models are MobileNetV2 + small dense head with the ImageNet
+        # backbone frozen, so when the two backbones are identical we run it
+        # once and feed the pooled features to both heads.
+        self.detect_head = self.detect_model
+        self.classify_head = self.classify_model
+        self.fused = fused and self._fuse_backbones()
 
-        with open("model/classify_classes.json") as f:
-            self.classify_classes = json.load(f)
+        # -------- Compiled Inference --------
+        # model.predict() builds a data adapter and callback loop per call;
+        # graph functions with a fixed signature skip that per-request cost.
+        self.compiled = compiled
+        self._backbone_fn = self._compile(self.backbone) if self.fused else None
+        self._detect_fn = self._compile(self.detect_head)
+        self._classify_fn = self._compile(self.classify_head)
 
-        # Reverse dictionary
-        self.detect_labels = {v: k for k, v in self.detect_classes.items()}
-        self.classify_labels = {v: k for k, v in self.classify_classes.items()}
 
-        print("✅ Dual AI Models Loaded Successfully")
+    # ---------------------------------------------
+    # TFLITE BACKEND
+    # ---------------------------------------------
+    def _load_tflite(self, variant, num_threads, lazy=False):
+
+        from utils.tflite_backend import TFLiteModel
+
+        # Produced by training/export_tflite.py
+        self.detect_model = TFLiteModel(
+            os.path.join(self.model_dir, f"fracture_detection_model.{variant}.tflite"),
+            num_threads, lazy
+        )
+        self.classify_model = TFLiteModel(
+            os.path.join(self.model_dir, f"fracture_classification_model.{variant}.tflite"),
+            num_threads, lazy
+        )
+
+        # The exported graphs are the full models, so there is no shared
+        # backbone; the interpreters are already ahead-of-time compiled.
+        self.fused = False
+        self.compiled = True
+        self._backbone_fn = None
+        self._detect_fn = self.detect_model
+        self._classify_fn = self.classify_model
 
 
     # ---------------------------------------------
-    # IMAGE PREPROCESSING
+    # COMPILED INFERENCE
+    # ---------------------------------------------
+    def _compile(self, model):
+
+        if not self.compiled:
+            return model.predict
+
+        signature = [tf.TensorSpec(shape=model.input_shape, dtype=tf.float32)]
+        graph_fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=signature
+        )
+
+        return lambda x: graph_fn(x).numpy()
+
+
+    def warmup(self):
+
+        # Trace the graphs once so the first request does not pay for it
+        dummy = np.zeros((1,) + self.img_size + (3,), dtype="float32")
+        features = self.extract_features(dummy)
+
+        self._detect_fn(features)
+        self._classify_fn(features)
+
+
+    def after_fork(self):
+
+        # Preloaded in the master: create the interpreters in this worker
+        self.warmup()
+
+
+    def _compile_gradients(self, head):
+
+        signature = [
+            tf.TensorSpec(shape=head.input_shape, dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int32)
+        ]
+
+        @tf.function(input_signature=signature)
+        def gradients(pooled, class_idx):
+            with tf.GradientTape() as tape:
+                tape.watch(pooled)
+                probs = head(pooled, training=False)
+                # Log-probability: a confident softmax would flatten the gradient
+                score = tf.math.log(tf.gather(probs, class_idx, batch_dims=1) + 1e-9)
+            return tape.gradient(score, pooled)
+
+        return lambda pooled, class_idx: gradients(pooled, class_idx).numpy()
+
+
+    # ---------------------------------------------
+    # SHARED BACKBONE
     # ---------------------------------------------
-    def preprocess_image(self, image_path):
+    def _fuse_backbones(self):
 
-        img = Image.open(image_path).convert("RGB")
-        img = img.resize(self.img_size)
+        detect_layers = self.detect_model.layers
+        classify_layers = self.classify_model.layers
 
-        img_array = np.array(img).astype("float32") / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+        # Expected layout: [MobileNetV2, GlobalAveragePooling2D, head...]
+        if len(detect_layers) < 3 or len(classify_layers) < 3:
+            return False
 
-        return img_array
+        detect_base, classify_base = detect_layers[0], classify_layers[0]
+
+        if not self._same_weights(detect_base, classify_base):
+            print("⚠️ Backbones differ (fine-tuned?), using separate models")
+            return False
+
+        self.backbone = tf.keras.Sequential([
+            tf.keras.Input(shape=self.img_size + (3,)),
+            detect_base,
+            detect_layers[1]
+        ])
+
+        feature_dim = self.backbone.output_shape[-1]
+
+        self.detect_head = tf.keras.Sequential(
+            [tf.keras.Input(shape=(feature_dim,))] + detect_layers[2:]
+        )
+        self.classify_head = tf.keras.Sequential(
+            [tf.keras.Input(shape=(feature_dim,))] + classify_layers[2:]
+        )
+
+        # Rebuild both full models on the shared backbone so the second
+        # copy of the MobileNetV2 weights is released.
+        self.detect_model = tf.keras.Sequential([self.backbone, self.detect_head])
+        self.classify_model = tf.keras.Sequential([self.backbone, self.classify_head])
+
+        return True
+
+
+    @staticmethod
+    def _same_weights(model_a, model_b):
+
+        weights_a = model_a.get_weights()
+        weights_b = model_b.get_weights()
+
+        if len(weights_a) != len(weights_b):
+            return False
+
+        return all(
+            a.shape == b.shape and np.array_equal(a, b)
+            for a, b in zip(weights_a, weights_b)
+        )
+
+
+    def extract_features(self, img_array):
+
+        # Without a shared backbone the heads are the full models
+        if not self.fused:
+            return img_array
+
+        return self._backbone_fn(img_array)
+
+
+    # ---------------------------------------------
+    # GRAD-CAM
+    # ---------------------------------------------
+    @property
+    def can_explain(self):
+
+        return self.backend == "keras"
+
+
+    def _get_explainer(self):
+
+        with self._explain_lock:
+            if self._explainer is None:
+                self._explainer = self._build_explainer()
+
+        return self._explainer
+
+
+    def _build_explainer(self):
+
+        if not self.can_explain:
+            raise ValueError("Heatmaps need the keras backend")
+
+        # Split the classifier at the pooling: conv maps -> GAP -> head
+        if self.fused:
+            base, pooling = self.backbone.layers[:2]
+            head = self.classify_head
+        else:
+            base, pooling = self.classify_model.layers[:2]
+            head = tf.keras.Sequential(
+                [tf.keras.Input(shape=(base.output_shape[-1],))] + self.classify_model.layers[2:]
+            )
+
+        if not isinstance(pooling, tf.keras.layers.GlobalAveragePooling2D):
+            raise ValueError("Heatmaps need a GlobalAveragePooling2D classifier")
+
+        conv = tf.keras.Sequential([tf.keras.Input(shape=self.img_size + (3,)), base])
+
+        return {
+            "conv": self._compile(conv),
+            "head": self._classify_fn if self.fused else self._compile(head),
+            "gradients": self._compile_gradients(head)
+        }
+
+
+    def explain(self, image, fracture_type, frame=0):
+
+        # Heatmap for a result computed earlier (e.g. cached): only the
+        # classifier's feature maps are recomputed, detection is not re-run
+        explainer = self._get_explainer()
+
+        img_batch = self.preprocess_image(image)
+        img_batch = img_batch[min(frame, len(img_batch) - 1)][np.newaxis]
+
+        with STAGE_SECONDS.time(stage="backbone"):
+            conv_map = explainer["conv"](img_batch)[0]
+
+        return LazyHeatmap(explainer["gradients"], conv_map, conv_map.mean(axis=(0, 1)),
+                           self.classify_classes[fracture_type], img_batch[0])
+
+
+    # ---------------------------------------------
+    # IMAGE PREPROCESSING
+    # ---------------------------------------------
+    def preprocess_image(self, image):
+
+        # Path, bytes or file-like -> (N, 224, 224, 3) float32 in [0, 1];
+        # N is 1 except for multi-frame DICOM
+        with STAGE_SECONDS.time(stage="preprocess"):
+            if is_dicom(image):
+                return load_dicom_array(image, self.img_size)
+            return load_image_array(image, self.img_size)
 
 
     # ---------------------------------------------
     # MAIN PREDICTION FUNCTION
     # ---------------------------------------------
-    def predict(self, image_path):
+    def predict(self, image, explain=False):
+
+        img_array = self.preprocess_image(image)
+
+        return self.combine_frames(self.predict_arrays(img_array, explain))
+
+
+    @staticmethod
+    def combine_frames(results):
+
+        # One result per frame -> one result per image
+        if len(results) == 1:
+            return results[0]
+
+        fracture_frames = [
+            i for i, r in enumerate(results) if r["fracture_type"] != "No Fracture"
+        ]
+
+        # A fracture seen on any frame wins; report the most confident one
+        candidates = fracture_frames or range(len(results))
+        best = max(candidates, key=lambda i: results[i]["confidence"])
+
+        return dict(results[best], frame=best, frames=len(results),
+                    fracture_frames=fracture_frames)
+
+
+    # ---------------------------------------------
+    # BATCHED PREDICTION
+    # ---------------------------------------------
+    def predict_arrays(self, img_batch, explain=False):
 
-        img_array = self.preprocess_image(image_path)
+        INFERENCE_BATCH_SIZE.observe(len(img_batch))
+
+        explainer = self._get_explainer() if explain else None
+        conv_maps = None
+
+        # Only does work in fused mode; otherwise the heads run the backbone
+        with STAGE_SECONDS.time(stage="backbone"):
+            if explainer is not None and self.fused:
+                # Keep the feature maps for Grad-CAM; GAP is their spatial mean
+                conv_maps = explainer["conv"](img_batch)
+                features = conv_maps.mean(axis=(1, 2))
+            else:
+                features = self.extract_features(img_batch)
 
         # -------- Stage 1: Fracture Detection --------
-        detect_pred = self.detect_model.predict(img_array)
-        detect_idx = np.argmax(detect_pred)
-        detect_conf = float(np.max(detect_pred))
+        with STAGE_SECONDS.time(stage="detect"):
+            detect_pred = self._detect_fn(features)
+        detect_idx = np.argmax(detect_pred, axis=1)
+        detect_conf = np.max(detect_pred, axis=1)
 
-        detect_result = self.detect_labels[detect_idx]
+        results = [None] * len(img_batch)
+        fracture_rows = []
+        gated_rows = []
 
-        # -------- If Normal --------
-        if detect_result == "normal":
+        for row, idx in enumerate(detect_idx):
 
-            return {
-                "fracture_type": "No Fracture",
-                "severity": "Minor",
-                "confidence": round(detect_conf * 100, 2)
-            }
+            normal = self.detect_labels[int(idx)] == "normal"
+
+            # -------- Confidence Gate --------
+            if self._gated(normal, detect_conf[row]):
+                gated_rows.append(row)
+
+            # -------- If Normal --------
+            elif normal:
+                results[row] = {
+                    "fracture_type": "No Fracture",
+                    "severity": "Minor",
+                    "confidence": round(float(detect_conf[row]) * 100, 2)
+                }
+            else:
+                fracture_rows.append(row)
+
+        normal_count = sum(self.detect_labels[int(idx)] == "normal" for idx in detect_idx)
+        DETECTION_RESULTS.inc(normal_count, result="normal")
+        DETECTION_RESULTS.inc(len(img_batch) - normal_count, result="fracture")
+
+        if gated_rows:
+            GATE_DECISIONS.inc(len(gated_rows), policy=self.gate_policy)
+            self._apply_gate(gated_rows, img_batch, detect_conf, results)
+
+        if not fracture_rows:
+            return results
 
         # -------- Stage 2: Fracture Classification --------
-        classify_pred = self.classify_model.predict(img_array)
-        classify_idx = np.argmax(classify_pred)
+        # Only fracture-positive rows are sent to the classifier
+        with STAGE_SECONDS.time(stage="classify"):
+            if explainer is None:
+                classify_pred = self._classify_fn(features[fracture_rows])
+            else:
+                if conv_maps is not None:
+                    maps = conv_maps[fracture_rows]
+                else:
+                    maps = explainer["conv"](img_batch[fracture_rows])
+                pooled = maps.mean(axis=(1, 2))
+                classify_pred = explainer["head"](pooled)
+
+        for i, (row, pred) in enumerate(zip(fracture_rows, classify_pred)):
+            results[row] = self._classification_result(pred)
+
+            # Computed only if the caller reads it
+            if explainer is not None:
+                results[row]["heatmap"] = LazyHeatmap(
+                    explainer["gradients"], maps[i], pooled[i],
+                    int(np.argmax(pred)), img_batch[row]
+                )
+
+        return results
+
+
+    # ---------------------------------------------
+    # CONFIDENCE GATING
+    # ---------------------------------------------
+    def _gated(self, normal, confidence):
+
+        if self.gate_policy == "none" or confidence >= self.gate_threshold:
+            return False
+
+        # skip only saves the classifier, so marginal normals pass through
+        return not (normal and self.gate_policy == "skip")
+
+
+    def _apply_gate(self, rows, img_batch, detect_conf, results):
+
+        if self.gate_policy == "tta":
+            # Escalate: only the marginal images, as one batch of views
+            # These images were already counted by the first detection pass
+            escalated = self.predict_tta_arrays(img_batch[rows], self.gate_views,
+                                                count_detections=False)
+            for row, result in zip(rows, escalated):
+                results[row] = dict(result, gated="tta")
+            return
+
+        fracture_type = "Possible Fracture" if self.gate_policy == "skip" else "Uncertain"
+
+        for row in rows:
+            results[row] = {
+                "fracture_type": fracture_type,
+                "severity": "Unknown",
+                "confidence": round(float(detect_conf[row]) * 100, 2),
+                "gated": self.gate_policy
+            }
+
+
+    def stage_outputs(self, img_batch):
+
+        # Ungated softmax outputs of both stages for every row, with the time
+        # each stage took; training/sweep_gating.py replays the policies on them
+        start = time.perf_counter()
+        features = self.extract_features(img_batch)
+        detect_pred = self._detect_fn(features)
+        detect_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        classify_pred = self._classify_fn(features)
+        classify_seconds = time.perf_counter() - start
+
+        return {
+            "detect": np.asarray(detect_pred),
+            "classify": np.asarray(classify_pred),
+            "seconds": {"detect": detect_seconds, "classify": classify_seconds}
+        }
+
+
+    # ---------------------------------------------
+    # TEST-TIME AUGMENTATION
+    # ---------------------------------------------
+    def predict_tta(self, image, views=DEFAULT_VIEWS):
+
+        img_array = self.preprocess_image(image)
+
+        return self.combine_frames(self.predict_tta_arrays(img_array, views))
+
+
+    def predict_tta_arrays(self, img_batch, views=DEFAULT_VIEWS, count_detections=True):
+
+        with STAGE_SECONDS.time(stage="augment"):
+            batch = tta_batch(img_batch, views)
+
+        INFERENCE_BATCH_SIZE.observe(len(batch))
+
+        # All views of all images go through each model in a single call
+        with STAGE_SECONDS.time(stage="backbone"):
+            features = self.extract_features(batch)
+
+        with STAGE_SECONDS.time(stage="detect"):
+            detect_pred = self._detect_fn(features).reshape(len(img_batch), views, -1)
+        detect_mean = detect_pred.mean(axis=1)
+        detect_idx = np.argmax(detect_mean, axis=1)
+
+        results = [None] * len(img_batch)
+        fracture_rows = []
+
+        for row, idx in enumerate(detect_idx):
+
+            # Spread of the chosen class probability across the views
+            uncertainty = {
+                "views": views,
+                "detection_variance": round(float(detect_pred[row, :, idx].var()), 6)
+            }
+
+            if self.detect_labels[int(idx)] == "normal":
+                results[row] = {
+                    "fracture_type": "No Fracture",
+                    "severity": "Minor",
+                    "confidence": round(float(detect_mean[row, idx]) * 100, 2),
+                    "uncertainty": uncertainty
+                }
+            else:
+                fracture_rows.append(row)
+                results[row] = {"uncertainty": uncertainty}
+
+        if count_detections:
+            DETECTION_RESULTS.inc(len(img_batch) - len(fracture_rows), result="normal")
+            DETECTION_RESULTS.inc(len(fracture_rows), result="fracture")
+
+        if not fracture_rows:
+            return results
+
+        # Every view of the fracture-positive images, again as one batch
+        view_rows = [row * views + j for row in fracture_rows for j in range(views)]
+
+        with STAGE_SECONDS.time(stage="classify"):
+            classify_pred = self._classify_fn(features[view_rows])
+        classify_pred = classify_pred.reshape(len(fracture_rows), views, -1)
+
+        for row, preds in zip(fracture_rows, classify_pred):
+
+            # Severity is thresholded on the averaged confidence
+            mean = preds.mean(axis=0)
+            idx = int(np.argmax(mean))
+
+            uncertainty = dict(results[row]["uncertainty"],
+                               classification_variance=round(float(preds[:, idx].var()), 6))
+            results[row] = dict(self._classification_result(mean), uncertainty=uncertainty)
+
+        return results
+
+
+    # ---------------------------------------------
+    # MULTI-IMAGE STUDIES
+    # ---------------------------------------------
+    def predict_batch(self, images, batch_size=32, workers=4):
+
+        # Decode in parallel: PIL releases the GIL while decoding/resizing
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            decoded = list(pool.map(self._try_preprocess, images))
+
+        results = [None] * len(images)
+        frames = []
+
+        for row, (img_array, error) in enumerate(decoded):
+            if error is None:
+                frames.extend((row, i) for i in range(len(img_array)))
+                results[row] = []
+            else:
+                results[row] = {"error": error}
+
+        # Stacked tensors through both models, batch_size frames at a time
+        for start in range(0, len(frames), batch_size):
+
+            chunk = frames[start:start + batch_size]
+            img_batch = np.stack([decoded[row][0][i] for row, i in chunk])
+
+            for (row, _), result in zip(chunk, self.predict_arrays(img_batch)):
+                results[row].append(result)
+
+        return [
+            r if isinstance(r, dict) else self.combine_frames(r)
+            for r in results
+        ]
+
+
+    def _try_preprocess(self, image):
+
+        try:
+            return self.preprocess_image(image), None
+        except Exception as e:
+            return None, f"Could not decode image ({type(e).__name__})"
+
+
+    def _classification_result(self, classify_pred):
+
+        classify_idx = int(np.argmax(classify_pred))
         classify_conf = float(np.max(classify_pred))
 
         fracture_type = self.classify_labels[classify_idx]
@@ -0,0 +1,341 @@
+"""Versioned model bundles with hot reload and traffic splitting.
+
+A registry folder holds one bundle per version:
+
+    model/registry/
+        v1/            bundle.json, fracture_*_model.h5 / .tflite, *_classes.json
+        v2/            ...
+        routing.json   {"weights": {"v2": 90, "v1": 10}}
+
+bundle.json carries the version name and the preprocessing config, e.g.
+{"version": "v2", "img_size": [224, 224]}. It can also set gate_policy /
+gate_threshold, since thresholds are tuned per model. Without routing.json
+the most recently published bundle gets all traffic. A folder that holds the
+model files directly (the original model/ layout) is a single bundle.
+
+Routing is sticky: requests are routed on a hash of the uploaded bytes, so an
+image always goes to the same version and cached results stay consistent.
+
+Predictors load on first use. A watcher thread polls the folder; new or
+re-weighted versions are loaded in the background and swapped in with one
+reference assignment. A request keeps the version it was routed to, so
+in-flight requests finish on the old predictor.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+BUNDLE_FILE = "bundle.json"
+ROUTING_FILE = "routing.json"
+
+# Present in every bundle, including the original model/ layout
+CLASS_MAP_FILE = "detect_classes.json"
+
+
+def read_bundle(model_dir, default_version=None):
+
+    bundle = {}
+    path = os.path.join(model_dir, BUNDLE_FILE)
+
+    if os.path.isfile(path):
+        with open(path) as f:
+            bundle = json.load(f)
+
+    bundle.setdefault(
+        "version", default_version or os.path.basename(os.path.normpath(model_dir))
+    )
+
+    return bundle
+
+
+def bundle_stamp(model_dir):
+
+    # Newest file in the bundle: publishing rewrites bundle.json, and weights
+    # copied over an existing folder change their own mtime
+    return max(
+        (entry.stat().st_mtime_ns for entry in os.scandir(model_dir) if entry.is_file()),
+        default=os.stat(model_dir).st_mtime_ns
+    )
+
+
+def is_bundle_dir(path):
+
+    return (os.path.isfile(os.path.join(path, BUNDLE_FILE))
+            or os.path.isfile(os.path.join(path, CLASS_MAP_FILE)))
+
+
+class ModelVersion:
+
+    def __init__(self, version, model_dir, bundle, stamp=None):
+
+        self.version = version
+        self.model_dir = model_dir
+        self.bundle = bundle
+
+        # Changes whenever the bundle's files do, unlike the version name
+        # (publish_bundle.py --force reuses it); part of the result cache key
+        self.stamp = stamp
+
+        # Set by ModelRegistry.ensure_loaded / the on_load hook
+        self.predictor = None
+        self.scheduler = None
+        self._lock = threading.Lock()
+
+
+class Snapshot:
+
+    # Immutable view of the registry; replaced as a whole on reload
+    def __init__(self, models, routes, signature):
+
+        self.models = models
+        self.routes = routes
+        self.signature = signature
+
+
+class ModelRegistry:
+
+    def __init__(self, root, loader, on_load=None, on_unload=None, poll_seconds=10):
+
+        # loader(model_dir, bundle) -> predictor; on_load / on_unload get the
+        # ModelVersion when it starts / stops taking traffic
+        self.root = root
+        self.loader = loader
+        self.on_load = on_load
+        self.on_unload = on_unload
+        self.poll_seconds = poll_seconds
+
+        self.single = is_bundle_dir(root)
+
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._scan()
+        self._watcher = None
+
+
+    # ---------------------------------------------
+    # SCANNING
+    # ---------------------------------------------
+    def _version_dirs(self):
+
+        if self.single:
+            return {}
+
+        # Dot-folders are bundles still being published
+        return {
+            entry.name: entry.path
+            for entry in os.scandir(self.root)
+            if entry.is_dir() and not entry.name.startswith(".") and is_bundle_dir(entry.path)
+        }
+
+
+    def _signature(self):
+
+        stamps = []
+
+        for path in [self.root] + list(self._version_dirs().values()):
+            for name in (BUNDLE_FILE, ROUTING_FILE):
+                try:
+                    stamps.append((path, name, os.stat(os.path.join(path, name)).st_mtime_ns))
+                except FileNotFoundError:
+                    pass
+
+        return tuple(sorted(stamps))
+
+
+    def _routing(self, dirs):
+
+        path = os.path.join(self.root, ROUTING_FILE)
+
+        if os.path.isfile(path):
+            with open(path) as f:
+                weights = json.load(f).get("weights", {})
+
+            routes = []
+            for version, weight in weights.items():
+                if version not in dirs:
+                    print(f"⚠️ routing.json names unknown model version '{version}'")
+                elif weight > 0:
+                    routes.append((version, float(weight)))
+
+            if routes:
+                return routes
+
+        # Default: the most recently published bundle
+        newest = max(dirs, key=lambda v: bundle_stamp(dirs[v]))
+        return [(newest, 1.0)]
+
+
+    def _scan(self, previous=None):
+
+        signature = self._signature()
+
+        if self.single:
+            bundle = read_bundle(self.root, default_version="default")
+            model = ModelVersion(bundle["version"], self.root, bundle, bundle_stamp(self.root))
+            return Snapshot({model.version: model}, [(model.version, 1.0)], signature)
+
+        dirs = self._version_dirs()
+        if not dirs:
+            raise RuntimeError(f"No model bundles in '{self.root}'")
+
+        routes = self._routing(dirs)
+        models = {}
+
+        for version, _ in routes:
+
+            model_dir = dirs[version]
+            stamp = bundle_stamp(model_dir)
+
+            # An unchanged bundle keeps its loaded predictor
+            old = previous.models.get(version) if previous else None
+            if old is not None and old.stamp == stamp:
+                models[version] = old
+            else:
+                models[version] = ModelVersion(version, model_dir,
+                                               read_bundle(model_dir, version), stamp)
+
+        return Snapshot(models, routes, signature)
+
+
+    # ---------------------------------------------
+    # ROUTING AND LOADING
+    # ---------------------------------------------
+    def route(self, data):
+
+        snapshot = self._snapshot
+        routes = snapshot.routes
+
+        if len(routes) == 1:
+            return snapshot.models[routes[0][0]]
+
+        # Sticky split: the content hash picks a point on the weight line
+        digest = hashlib.sha256(data).digest()
+        point = int.from_bytes(digest[:8], "big") / 2 ** 64 * sum(w for _, w in routes)
+
+        for version, weight in routes:
+            point -= weight
+            if point < 0:
+                break
+
+        return snapshot.models[version]
+
+
+    def ensure_loaded(self, model):
+
+        with model._lock:
+
+            if model.predictor is None:
+                model.predictor = self.loader(model.model_dir, model.bundle)
+                print(f"✅ Model version '{model.version}' loaded")
+
+                if self.on_load is not None:
+                    self.on_load(model)
+
+        return model
+
+
+    def load_all(self):
+
+        for model in self._snapshot.models.values():
+            self.ensure_loaded(model)
+
+
+    def loaded_models(self):
+
+        return [m for m in self._snapshot.models.values() if m.predictor is not None]
+
+
+    def primary(self):
+
+        # The version with the largest share of traffic
+        snapshot = self._snapshot
+        version = max(snapshot.routes, key=lambda route: route[1])[0]
+
+        return snapshot.models[version]
+
+
+    def describe(self):
+
+        snapshot = self._snapshot
+        total = sum(w for _, w in snapshot.routes)
+
+        return [
+            {
+                "version": version,
+                "traffic": round(weight / total * 100, 2),
+                "loaded": snapshot.models[version].predictor is not None,
+                "description": snapshot.models[version].bundle.get("description")
+            }
+            for version, weight in snapshot.routes
+        ]
+
+
+    # ---------------------------------------------
+    # HOT RELOAD
+    # ---------------------------------------------
+    def reload(self):
+
+        with self._reload_lock:
+
+            current = self._snapshot
+            if self._signature() == current.signature:
+                return False
+
+            snapshot = self._scan(current)
+
+            # Warm registry: load new versions before they get traffic
+            if self.loaded_models():
+                for model in snapshot.models.values():
+                    self.ensure_loaded(model)
+
+            self._snapshot = snapshot
+
+        # Requests already routed keep their reference to the old versions
+        for model in current.models.values():
+            if snapshot.models.get(model.version) is not model and model.predictor is not None:
+                if self.on_unload is not None:
+                    self.on_unload(model)
+
+        routes = ", ".join(f"{r['version']} {r['traffic']}%" for r in self.describe())
+        print(f"✅ Model routing updated: {routes}")
+
+        return True
+
+
+    def start(self):
+
+        # A single bundle has nothing to hot-swap
+        if self.single or self.poll_seconds <= 0:
+            return
+
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+        self._watcher.start()
+
+
+    def _watch(self):
+
+        while True:
+            time.sleep(self.poll_seconds)
+
+            try:
+                self.reload()
+            except Exception as e:
+                # Keep serving the current versions
+                print(f"⚠️ Model registry reload failed: {e}")
+
+
+    def after_fork(self):
+
+        # Threads do not survive fork(), and a preloading master starts
+        # none: start the watcher and the per-version schedulers here
+        self.start()
+
+        if self.on_load is not None:
+            for model in self.loaded_models():
+                self.on_load(model)
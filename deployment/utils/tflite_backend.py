@@ -0,0 +1,72 @@
+"""TFLite runtime backend for FracturePredictor.
+
+Uses the standalone ``tflite_runtime`` interpreter when it is installed and
+falls back to ``tf.lite`` otherwise.
+
+A multi-threaded interpreter deadlocks if it is used after ``fork()``, so a
+model can be opened with ``lazy=True``: only the file is read, and the
+interpreter is created on first use in the process that runs it.
+"""
+
+import threading
+
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+
+class TFLiteModel:
+
+    def __init__(self, model_path, num_threads=None, lazy=False):
+
+        self.model_path = model_path
+        self.num_threads = num_threads
+
+        # The flatbuffer is read once; forked workers share its pages
+        with open(model_path, "rb") as f:
+            self._content = f.read()
+
+        self.interpreter = None
+
+        # An interpreter holds one set of tensors, so calls are serialized
+        self._lock = threading.Lock()
+
+        if not lazy:
+            with self._lock:
+                self._load()
+
+
+    def _load(self):
+
+        self.interpreter = Interpreter(model_content=self._content, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        self._input_index = input_details["index"]
+        self._output_index = self.interpreter.get_output_details()[0]["index"]
+
+        self._batch_size = input_details["shape"][0]
+
+
+    def __call__(self, x):
+
+        x = np.ascontiguousarray(x, dtype=np.float32)
+
+        with self._lock:
+
+            if self.interpreter is None:
+                self._load()
+
+            if len(x) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input_index, x.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(x)
+
+            self.interpreter.set_tensor(self._input_index, x)
+            self.interpreter.invoke()
+
+            return self.interpreter.get_tensor(self._output_index).copy()
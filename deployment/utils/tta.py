@@ -0,0 +1,73 @@
+"""Test-time augmentation views for FracturePredictor.
+
+Every image is expanded into K views (flip, small rotations, scale) that are
+stacked into one batch, so each model runs once for all of them. The
+predictions are averaged per image, and the variance across the views is
+reported as an uncertainty estimate.
+"""
+
+import numpy as np
+from PIL import Image
+
+
+# (horizontal flip, rotation in degrees, scale); a request with K views uses
+# the first K, so the cheapest and most informative views come first
+VIEWS = [
+    (False, 0, 1.0),
+    (True, 0, 1.0),
+    (False, 7, 1.0),
+    (False, -7, 1.0),
+    (False, 0, 1.1),
+    (True, 7, 1.0),
+    (True, 0, 1.1),
+    (False, 0, 0.9),
+]
+
+MAX_VIEWS = len(VIEWS)
+DEFAULT_VIEWS = 4
+
+
+def augment(pixels, flip, angle, scale):
+
+    # pixels: (h, w, 3) uint8
+    if flip:
+        pixels = pixels[:, ::-1]
+
+    if angle == 0 and scale == 1.0:
+        return pixels
+
+    height, width = pixels.shape[:2]
+    cx, cy = width / 2, height / 2
+
+    # Rotation and scale about the centre as a single affine resample;
+    # PIL maps each output pixel back to its input position
+    cos = np.cos(np.radians(angle)) / scale
+    sin = np.sin(np.radians(angle)) / scale
+    matrix = (cos, sin, cx - cos * cx - sin * cy,
+              -sin, cos, cy + sin * cx - cos * cy)
+
+    img = Image.fromarray(np.ascontiguousarray(pixels))
+    img = img.transform((width, height), Image.AFFINE, matrix,
+                        resample=Image.BILINEAR, fillcolor=(0, 0, 0))
+
+    return np.asarray(img)
+
+
+def tta_batch(img_batch, views=DEFAULT_VIEWS):
+
+    # (N, h, w, 3) in [0, 1] -> (N * views, h, w, 3), each image's views adjacent
+    if not 1 <= views <= MAX_VIEWS:
+        raise ValueError(f"views must be between 1 and {MAX_VIEWS}")
+
+    out = np.empty((len(img_batch) * views,) + img_batch.shape[1:], dtype=np.float32)
+
+    for i, row in enumerate(img_batch):
+
+        # Model inputs are uint8 / 255, so this round trip is exact
+        pixels = np.rint(row * 255).astype(np.uint8)
+
+        for j, (flip, angle, scale) in enumerate(VIEWS[:views]):
+            np.divide(augment(pixels, flip, angle, scale), np.float32(255.0),
+                      out=out[i * views + j], dtype=np.float32)
+
+    return out
@@ -0,0 +1,197 @@
+"""Shared fixtures for the FractureSense AI unit tests.
+
+The Flask app imports its helpers as ``utils.*`` from deployment/, and the
+training scripts import each other by module name, so both folders go on
+sys.path the same way the app and the scripts run.
+"""
+
+import io
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+sys.path.insert(0, os.path.join(REPO_DIR, "deployment"))
+sys.path.insert(0, os.path.join(REPO_DIR, "training"))
+
+# Tiny stand-ins for the MobileNetV2 models: same [backbone, pooling, head]
+# layout, 32x32 input
+IMG_SIZE = (32, 32)
+
+DETECT_CLASSES = {"fracture": 0, "normal": 1}
+CLASSIFY_CLASSES = {"elbow fracture": 0, "humerus fracture": 1, "wrist fracture": 2}
+
+
+def encode(pixels, fmt, **options):
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=fmt, **options)
+
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def radiograph():
+
+    # Smooth gradient plus noise, like bench_preprocess.make_radiograph
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:300, 0:400].astype(np.float32) / 400
+    pixels = 60 + 140 * np.exp(-((xx - 0.5) ** 2 + (yy - 0.4) ** 2) * 8)
+    pixels += rng.normal(0, 12, size=pixels.shape)
+
+    return np.clip(pixels, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def png_bytes(radiograph):
+    return encode(radiograph, "PNG")
+
+
+@pytest.fixture
+def jpeg_bytes(radiograph):
+    return encode(radiograph, "JPEG", quality=90)
+
+
+@pytest.fixture
+def make_dicom():
+
+    pytest.importorskip("pydicom")
+    from pydicom.dataset import Dataset, FileMetaDataset
+    from pydicom.uid import ExplicitVRLittleEndian, SecondaryCaptureImageStorage, generate_uid
+
+    def make(frames=1, rows=256, cols=200, photometric="MONOCHROME2", window=(1500, 3000),
+             pixels=None, seed=0):
+
+        # 12-bit data in 16-bit words, CT-style rescale to signed values
+        meta = FileMetaDataset()
+        meta.MediaStorageSOPClassUID = SecondaryCaptureImageStorage
+        meta.MediaStorageSOPInstanceUID = generate_uid()
+        meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+        ds = Dataset()
+        ds.file_meta = meta
+        ds.SOPClassUID = meta.MediaStorageSOPClassUID
+        ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+        ds.Rows, ds.Columns, ds.SamplesPerPixel = rows, cols, 1
+        ds.PhotometricInterpretation = photometric
+        ds.BitsAllocated, ds.BitsStored, ds.HighBit, ds.PixelRepresentation = 16, 12, 11, 0
+        ds.RescaleSlope, ds.RescaleIntercept = 2, -1024
+
+        if window is not None:
+            ds.WindowCenter, ds.WindowWidth = window
+
+        if pixels is None:
+            rng = np.random.default_rng(seed)
+            pixels = rng.integers(0, 4096, (frames, rows, cols), dtype=np.uint16)
+
+        if frames > 1:
+            ds.NumberOfFrames = frames
+        else:
+            pixels = pixels.reshape(rows, cols)
+
+        ds.PixelData = pixels.astype(np.uint16).tobytes()
+
+        buffer = io.BytesIO()
+        ds.save_as(buffer, enforce_file_format=True)
+
+        return buffer.getvalue()
+
+    return make
+
+
+def brightness(p_fracture):
+
+    # Constant image the "brightness" models detect as a fracture with this
+    # probability (see build_models)
+    value = 0.5 + np.log(p_fracture / (1 - p_fracture)) / 20
+
+    return np.full((1,) + IMG_SIZE + (3,), value, dtype=np.float32)
+
+
+def build_models(model_dir, seed=None):
+
+    # seed=None: the backbone averages the channels and the detection logit
+    # is 20 * (brightness - 0.5), so tests can pick each image's outcome.
+    # With a seed every weight is random.
+    tf = pytest.importorskip("tensorflow")
+    keras = tf.keras
+
+    inputs = keras.Input(shape=IMG_SIZE + (3,))
+    maps = keras.layers.Conv2D(4, 3, padding="same", activation="relu")(inputs)
+    backbone = keras.Model(inputs, maps, name="backbone")
+
+    detect = keras.Sequential([backbone, keras.layers.GlobalAveragePooling2D(),
+                               keras.layers.Dense(2, activation="softmax")])
+    classify = keras.Sequential([backbone, keras.layers.GlobalAveragePooling2D(),
+                                 keras.layers.Dense(3, activation="softmax")])
+
+    if seed is None:
+        kernel = np.zeros((3, 3, 3, 4), dtype=np.float32)
+        kernel[1, 1] = 1 / 3
+        backbone.set_weights([kernel, np.zeros(4, dtype=np.float32)])
+
+        # Features are 4 copies of the brightness
+        detect.layers[-1].set_weights([np.tile([[2.5, -2.5]], (4, 1)), np.array([-5.0, 5.0])])
+        classify.layers[-1].set_weights([np.tile([[1.0, 0.0, -1.0]], (4, 1)), np.zeros(3)])
+    else:
+        # The backbone object is shared, so both models keep the same copy
+        rng = np.random.default_rng(seed)
+        for model in (detect, classify):
+            model.set_weights([rng.normal(0, 0.5, w.shape) for w in model.get_weights()])
+
+    os.makedirs(model_dir, exist_ok=True)
+
+    # The app loads .h5 files; Keras warns that the format is legacy
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        detect.save(os.path.join(model_dir, "fracture_detection_model.h5"))
+        classify.save(os.path.join(model_dir, "fracture_classification_model.h5"))
+
+    for name, classes in (("detect_classes.json", DETECT_CLASSES),
+                          ("classify_classes.json", CLASSIFY_CLASSES)):
+        with open(os.path.join(model_dir, name), "w") as f:
+            json.dump(classes, f)
+
+    with open(os.path.join(model_dir, "bundle.json"), "w") as f:
+        json.dump({"version": "v1", "img_size": list(IMG_SIZE)}, f)
+
+    return model_dir
+
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory):
+    return build_models(str(tmp_path_factory.mktemp("model")))
+
+
+@pytest.fixture(scope="session")
+def random_model_dir(tmp_path_factory):
+    return build_models(str(tmp_path_factory.mktemp("random_model")), seed=0)
+
+
+def upload(p_fracture):
+
+    # PNG of a brightness() image, as a client would send it
+    pixels = np.rint(brightness(p_fracture)[0, ..., 0] * 255).astype(np.uint8)
+
+    return encode(pixels, "PNG")
+
+
+@pytest.fixture
+def flask_app(model_dir, monkeypatch):
+
+    # deployment/app.py serving the tiny models, with a fresh registry and cache
+    import app
+    from utils.cache import ResultCache
+
+    monkeypatch.setattr(app, "MODEL_DIR", model_dir)
+    monkeypatch.setattr(app, "registry", None)
+    monkeypatch.setattr(app, "result_cache", ResultCache())
+
+    return app
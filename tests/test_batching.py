@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+import pytest
+
+from utils.batching import BatchScheduler
+
+
+class FakePredictor:
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.threads = []
+        self.error = error
+
+    def predict_arrays(self, img_batch):
+
+        self.batches.append(len(img_batch))
+        self.threads.append(threading.current_thread().name)
+
+        if self.error is not None:
+            raise self.error
+
+        return [{"value": float(img[0, 0, 0])} for img in img_batch]
+
+
+def image(value):
+    return np.full((1, 2, 2, 3), value, dtype=np.float32)
+
+
+@pytest.fixture
+def schedulers():
+
+    # Closed after the test so the worker threads exit
+    created = []
+
+    def make(*args, **kwargs):
+        created.append(BatchScheduler(*args, **kwargs))
+        return created[-1]
+
+    yield make
+
+    for scheduler in created:
+        scheduler.close()
+
+
+def test_merged_batch_returns_each_caller_its_own_result(schedulers):
+
+    predictor = FakePredictor()
+    scheduler = schedulers(predictor, window_ms=5000, max_batch=4)
+
+    # A full batch runs without waiting for the window
+    futures = [scheduler.submit(image(i)) for i in range(4)]
+
+    assert [f.result(timeout=5) for f in futures] == [{"value": float(i)} for i in range(4)]
+    assert predictor.batches == [4]
+
+
+def test_error_reaches_every_caller_in_the_batch(schedulers):
+
+    predictor = FakePredictor(error=RuntimeError("out of memory"))
+    scheduler = schedulers(predictor, window_ms=5000, max_batch=3)
+
+    futures = [scheduler.submit(image(i)) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(timeout=5)
+
+    # The worker keeps serving after a failed batch
+    predictor.error = None
+    futures = [scheduler.submit(image(i)) for i in range(3)]
+
+    assert [f.result(timeout=5) for f in futures] == [{"value": float(i)} for i in range(3)]
+
+
+def test_batches_never_exceed_max_batch(schedulers):
+
+    predictor = FakePredictor()
+    scheduler = schedulers(predictor, window_ms=50, max_batch=4)
+
+    futures = [scheduler.submit(image(i)) for i in range(10)]
+
+    assert [f.result(timeout=5)["value"] for f in futures] == list(range(10))
+    assert max(predictor.batches) <= 4
+    assert sum(predictor.batches) == 10
+
+
+def test_closed_scheduler_runs_requests_inline():
+
+    predictor = FakePredictor()
+    scheduler = BatchScheduler(predictor, window_ms=5000, max_batch=16)
+
+    # Queued before close: still answered by the worker
+    queued = scheduler.submit(image(1))
+    scheduler.close()
+
+    assert queued.result(timeout=5) == {"value": 1.0}
+
+    scheduler._worker.join(timeout=5)
+    assert not scheduler._worker.is_alive()
+
+    assert scheduler.predict(image(2)) == {"value": 2.0}
+    assert predictor.threads == ["batch-scheduler", threading.current_thread().name]
+
+
+def test_inline_error_is_raised_to_the_caller():
+
+    scheduler = BatchScheduler(FakePredictor(error=ValueError("bad image")))
+    scheduler.close()
+
+    with pytest.raises(ValueError, match="bad image"):
+        scheduler.predict(image(0))
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import ResultCache
+
+
+class Clock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+
+    return clock
+
+
+def disk_files(root):
+    return sorted(name for _, _, names in os.walk(root) for name in names if name.endswith(".json"))
+
+
+# ---------------------------------------------
+# KEYS
+# ---------------------------------------------
+def test_key_depends_on_every_part():
+
+    key = ResultCache.key_for(b"image", "v1", 224)
+
+    assert key == ResultCache.key_for(b"image", "v1", 224)
+    assert key != ResultCache.key_for(b"image", "v2", 224)
+    assert key != ResultCache.key_for(b"image", "v1", 256)
+    assert key != ResultCache.key_for(b"other", "v1", 224)
+
+    # Parts are delimited, so shifting bytes between them changes the key
+    assert ResultCache.key_for(b"ab", "c") != ResultCache.key_for(b"a", "bc")
+
+
+# ---------------------------------------------
+# MEMORY TIER
+# ---------------------------------------------
+def test_miss_then_hit_is_counted():
+
+    cache = ResultCache()
+
+    assert cache.get("k") is None
+    cache.set("k", {"label": "fracture"})
+
+    assert cache.get("k") == {"label": "fracture"}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+
+    cache = ResultCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the oldest
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl(clock):
+
+    cache = ResultCache(ttl=60)
+    cache.set("k", 1)
+
+    clock.now += 59
+    assert cache.get("k") == 1
+
+    clock.now += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_ttl_never_expires(clock):
+
+    cache = ResultCache(ttl=0)
+    cache.set("k", 1)
+
+    clock.now += 10 ** 9
+    assert cache.get("k") == 1
+
+
+# ---------------------------------------------
+# DISK TIER
+# ---------------------------------------------
+def test_disk_entries_survive_a_new_instance(tmp_path):
+
+    ResultCache(disk_dir=str(tmp_path)).set("ab12", {"label": "normal"})
+
+    # A restarted worker starts with an empty memory tier
+    cache = ResultCache(disk_dir=str(tmp_path))
+
+    assert cache.get("ab12") == {"label": "normal"}
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 0}
+    assert disk_files(tmp_path) == ["ab12.json"]
+
+
+def test_expired_disk_entries_are_removed(tmp_path, clock):
+
+    ResultCache(ttl=60, disk_dir=str(tmp_path)).set("ab12", 1)
+
+    clock.now += 60
+    cache = ResultCache(ttl=60, disk_dir=str(tmp_path))
+
+    assert cache.get("ab12") is None
+    assert disk_files(tmp_path) == []
+
+
+def test_disk_hit_keeps_the_original_expiry(tmp_path, clock):
+
+    ResultCache(ttl=60, disk_dir=str(tmp_path)).set("ab12", 1)
+
+    clock.now += 30
+    cache = ResultCache(ttl=60, disk_dir=str(tmp_path))
+    assert cache.get("ab12") == 1
+
+    # Promoted to memory with 30s left, not a fresh 60s
+    clock.now += 30
+    assert cache.get("ab12") is None
+
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+
+    cache = ResultCache(disk_dir=str(tmp_path))
+    os.makedirs(tmp_path / "ab")
+    (tmp_path / "ab" / "ab12.json").write_text("{not json")
+
+    assert cache.get("ab12") is None
+
+
+def test_prune_disk_drops_least_recently_used(tmp_path):
+
+    cache = ResultCache(disk_dir=str(tmp_path), max_disk_entries=10)
+
+    for i in range(20):
+        key = f"{i:02d}ff"
+        cache.set(key, i)
+        os.utime(cache._disk_path(key), (1000 + i, 1000 + i))
+
+    cache._prune_disk()
+
+    # Back under the bound with 10% headroom, newest entries kept
+    assert disk_files(tmp_path) == [f"{i:02d}ff.json" for i in range(11, 20)]
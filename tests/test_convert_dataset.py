@@ -0,0 +1,186 @@
+import os
+
+import pytest
+
+import convert_dataset
+from convert_dataset import (convert_image, fracture_types, index_images, is_current, place,
+                             read_class_ids, read_objects)
+
+
+def touch(path, data=b"x", mtime=1000):
+
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+
+    return str(path)
+
+
+# ---------------------------------------------
+# INDEXING AND LABELS
+# ---------------------------------------------
+def test_index_images_prefers_extension_order(tmp_path):
+
+    for name in ["a.png", "a.JPG", "b.png", "c.txt", "d.jpeg", "d.png"]:
+        touch(tmp_path / name)
+    (tmp_path / "e.jpg").mkdir()
+
+    index = index_images(str(tmp_path))
+
+    assert {name: os.path.basename(path) for name, path in index.items()} == {
+        "a": "a.JPG", "b": "b.png", "d": "d.jpeg"
+    }
+
+
+def test_read_objects_keeps_every_box(tmp_path):
+
+    label = tmp_path / "a.txt"
+    label.write_text("3 0.5 0.5 0.2 0.1\n\n6 0.1 0.2 0.3 0.4 0.9\n")
+
+    assert read_objects(str(label)) == [[3, 0.5, 0.5, 0.2, 0.1], [6, 0.1, 0.2, 0.3, 0.4]]
+    assert read_class_ids(str(label)) == [3, 6]
+
+
+def test_empty_label_file_is_a_normal_image(tmp_path):
+
+    label = tmp_path / "a.txt"
+    label.write_text("")
+
+    assert read_class_ids(str(label)) == []
+    assert fracture_types([]) == []
+
+
+def test_majority_type_wins_and_ties_go_to_the_first_object():
+
+    assert fracture_types([6, 0, 6]) == ["wrist fracture"]
+    assert fracture_types([0, 6]) == ["elbow fracture"]
+
+    # Classes 3 and 4 are the same type and count together
+    assert fracture_types([3, 0, 4]) == ["humerus fracture"]
+
+
+def test_all_mode_keeps_every_type_once():
+
+    assert fracture_types([6, 0, 6], multi_object="all") == ["elbow fracture", "wrist fracture"]
+
+
+def test_unknown_classes_are_ignored():
+
+    assert fracture_types([99]) == []
+    assert fracture_types([99, 1]) == ["fingers fracture"]
+
+
+# ---------------------------------------------
+# LINKING
+# ---------------------------------------------
+def test_is_current_compares_size_and_mtime(tmp_path):
+
+    src = touch(tmp_path / "src.png", b"abc")
+
+    assert not is_current(os.stat(src), str(tmp_path / "missing.png"))
+    assert is_current(os.stat(src), touch(tmp_path / "same.png", b"abc"))
+    assert not is_current(os.stat(src), touch(tmp_path / "older.png", b"abc", mtime=999))
+    assert not is_current(os.stat(src), touch(tmp_path / "resized.png", b"abcd"))
+
+
+@pytest.mark.parametrize("link", ["hardlink", "symlink", "copy"])
+def test_place_then_skip_on_rerun(tmp_path, link):
+
+    src = touch(tmp_path / "src.png", b"image")
+    dest = str(tmp_path / "dest.png")
+
+    assert place(src, dest, link) == ("copied" if link == "copy" else "linked")
+    assert open(dest, "rb").read() == b"image"
+
+    if link == "hardlink":
+        assert os.path.samefile(src, dest)
+    if link == "symlink":
+        assert os.readlink(dest) == os.path.abspath(src)
+
+    assert place(src, dest, link) == "skipped"
+
+
+def test_place_replaces_stale_output(tmp_path):
+
+    src = touch(tmp_path / "src.png", b"new image", mtime=2000)
+    dest = touch(tmp_path / "dest.png", b"old", mtime=1000)
+
+    assert place(src, dest, "copy") == "copied"
+    assert open(dest, "rb").read() == b"new image"
+    assert os.stat(dest).st_mtime == 2000
+
+
+def test_place_falls_back_to_copy_when_linking_fails(tmp_path, monkeypatch):
+
+    def cross_device(src, dest):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(convert_dataset.os, "link", cross_device)
+
+    src = touch(tmp_path / "src.png", b"image")
+    dest = str(tmp_path / "dest.png")
+
+    assert place(src, dest, "hardlink") == "copied"
+    assert not os.path.samefile(src, dest)
+    assert place(src, dest, "hardlink") == "skipped"
+
+
+# ---------------------------------------------
+# CONVERSION
+# ---------------------------------------------
+@pytest.fixture
+def output(tmp_path, monkeypatch):
+
+    detect = tmp_path / "dataset_detection"
+    classify = tmp_path / "dataset_classification"
+
+    for name in convert_dataset.detect_classes:
+        (detect / name).mkdir(parents=True)
+    for name in convert_dataset.classify_classes:
+        (classify / name).mkdir(parents=True)
+
+    monkeypatch.setattr(convert_dataset, "detect_path", str(detect))
+    monkeypatch.setattr(convert_dataset, "classify_path", str(classify))
+
+    def placed():
+        # Every class folder the image is in, as "tree/class"
+        return sorted(f"{root.name}/{folder.name}"
+                      for root in (detect, classify)
+                      for folder in root.iterdir()
+                      if (folder / "a.png").exists())
+
+    return placed
+
+
+def test_relabeled_image_leaves_its_old_classes(tmp_path, output):
+
+    image = touch(tmp_path / "a.png")
+    label = tmp_path / "a.txt"
+
+    label.write_text("6 0.5 0.5 0.1 0.1\n")
+    convert_image(image, str(label), "hardlink", "majority")
+    assert output() == ["dataset_classification/wrist fracture", "dataset_detection/fracture"]
+
+    label.write_text("0 0.5 0.5 0.1 0.1\n")
+    actions = convert_image(image, str(label), "hardlink", "majority")
+    assert output() == ["dataset_classification/elbow fracture", "dataset_detection/fracture"]
+    assert [action for _, _, action in actions] == ["skipped", "linked", "removed"]
+
+    label.write_text("")
+    convert_image(image, str(label), "hardlink", "majority")
+    assert output() == ["dataset_detection/normal"]
+
+
+def test_multi_object_all_keeps_only_current_classes(tmp_path, output):
+
+    image = touch(tmp_path / "a.png")
+    label = tmp_path / "a.txt"
+
+    label.write_text("6 0.5 0.5 0.1 0.1\n0 0.2 0.2 0.1 0.1\n")
+    convert_image(image, str(label), "copy", "all")
+    assert output() == ["dataset_classification/elbow fracture",
+                        "dataset_classification/wrist fracture", "dataset_detection/fracture"]
+
+    label.write_text("6 0.5 0.5 0.1 0.1\n1 0.2 0.2 0.1 0.1\n")
+    convert_image(image, str(label), "copy", "all")
+    assert output() == ["dataset_classification/fingers fracture",
+                        "dataset_classification/wrist fracture", "dataset_detection/fracture"]
@@ -0,0 +1,195 @@
+import io
+
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import generate_uid
+from werkzeug.exceptions import BadRequest
+
+from utils.dicom import (MAX_FRAMES, _first, complete, downsample, frame_indices, is_dicom,
+                         load_dicom_array, sniff, window_level)
+from utils.ingest import SniffingBuffer
+
+
+def header(**tags):
+
+    ds = Dataset()
+    for name, value in tags.items():
+        setattr(ds, name, value)
+
+    return ds
+
+
+def constant_frames(frames, rows, cols, value):
+    return np.full((frames, rows, cols), value, dtype=np.uint16)
+
+
+# ---------------------------------------------
+# FRAME SELECTION
+# ---------------------------------------------
+def test_short_studies_use_every_frame():
+
+    assert frame_indices(1) == [0]
+    assert frame_indices(5, max_frames=5) == [0, 1, 2, 3, 4]
+
+
+def test_long_studies_are_sampled_evenly():
+
+    indices = frame_indices(100, max_frames=5)
+
+    assert indices == [0, 24, 49, 74, 99]
+    assert len(frame_indices(1000)) == MAX_FRAMES
+
+
+# ---------------------------------------------
+# PIXEL PIPELINE
+# ---------------------------------------------
+def test_downsample_block_means_to_twice_the_target():
+
+    pixels = np.arange(16, dtype=np.uint16).reshape(4, 4)
+
+    assert downsample(pixels, (1, 1)).tolist() == [[2.5, 4.5], [10.5, 12.5]]
+
+
+def test_downsample_keeps_small_frames_and_crops_remainders():
+
+    small = np.ones((300, 300), dtype=np.uint16)
+    assert downsample(small, (224, 224)).shape == (300, 300)
+    assert downsample(small, (224, 224)).dtype == np.float32
+
+    odd = np.ones((1000, 1350, 3), dtype=np.uint8)
+    assert downsample(odd, (224, 224)).shape == (500, 675, 3)
+
+
+def test_first_takes_the_first_of_several_values():
+
+    assert _first(None, 1.0) == 1.0
+    assert _first("", 1.0) == 1.0
+    assert _first("40", None) == 40.0
+    assert _first([40, 400], None) == 40.0
+    assert _first(header(WindowCenter=[40, 400]).WindowCenter, None) == 40.0
+
+
+def test_stored_window_maps_to_display_range():
+
+    values = np.array([[-100.0, 0.0, 50.0, 200.0]])
+    pixels = window_level(values, header(WindowCenter=50, WindowWidth=100))
+
+    assert pixels.dtype == np.uint8
+    assert pixels.tolist() == [[0, 0, 127, 255]]
+
+
+def test_monochrome1_is_inverted():
+
+    values = np.array([[-10.0, 110.0]])
+    tags = dict(WindowCenter=50, WindowWidth=100)
+
+    assert window_level(values, header(**tags)).tolist() == [[0, 255]]
+    assert window_level(values, header(PhotometricInterpretation="MONOCHROME1", **tags)).tolist() == [[255, 0]]
+
+
+def test_auto_window_ignores_outliers():
+
+    values = np.linspace(1000, 2000, 10000).reshape(100, 100)
+    values[0, 0] = 60000
+
+    pixels = window_level(values, header())
+
+    assert pixels.min() == 0
+    assert pixels.max() == 255
+    assert np.median(pixels) == pytest.approx(127, abs=2)
+
+
+# ---------------------------------------------
+# FILES
+# ---------------------------------------------
+def test_is_dicom_by_magic_and_extension(make_dicom, tmp_path, png_bytes):
+
+    data = make_dicom(rows=16, cols=16)
+
+    assert is_dicom(data)
+    assert not is_dicom(png_bytes)
+
+    # Streams are rewound for the decoder
+    stream = io.BytesIO(data)
+    assert is_dicom(stream)
+    assert stream.tell() == 0
+
+    path = tmp_path / "study.DCM"
+    path.write_bytes(b"")
+    assert is_dicom(str(path))
+
+
+def test_sniff_reads_size_once_the_header_arrives(make_dicom):
+
+    data = make_dicom(rows=64, cols=48)
+
+    assert sniff(data[:100]) is None
+    assert sniff(data[:140]) == ("DICOM", None, None)
+    assert sniff(data) == ("DICOM", 48, 64)
+
+
+def test_complete_detects_truncated_pixel_data(make_dicom):
+
+    data = make_dicom(frames=2, rows=32, cols=32)
+
+    assert complete(data)
+    assert not complete(data[:100])
+
+    # Even one missing byte of pixel data
+    assert not complete(data[:-1])
+
+
+def test_missing_transfer_syntax_is_rejected():
+
+    ds = header(Rows=4, Columns=4, SamplesPerPixel=1, BitsAllocated=16, PixelData=bytes(32))
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    ds.preamble = bytes(128)
+
+    buffer = io.BytesIO()
+    ds.save_as(buffer, implicit_vr=False, little_endian=True)
+    data = buffer.getvalue()
+
+    assert is_dicom(data)
+    assert not complete(data)
+
+    # A 400 for the client, not a 500
+    upload = SniffingBuffer()
+    upload.write(data)
+
+    with pytest.raises(BadRequest):
+        upload.finish()
+
+
+def test_stored_window_and_rescale_are_applied(make_dicom):
+
+    # 1500 stored -> 1976 after slope 2 / intercept -1024 -> 167 in a 0..3000 window
+    data = make_dicom(rows=64, cols=64, pixels=constant_frames(1, 64, 64, 1500))
+    batch = load_dicom_array(data, size=(32, 32))
+
+    assert batch.shape == (1, 32, 32, 3)
+    assert batch.dtype == np.float32
+    np.testing.assert_allclose(batch, 167 / 255, atol=1e-6)
+
+    inverted = make_dicom(rows=64, cols=64, photometric="MONOCHROME1",
+                          pixels=constant_frames(1, 64, 64, 1500))
+    np.testing.assert_allclose(load_dicom_array(inverted, size=(32, 32)), 88 / 255, atol=1e-6)
+
+
+def test_multi_frame_study_becomes_a_batch(make_dicom):
+
+    pixels = np.stack([constant_frames(1, 32, 32, 512 * i)[0] for i in range(4)])
+    data = make_dicom(frames=4, rows=32, cols=32, pixels=pixels)
+
+    batch = load_dicom_array(data)
+    assert batch.shape == (4, 224, 224, 3)
+
+    # Frames keep their order
+    means = batch.mean(axis=(1, 2, 3))
+    assert list(means) == sorted(means)
+
+    assert load_dicom_array(data, max_frames=2).shape == (2, 224, 224, 3)
@@ -0,0 +1,131 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import IMG_SIZE, upload
+from utils.explain import LazyHeatmap, class_activation_map
+
+
+def test_class_activation_map_is_normalized():
+
+    rng = np.random.default_rng(0)
+    cam = class_activation_map(rng.random((7, 5, 8)), rng.normal(size=8))
+
+    assert cam.shape == (7, 5)
+    assert cam.dtype == np.float32
+    assert cam.min() >= 0
+    assert cam.max() == pytest.approx(1)
+
+
+def test_class_activation_map_follows_the_weighted_channels():
+
+    conv_map = np.zeros((2, 2, 2))
+    conv_map[0, 0, 0] = 1
+    conv_map[1, 1, 1] = 1
+
+    # Only channel 0 raises the class score
+    cam = class_activation_map(conv_map, np.array([4.0, -4.0]))
+
+    assert cam.tolist() == [[1, 0], [0, 0]]
+
+
+def test_class_activation_map_without_positive_evidence_is_zero():
+
+    cam = class_activation_map(np.ones((3, 3, 2)), np.array([-1.0, -2.0]))
+
+    assert not cam.any()
+
+
+def test_lazy_heatmap_computes_once():
+
+    calls = []
+
+    def gradients(pooled, class_idx):
+        calls.append((pooled.shape, class_idx.tolist()))
+        return np.ones((1, 4))
+
+    image = np.full((16, 12, 3), 0.5, dtype=np.float32)
+    heatmap = LazyHeatmap(gradients, np.ones((4, 3, 4)), np.ones(4), 2, image)
+
+    assert calls == []
+
+    heatmap.cam()
+    heatmap.to_json("array")
+    heatmap.to_json("png")
+    heatmap.png()
+
+    assert calls == [((1, 4), [2])]
+
+    overlay = Image.open(io.BytesIO(base64.b64decode(heatmap.to_json()["data"])))
+    assert overlay.size == (12, 16)
+
+
+# ---------------------------------------------
+# /predict?explain=
+# ---------------------------------------------
+def post(client, data, query=""):
+
+    response = client.post("/predict" + query, data={"file": (io.BytesIO(data), "x.png")})
+    assert response.status_code == 200
+
+    return response.get_json()
+
+
+def test_explain_returns_heatmap_for_a_fracture(flask_app):
+
+    result = post(flask_app.app.test_client(), upload(0.95), "?explain=array")
+
+    assert result["fracture_type"] == "elbow fracture"
+    assert result["cached"] is False
+    assert result["heatmap"]["format"] == "array"
+    assert result["heatmap"]["shape"] == list(IMG_SIZE)
+
+
+def test_explain_on_a_cache_hit_returns_the_same_heatmap(flask_app):
+
+    client = flask_app.app.test_client()
+    data = upload(0.95)
+
+    cold = post(client, data, "?explain=1")
+    plain = post(client, data)
+    warm = post(client, data, "?explain=1")
+
+    assert plain["cached"] is True
+    assert "heatmap" not in plain
+
+    assert warm["cached"] is True
+    assert warm["heatmap"]["format"] == "png"
+    assert warm["heatmap"] == cold["heatmap"]
+
+
+def test_explain_after_a_plain_prediction_is_served_from_the_cache(flask_app, monkeypatch):
+
+    client = flask_app.app.test_client()
+    data = upload(0.95)
+    post(client, data)
+
+    predictor = flask_app.registry.primary().predictor
+    monkeypatch.setattr(predictor, "predict", lambda *args, **kwargs: pytest.fail("re-ran the models"))
+
+    result = post(client, data, "?explain=png")
+
+    assert result["cached"] is True
+    assert result["heatmap"]["format"] == "png"
+
+
+def test_normal_result_has_no_heatmap(flask_app):
+
+    client = flask_app.app.test_client()
+    data = upload(0.05)
+
+    cold = post(client, data, "?explain=1")
+    warm = post(client, data, "?explain=1")
+
+    assert cold["fracture_type"] == "No Fracture"
+    assert cold["heatmap"] is None
+
+    assert warm["cached"] is True
+    assert warm["heatmap"] is None
@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+
+from conftest import brightness
+
+pytest.importorskip("tensorflow")
+
+from sweep_gating import collect_outputs, decisions, replay
+from utils.predict import FracturePredictor
+
+
+THRESHOLD = 0.7
+
+# Detection confidence 0.95 / 0.6 for a fracture, 0.6 / 0.95 for a normal
+CONFIDENT_FRACTURE, MARGINAL_FRACTURE, MARGINAL_NORMAL, CONFIDENT_NORMAL = range(4)
+
+
+@pytest.fixture(scope="module")
+def predictor(model_dir):
+    return FracturePredictor(model_dir=model_dir, gate_threshold=THRESHOLD, gate_views=2)
+
+
+@pytest.fixture
+def batch():
+    return np.concatenate([brightness(p) for p in (0.95, 0.6, 0.4, 0.05)])
+
+
+@pytest.fixture
+def classified_rows(predictor, monkeypatch):
+
+    # Rows the classifier is run on, in order
+    rows = []
+    classify_fn = predictor._classify_fn
+
+    def spy(features):
+        rows.append(len(features))
+        return classify_fn(features)
+
+    monkeypatch.setattr(predictor, "_classify_fn", spy)
+
+    return rows
+
+
+def run(predictor, monkeypatch, policy, batch):
+
+    monkeypatch.setattr(predictor, "gate_policy", policy)
+
+    return predictor.predict_arrays(batch)
+
+
+# ---------------------------------------------
+# POLICIES
+# ---------------------------------------------
+def test_none_classifies_every_fracture(predictor, monkeypatch, batch, classified_rows):
+
+    results = run(predictor, monkeypatch, "none", batch)
+
+    assert [r["fracture_type"] for r in results] == [
+        "elbow fracture", "elbow fracture", "No Fracture", "No Fracture"
+    ]
+    assert not any("gated" in r for r in results)
+    assert classified_rows == [2]
+
+
+def test_skip_reports_marginal_fractures_unclassified(predictor, monkeypatch, batch, classified_rows):
+
+    results = run(predictor, monkeypatch, "skip", batch)
+
+    assert results[MARGINAL_FRACTURE] == {
+        "fracture_type": "Possible Fracture", "severity": "Unknown",
+        "confidence": 60.0, "gated": "skip"
+    }
+
+    # Marginal normals cost nothing to report, so they pass through
+    assert results[MARGINAL_NORMAL] == {
+        "fracture_type": "No Fracture", "severity": "Minor", "confidence": 60.0
+    }
+    assert results[CONFIDENT_FRACTURE]["fracture_type"] == "elbow fracture"
+    assert classified_rows == [1]
+
+
+def test_uncertain_answers_every_marginal_image(predictor, monkeypatch, batch, classified_rows):
+
+    results = run(predictor, monkeypatch, "uncertain", batch)
+
+    for row in (MARGINAL_FRACTURE, MARGINAL_NORMAL):
+        assert results[row] == {
+            "fracture_type": "Uncertain", "severity": "Unknown",
+            "confidence": 60.0, "gated": "uncertain"
+        }
+
+    assert results[CONFIDENT_NORMAL]["fracture_type"] == "No Fracture"
+    assert classified_rows == [1]
+
+
+def test_tta_escalates_only_marginal_images(predictor, monkeypatch, batch, classified_rows):
+
+    results = run(predictor, monkeypatch, "tta", batch)
+
+    for row in (MARGINAL_FRACTURE, MARGINAL_NORMAL):
+        assert results[row]["gated"] == "tta"
+        assert results[row]["uncertainty"]["views"] == 2
+
+    # Flipping a flat image changes nothing, so TTA agrees with one pass
+    assert results[MARGINAL_FRACTURE]["fracture_type"] == "elbow fracture"
+    assert results[MARGINAL_NORMAL]["fracture_type"] == "No Fracture"
+
+    for row in (CONFIDENT_FRACTURE, CONFIDENT_NORMAL):
+        assert "gated" not in results[row]
+
+    # Both views of the escalated fracture, then the confident one
+    assert classified_rows == [2, 1]
+
+
+def test_confident_images_are_never_gated(predictor, monkeypatch):
+
+    monkeypatch.setattr(predictor, "gate_threshold", 0.5)
+    batch = np.concatenate([brightness(p) for p in (0.6, 0.4)])
+
+    for policy in ("skip", "uncertain", "tta"):
+        assert not any("gated" in r for r in run(predictor, monkeypatch, policy, batch))
+
+
+# ---------------------------------------------
+# SWEEP REPLAY
+# ---------------------------------------------
+@pytest.mark.parametrize("policy", ["none", "skip", "uncertain", "tta"])
+def test_replay_gates_the_same_rows_as_the_app(predictor, monkeypatch, policy):
+
+    probabilities = [0.99, 0.8, 0.71, 0.69, 0.6, 0.51, 0.49, 0.4, 0.31, 0.29, 0.2, 0.01]
+    batch = np.concatenate([brightness(p) for p in probabilities])
+
+    app_results = run(predictor, monkeypatch, policy, batch)
+
+    outputs = predictor.stage_outputs(batch)
+    truth = np.array(["normal"] * len(batch), dtype=object)
+
+    for row, result in enumerate(app_results):
+
+        # One row at a time so the replayed rates are that row's decisions
+        rows = slice(row, row + 1)
+        row_outputs = {"detect": outputs["detect"][rows], "classify": outputs["classify"][rows],
+                       "seconds": {"detect": 0.0, "classify": 0.0, "tta": 0.0}}
+        base = decisions(predictor, row_outputs["detect"], row_outputs["classify"])
+
+        replayed = replay(policy, THRESHOLD, truth[rows], row_outputs, base, base)
+
+        gated = result.get("gated")
+        classified = gated is None and result["fracture_type"] in predictor.classify_classes
+
+        assert replayed["coverage"] == (0.0 if gated == "uncertain" else 1.0)
+        assert replayed["escalated"] == (1.0 if gated == "tta" else 0.0)
+        assert replayed["classified"] == (1.0 if classified else 0.0)
+
+
+def test_sweep_charges_tta_classify_time_to_positive_images(predictor, monkeypatch):
+
+    images = {"a": brightness(0.95), "b": brightness(0.9), "c": brightness(0.1), "d": brightness(0.05)}
+    stage_outputs = predictor.stage_outputs
+
+    def timed(batch):
+        # 1 ms per row to detect, 2 ms per row to classify
+        return dict(stage_outputs(batch), seconds={"detect": len(batch) * 0.001,
+                                                   "classify": len(batch) * 0.002})
+
+    monkeypatch.setattr(predictor, "preprocess_image", images.__getitem__)
+    monkeypatch.setattr(predictor, "stage_outputs", timed)
+
+    outputs = collect_outputs(predictor, list(images), batch_size=4, tta_views=2)
+
+    assert outputs["seconds"]["detect"] == pytest.approx(0.001)
+    assert outputs["seconds"]["classify"] == pytest.approx(0.002)
+
+    # Two views each: 2 ms detect, plus 4 ms classify for half the images
+    assert outputs["seconds"]["tta"] == pytest.approx(0.004)
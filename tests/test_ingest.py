@@ -0,0 +1,218 @@
+import io
+
+import numpy as np
+import pytest
+from flask import Flask, request
+from PIL import Image
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+from utils import ingest
+from utils.ingest import (SIGNATURE_BYTES, IngestRequest, SniffingBuffer, check_image_bytes,
+                          jpeg_complete, png_complete, sniff_jpeg, sniff_png)
+
+
+def fill(buffer, data, chunk=1000):
+
+    # Same chunked writes the multipart parser makes
+    for start in range(0, len(data), chunk):
+        buffer.write(data[start:start + chunk])
+
+    return buffer
+
+
+@pytest.fixture
+def app():
+
+    app = Flask(__name__)
+    app.request_class = IngestRequest
+    app.config.update(MAX_IMAGE_BYTES=1024 * 1024, MAX_IMAGE_PIXELS=1000 * 1000,
+                      MAX_BATCH_FILES=2)
+
+    @app.route("/batch", methods=["POST"], endpoint="predict_batch")
+    def predict_batch():
+        return str(len(request.files.getlist("files")))
+
+    return app
+
+
+# ---------------------------------------------
+# SNIFFERS
+# ---------------------------------------------
+def test_sniff_png_reads_ihdr_size(png_bytes):
+
+    assert sniff_png(png_bytes[:SIGNATURE_BYTES]) == ("PNG", 400, 300)
+
+
+def test_sniff_png_waits_for_ihdr(png_bytes):
+
+    assert sniff_png(png_bytes[:16]) == ("PNG", None, None)
+
+
+def test_sniff_png_rejects_corrupt_header(png_bytes):
+
+    corrupt = png_bytes[:12] + b"XXXX" + png_bytes[16:]
+
+    with pytest.raises(UnsupportedMediaType):
+        sniff_png(corrupt)
+
+
+def test_sniff_jpeg_walks_to_start_of_frame(jpeg_bytes):
+
+    assert sniff_jpeg(jpeg_bytes[:2048]) == ("JPEG", 400, 300)
+
+
+def test_sniff_jpeg_waits_for_frame_header(jpeg_bytes):
+
+    assert sniff_jpeg(jpeg_bytes[:10]) == ("JPEG", None, None)
+
+
+def test_sniffers_ignore_other_formats(png_bytes, jpeg_bytes):
+
+    assert sniff_png(jpeg_bytes) is None
+    assert sniff_jpeg(png_bytes) is None
+
+
+def test_completeness_checks_find_end_markers(png_bytes, jpeg_bytes):
+
+    assert png_complete(png_bytes)
+    assert jpeg_complete(jpeg_bytes)
+
+    assert not png_complete(png_bytes[:len(png_bytes) // 2])
+    assert not jpeg_complete(jpeg_bytes[:len(jpeg_bytes) // 2])
+
+
+# ---------------------------------------------
+# BUFFER
+# ---------------------------------------------
+def test_buffer_accepts_complete_image(png_bytes):
+
+    buffer = fill(SniffingBuffer(), png_bytes)
+
+    assert buffer.finish() == png_bytes
+    assert buffer.format == "PNG"
+    assert buffer.size == (400, 300)
+
+
+def test_buffer_rejects_unknown_signature_early():
+
+    buffer = SniffingBuffer()
+
+    with pytest.raises(UnsupportedMediaType):
+        buffer.write(b"GIF89a" + bytes(SIGNATURE_BYTES))
+
+
+def test_buffer_enforces_byte_limit(png_bytes):
+
+    with pytest.raises(RequestEntityTooLarge):
+        fill(SniffingBuffer(max_bytes=len(png_bytes) // 2), png_bytes)
+
+
+def test_buffer_enforces_pixel_limit_from_header(png_bytes):
+
+    buffer = SniffingBuffer(max_pixels=400 * 300 - 1)
+
+    # Rejected on the first chunk, before the rest of the file arrives
+    with pytest.raises(RequestEntityTooLarge):
+        buffer.write(png_bytes[:SIGNATURE_BYTES])
+
+
+def test_buffer_rejects_empty_upload():
+
+    with pytest.raises(BadRequest):
+        SniffingBuffer().finish()
+
+
+def test_buffer_rejects_truncated_upload(jpeg_bytes):
+
+    buffer = fill(SniffingBuffer(), jpeg_bytes[:len(jpeg_bytes) - 100])
+
+    with pytest.raises(BadRequest, match="Truncated JPEG"):
+        buffer.finish()
+
+
+def test_buffer_sniffs_short_files_on_finish():
+
+    out = io.BytesIO()
+    Image.fromarray(np.zeros((1, 1), dtype=np.uint8)).save(out, format="PNG")
+    tiny = out.getvalue()
+    assert len(tiny) < SIGNATURE_BYTES
+
+    buffer = SniffingBuffer()
+    buffer.write(tiny)
+
+    assert buffer.finish() == tiny
+    assert buffer.size == (1, 1)
+
+    short = SniffingBuffer()
+    short.write(b"not an image")
+
+    with pytest.raises(UnsupportedMediaType):
+        short.finish()
+
+
+def test_lenient_buffer_defers_error_and_drops_data():
+
+    buffer = SniffingBuffer(strict=False)
+    buffer.write(b"GIF89a" + bytes(SIGNATURE_BYTES))
+    buffer.write(bytes(10000))
+
+    assert buffer.getvalue() == b""
+
+    with pytest.raises(UnsupportedMediaType):
+        buffer.finish()
+
+
+def test_buffer_accepts_dicom(make_dicom):
+
+    data = make_dicom(rows=64, cols=48)
+    buffer = fill(SniffingBuffer(), data)
+
+    assert buffer.finish() == data
+    assert buffer.format == "DICOM"
+    assert buffer.size == (48, 64)
+
+
+def test_buffer_rejects_truncated_dicom(make_dicom):
+
+    data = make_dicom(rows=64, cols=48)
+    buffer = fill(SniffingBuffer(), data[:-200])
+
+    with pytest.raises(BadRequest, match="Truncated DICOM"):
+        buffer.finish()
+
+
+# ---------------------------------------------
+# REQUEST INTEGRATION
+# ---------------------------------------------
+def test_check_image_bytes_uses_app_limits(app, png_bytes):
+
+    with app.app_context():
+        assert check_image_bytes(png_bytes) == png_bytes
+
+        app.config["MAX_IMAGE_PIXELS"] = 100
+        with pytest.raises(RequestEntityTooLarge):
+            check_image_bytes(png_bytes)
+
+
+def test_batch_file_count_is_checked_while_streaming(app, png_bytes):
+
+    client = app.test_client()
+
+    def post(count):
+        files = [(io.BytesIO(png_bytes), f"{i}.png") for i in range(count)]
+        return client.post("/batch", data={"files": files})
+
+    assert post(2).get_data(as_text=True) == "2"
+    assert post(3).status_code == 400
+
+
+def test_raw_upload_mimetypes(app):
+
+    with app.test_request_context(content_type="image/png"):
+        assert ingest.is_raw_upload(request)
+
+    with app.test_request_context(content_type="application/dicom"):
+        assert ingest.is_raw_upload(request)
+
+    with app.test_request_context(content_type="multipart/form-data; boundary=x"):
+        assert not ingest.is_raw_upload(request)
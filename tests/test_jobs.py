@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+
+from utils import jobs as jobs_module
+from utils.jobs import InProcessJobQueue, JobBackend, QueueFull, create_job_backend
+
+
+def echo(payload):
+    return {"echo": payload}
+
+
+def fail(payload):
+    raise RuntimeError(f"cannot read {payload}")
+
+
+def test_job_runs_to_done():
+
+    jobs = InProcessJobQueue(echo, workers=1)
+    job_id = jobs.submit("a.png")
+
+    job = jobs.wait(job_id, timeout=5)
+
+    assert job["status"] == "done"
+    assert job["result"] == {"echo": "a.png"}
+    assert job["created_at"] <= job["started_at"] <= job["finished_at"]
+
+
+def test_handler_error_marks_job_failed():
+
+    jobs = InProcessJobQueue(fail, workers=1)
+    job = jobs.wait(jobs.submit("a.png"), timeout=5)
+
+    assert job["status"] == "failed"
+    assert job["error"] == "cannot read a.png"
+    assert "result" not in job
+
+
+def test_get_returns_a_copy_and_none_for_unknown_ids():
+
+    jobs = InProcessJobQueue(echo, workers=1)
+    job_id = jobs.submit(1)
+    jobs.wait(job_id, timeout=5)
+
+    jobs.get(job_id)["status"] = "tampered"
+
+    assert jobs.get(job_id)["status"] == "done"
+    assert jobs.get("missing") is None
+    assert jobs.wait("missing", timeout=0) is None
+
+
+def test_full_queue_raises_with_retry_after():
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked(payload):
+        started.set()
+        release.wait(5)
+
+    jobs = InProcessJobQueue(blocked, workers=1, max_queue=2)
+
+    try:
+        # One job held by the worker, two waiting in the queue
+        jobs.submit(0)
+        assert started.wait(5)
+        jobs.submit(1)
+        jobs.submit(2)
+
+        assert jobs.queue_depth() == 2
+
+        with pytest.raises(QueueFull) as raised:
+            jobs.submit(3)
+
+        assert raised.value.retry_after >= 1
+
+        # The rejected job is not left behind
+        assert len(jobs._jobs) == 3
+    finally:
+        release.set()
+
+
+def test_retry_after_scales_with_backlog():
+
+    release = threading.Event()
+    running = threading.Semaphore(0)
+
+    def blocked(payload):
+        running.release()
+        release.wait(5)
+
+    jobs = InProcessJobQueue(blocked, workers=2, max_queue=8)
+
+    try:
+        assert jobs.retry_after() == 1
+
+        # Two jobs running, three queued at ~10s each across two workers
+        for i in range(5):
+            jobs.submit(i)
+        assert running.acquire(timeout=5) and running.acquire(timeout=5)
+        jobs._avg_seconds = 10.0
+
+        assert jobs.queue_depth() == 3
+        assert jobs.retry_after() == 15
+    finally:
+        release.set()
+
+
+def test_finished_jobs_are_pruned_after_ttl(monkeypatch):
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs_module.time, "time", lambda: now[0])
+
+    jobs = InProcessJobQueue(echo, workers=1, result_ttl=60)
+    old = jobs.submit("old")
+    jobs.wait(old, timeout=5)
+
+    now[0] += 61
+    new = jobs.submit("new")
+    jobs.wait(new, timeout=5)
+
+    assert jobs.get(old) is None
+    assert jobs.get(new)["status"] == "done"
+
+
+def test_unknown_backend_is_rejected():
+
+    assert isinstance(create_job_backend("inprocess", echo, workers=1), InProcessJobQueue)
+
+    with pytest.raises(ValueError, match="Unknown job backend"):
+        create_job_backend("redis", echo)
+
+
+def test_incomplete_backend_fails_when_created(monkeypatch):
+
+    class SubmitOnly(JobBackend):
+
+        def __init__(self, handler, **options):
+            self.handler = handler
+
+        def submit(self, payload):
+            return "job"
+
+    monkeypatch.setitem(jobs_module.JOB_BACKENDS, "submit-only", SubmitOnly)
+
+    with pytest.raises(TypeError, match="abstract"):
+        create_job_backend("submit-only", echo)
@@ -0,0 +1,90 @@
+from utils.metrics import REGISTRY, STAGE_SECONDS, Counter, Gauge, Histogram, Registry
+
+
+def test_counter_accumulates_per_label():
+
+    counter = Counter("results_total", "Results", ["result"])
+    counter.inc(result="fracture")
+    counter.inc(result="normal")
+    counter.inc(2, result="fracture")
+
+    assert counter.samples() == [
+        ('results_total{result="fracture"}', 3),
+        ('results_total{result="normal"}', 1)
+    ]
+
+
+def test_unlabelled_metric_has_no_braces():
+
+    counter = Counter("requests_total", "Requests")
+    counter.inc()
+
+    assert counter.samples() == [("requests_total", 1)]
+
+
+def test_gauge_is_set_not_added():
+
+    gauge = Gauge("queue_depth", "Depth", ["queue"])
+    gauge.set(5, queue="jobs")
+    gauge.set(2, queue="jobs")
+
+    assert gauge.samples() == [('queue_depth{queue="jobs"}', 2)]
+
+
+def test_histogram_buckets_are_cumulative():
+
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.samples() == [
+        ('latency_seconds_bucket{le="0.1"}', 1),
+        ('latency_seconds_bucket{le="1.0"}', 3),
+        ('latency_seconds_bucket{le="+Inf"}', 4),
+        ("latency_seconds_sum", 4.05),
+        ("latency_seconds_count", 4)
+    ]
+
+
+def test_histogram_labels_come_before_le():
+
+    histogram = Histogram("stage_seconds", "Stages", ["stage"], buckets=(1.0,))
+    histogram.observe(0.5, stage="decode")
+
+    assert histogram.samples()[0] == ('stage_seconds_bucket{stage="decode",le="1.0"}', 1)
+
+
+def test_histogram_time_records_even_on_error():
+
+    histogram = Histogram("stage_seconds", "Stages", ["stage"])
+
+    try:
+        with histogram.time(stage="infer"):
+            raise ValueError
+    except ValueError:
+        pass
+
+    samples = dict(histogram.samples())
+    assert samples['stage_seconds_count{stage="infer"}'] == 1
+
+
+def test_registry_renders_help_and_type():
+
+    registry = Registry()
+    registry.register(Counter("a_total", "First metric")).inc()
+    registry.register(Histogram("b_seconds", "Second metric", buckets=(1.0,)))
+
+    assert registry.render() == (
+        "# HELP a_total First metric\n"
+        "# TYPE a_total counter\n"
+        "a_total 1\n"
+        "# HELP b_seconds Second metric\n"
+        "# TYPE b_seconds histogram\n"
+    )
+
+
+def test_pipeline_metrics_are_registered():
+
+    assert "# TYPE fracturesense_stage_seconds histogram" in REGISTRY.render()
+    assert STAGE_SECONDS.labelnames == ("stage",)
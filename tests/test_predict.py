@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from conftest import IMG_SIZE
+
+pytest.importorskip("tensorflow")
+
+from utils.predict import FracturePredictor
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(1)
+    return rng.random((5,) + IMG_SIZE + (3,), dtype=np.float32)
+
+
+# ---------------------------------------------
+# SHARED BACKBONE
+# ---------------------------------------------
+def test_fused_backbone_matches_the_original_models(random_model_dir, images):
+
+    fused = FracturePredictor(model_dir=random_model_dir, fused=True, compiled=False)
+    separate = FracturePredictor(model_dir=random_model_dir, fused=False, compiled=False)
+
+    assert fused.fused and not separate.fused
+
+    fused_outputs = fused.stage_outputs(images)
+    separate_outputs = separate.stage_outputs(images)
+
+    np.testing.assert_allclose(fused_outputs["detect"], separate_outputs["detect"], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(fused_outputs["classify"], separate_outputs["classify"], rtol=1e-5, atol=1e-6)
+
+    assert fused.predict_arrays(images) == separate.predict_arrays(images)
+
+
+# ---------------------------------------------
+# COMPILED INFERENCE
+# ---------------------------------------------
+@pytest.mark.parametrize("fused", [True, False])
+def test_compiled_inference_matches_eager(random_model_dir, images, fused):
+
+    predictor = FracturePredictor(model_dir=random_model_dir, fused=fused, compiled=True)
+
+    # Warm-up traced batch 1; 5 and 3 are new batch sizes for the same graph
+    for batch in (images[:1], images, images[:3]):
+
+        features = predictor.extract_features(batch)
+
+        np.testing.assert_allclose(predictor._detect_fn(features),
+                                   predictor.detect_model(batch, training=False).numpy(),
+                                   rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(predictor._classify_fn(features),
+                                   predictor.classify_model(batch, training=False).numpy(),
+                                   rtol=1e-5, atol=1e-6)
@@ -0,0 +1,117 @@
+import io
+import zipfile
+
+import pytest
+
+from conftest import upload
+
+pytest.importorskip("tensorflow")
+
+from utils.predict import FracturePredictor
+
+
+def archive(**members):
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+
+    return buffer.getvalue()
+
+
+# ---------------------------------------------
+# PREDICTOR
+# ---------------------------------------------
+def test_predict_batch_keeps_input_order(model_dir):
+
+    predictor = FracturePredictor(model_dir=model_dir)
+    images = [upload(0.95), b"not an image", upload(0.05), upload(0.9)]
+
+    # batch_size=2: the decoded images are split across model calls
+    results = predictor.predict_batch(images, batch_size=2)
+
+    assert [r["fracture_type"] if "error" not in r else None for r in results] == [
+        "elbow fracture", None, "No Fracture", "elbow fracture"
+    ]
+    assert results[1] == {"error": "Could not decode image (UnidentifiedImageError)"}
+    assert results == [predictor.predict(image) if "error" not in result else result
+                       for image, result in zip(images, results)]
+
+
+# ---------------------------------------------
+# /predict/batch
+# ---------------------------------------------
+def post(flask_app, files):
+
+    client = flask_app.app.test_client()
+    data = {"files": [(io.BytesIO(content), name) for name, content in files]}
+
+    return client.post("/predict/batch", data=data)
+
+
+def test_batch_results_keep_upload_order(flask_app):
+
+    response = post(flask_app, [
+        ("a.png", upload(0.95)),
+        ("b.png", upload(0.05)),
+        ("scans.zip", archive(**{"c.png": upload(0.9), "notes.txt": b"skipped"})),
+        ("d.png", upload(0.1))
+    ])
+
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body["count"] == 4
+    assert [(r["filename"], r["fracture_type"]) for r in body["results"]] == [
+        ("a.png", "elbow fracture"), ("b.png", "No Fracture"),
+        ("c.png", "elbow fracture"), ("d.png", "No Fracture")
+    ]
+
+
+def test_bad_items_are_reported_without_failing_the_batch(flask_app):
+
+    png = upload(0.95)
+
+    response = post(flask_app, [
+        ("a.png", png),
+        ("cut.png", png[:len(png) // 2]),
+        ("notes.txt", b"hello"),
+        ("b.png", upload(0.05))
+    ])
+
+    results = response.get_json()["results"]
+
+    assert response.status_code == 200
+    assert results[0]["fracture_type"] == "elbow fracture"
+    assert results[1] == {"filename": "cut.png", "error": "Truncated PNG upload"}
+    assert results[2] == {"filename": "notes.txt", "error": "Invalid file type"}
+    assert results[3]["fracture_type"] == "No Fracture"
+
+
+def test_cached_items_keep_their_place(flask_app):
+
+    first = post(flask_app, [("a.png", upload(0.95))]).get_json()["results"][0]
+
+    results = post(flask_app, [("b.png", upload(0.05)), ("a.png", upload(0.95))]).get_json()["results"]
+
+    assert [(r["filename"], r["cached"]) for r in results] == [("b.png", False), ("a.png", True)]
+    assert results[1]["fracture_type"] == first["fracture_type"]
+
+
+def test_too_many_files_is_a_400(flask_app, monkeypatch):
+
+    monkeypatch.setattr(flask_app, "MAX_BATCH_FILES", 2)
+    monkeypatch.setitem(flask_app.app.config, "MAX_BATCH_FILES", 2)
+
+    png = upload(0.95)
+
+    # Plain files are counted while the body streams in
+    response = post(flask_app, [(f"{i}.png", png) for i in range(3)])
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Too many files (max 2)"}
+
+    # Archive members are counted from the zip directory
+    response = post(flask_app, [("scans.zip", archive(**{f"{i}.png": png for i in range(3)}))])
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Too many files (max 2)"}
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import encode
+from utils.preprocess import load_image_array, scale_to_8bit, to_8bit, to_model_input
+
+
+# ---------------------------------------------
+# 8-BIT CONVERSION
+# ---------------------------------------------
+def test_16_bit_images_use_a_fixed_shift():
+
+    img = Image.fromarray(np.array([[0, 256, 4095, 65535]], dtype=np.uint16))
+    assert img.mode == "I;16"
+
+    out = to_8bit(img)
+
+    assert out.mode == "L"
+    assert np.asarray(out).tolist() == [[0, 1, 15, 255]]
+
+
+def test_same_stored_value_maps_to_the_same_intensity():
+
+    # A dim (12-bit range) and a bright (full 16-bit) image share value 4096
+    dim = Image.fromarray(np.array([[4096, 4000]], dtype=np.uint16))
+    bright = Image.fromarray(np.array([[4096, 65535]], dtype=np.uint16))
+
+    assert np.asarray(to_8bit(dim))[0, 0] == np.asarray(to_8bit(bright))[0, 0] == 16
+
+
+def test_32_bit_mode_holds_16_bit_samples():
+
+    img = Image.fromarray(np.array([[-5, 0, 32768, 65535, 70000]], dtype=np.int32))
+    assert img.mode == "I"
+
+    assert np.asarray(to_8bit(img)).tolist() == [[0, 0, 128, 255, 255]]
+
+
+def test_scale_to_8bit_takes_the_stored_depth():
+
+    pixels = np.array([0, 2048, 4095, 5000], dtype=np.uint16)
+
+    assert scale_to_8bit(pixels).tolist() == [0, 8, 15, 19]
+
+    # e.g. BitsStored 12: values above the stored range saturate
+    assert scale_to_8bit(pixels, bits=12).tolist() == [0, 128, 255, 255]
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB"])
+def test_8_bit_images_pass_through(mode):
+
+    img = Image.new(mode, (4, 3))
+
+    assert to_8bit(img) is img
+
+
+def test_rgba_drops_alpha():
+
+    pixels = np.zeros((2, 2, 4), dtype=np.uint8)
+    pixels[..., :3] = (200, 100, 50)
+    pixels[..., 3] = 0
+
+    out = to_8bit(Image.fromarray(pixels, mode="RGBA"))
+
+    assert out.mode == "RGB"
+    assert np.asarray(out)[0, 0].tolist() == [200, 100, 50]
+
+
+def test_palette_image_is_expanded():
+
+    img = Image.new("P", (2, 2), 1)
+    img.putpalette([0, 0, 0, 10, 20, 30] + [0] * 762)
+
+    out = to_8bit(img)
+
+    assert out.mode == "RGB"
+    assert np.asarray(out)[1, 1].tolist() == [10, 20, 30]
+
+
+def test_cmyk_is_converted_to_rgb():
+
+    out = to_8bit(Image.new("CMYK", (2, 2), (0, 255, 255, 0)))
+
+    assert out.mode == "RGB"
+    assert np.asarray(out)[0, 0].tolist() == [255, 0, 0]
+
+
+def test_bilevel_and_la_become_grayscale():
+
+    assert to_8bit(Image.new("1", (2, 2), 1)).mode == "L"
+    assert to_8bit(Image.new("LA", (2, 2), (90, 0))).getpixel((0, 0)) == 90
+
+
+# ---------------------------------------------
+# MODEL INPUT
+# ---------------------------------------------
+def test_grayscale_fills_all_three_channels():
+
+    pixels = np.array([[0, 51], [102, 255]], dtype=np.uint8)
+
+    out = to_model_input(pixels, size=(2, 2))
+
+    assert out.shape == (1, 2, 2, 3)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out[0, ..., 0], pixels / 255, rtol=1e-6)
+    assert (out[..., 0] == out[..., 2]).all()
+
+
+def test_rgb_channels_are_kept():
+
+    pixels = np.zeros((3, 4, 3), dtype=np.uint8)
+    pixels[..., 1] = 255
+
+    out = to_model_input(pixels, size=(4, 3))
+
+    assert out.shape == (1, 3, 4, 3)
+    assert out[0, 0, 0].tolist() == [0, 1, 0]
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "TIFF"])
+def test_16_bit_file_loads_at_a_fixed_scale(fmt):
+
+    data = encode(np.full((64, 48), 0x8000, dtype=np.uint16), fmt)
+
+    out = load_image_array(data, size=(32, 32))
+
+    assert out.shape == (1, 32, 32, 3)
+    np.testing.assert_allclose(out, 128 / 255, rtol=1e-6)
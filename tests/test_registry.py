@@ -0,0 +1,272 @@
+import json
+import os
+
+import pytest
+
+from utils.registry import (BUNDLE_FILE, ROUTING_FILE, ModelRegistry, bundle_stamp,
+                            is_bundle_dir, read_bundle)
+
+
+class FakePredictor:
+
+    def __init__(self, model_dir, bundle):
+        self.model_dir = model_dir
+        self.bundle = bundle
+
+
+def write_bundle(root, version, mtime=None, **fields):
+
+    path = os.path.join(root, version)
+    os.makedirs(path, exist_ok=True)
+
+    with open(os.path.join(path, BUNDLE_FILE), "w") as f:
+        json.dump(dict(version=version, **fields), f)
+    with open(os.path.join(path, "detect_classes.json"), "w") as f:
+        json.dump({"fracture": 0, "normal": 1}, f)
+
+    if mtime is not None:
+        for name in os.listdir(path):
+            os.utime(os.path.join(path, name), (mtime, mtime))
+
+    return path
+
+
+def write_routing(root, weights, mtime=None):
+
+    path = os.path.join(root, ROUTING_FILE)
+
+    with open(path, "w") as f:
+        json.dump({"weights": weights}, f)
+
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def make_registry(events):
+
+    def make(root):
+        return ModelRegistry(
+            str(root), FakePredictor,
+            on_load=lambda model: events.append(("load", model.version)),
+            on_unload=lambda model: events.append(("unload", model.version)),
+            poll_seconds=0
+        )
+
+    return make
+
+
+def payloads(count):
+    return [f"image-{i}".encode() for i in range(count)]
+
+
+# ---------------------------------------------
+# BUNDLES
+# ---------------------------------------------
+def test_read_bundle_defaults_version_to_folder_name(tmp_path):
+
+    folder = tmp_path / "v7"
+    folder.mkdir()
+
+    assert read_bundle(str(folder)) == {"version": "v7"}
+    assert read_bundle(str(folder), default_version="default") == {"version": "default"}
+
+    (folder / BUNDLE_FILE).write_text(json.dumps({"version": "v8", "img_size": [256, 256]}))
+    assert read_bundle(str(folder)) == {"version": "v8", "img_size": [256, 256]}
+
+
+def test_is_bundle_dir(tmp_path):
+
+    assert not is_bundle_dir(str(tmp_path))
+
+    (tmp_path / "detect_classes.json").write_text("{}")
+    assert is_bundle_dir(str(tmp_path))
+
+
+def test_bundle_stamp_follows_the_newest_file(tmp_path):
+
+    path = write_bundle(str(tmp_path), "v1", mtime=1000)
+    stamp = bundle_stamp(path)
+
+    # Weights copied over in place, e.g. a republished version
+    weights = os.path.join(path, "fracture_detection_model.h5")
+    open(weights, "wb").close()
+    os.utime(weights, (2000, 2000))
+
+    assert bundle_stamp(path) > stamp
+
+
+# ---------------------------------------------
+# SCANNING AND ROUTING
+# ---------------------------------------------
+def test_single_folder_is_one_default_version(tmp_path, make_registry):
+
+    (tmp_path / "detect_classes.json").write_text("{}")
+    registry = make_registry(tmp_path)
+
+    assert registry.single
+    assert registry.route(b"anything").version == "default"
+    assert registry.primary().stamp is not None
+
+
+def test_empty_registry_raises(tmp_path, make_registry):
+
+    with pytest.raises(RuntimeError):
+        make_registry(tmp_path)
+
+
+def test_newest_bundle_takes_all_traffic_without_routing(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    write_bundle(str(tmp_path), "v2", mtime=2000)
+
+    registry = make_registry(tmp_path)
+
+    assert {registry.route(data).version for data in payloads(50)} == {"v2"}
+
+
+def test_hidden_folders_are_skipped(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    write_bundle(str(tmp_path), ".v2.1234", mtime=2000)
+
+    registry = make_registry(tmp_path)
+
+    assert [d["version"] for d in registry.describe()] == ["v1"]
+
+
+def test_weighted_routing_is_sticky_and_follows_weights(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1")
+    write_bundle(str(tmp_path), "v2")
+    write_routing(str(tmp_path), {"v1": 75, "v2": 25})
+
+    registry = make_registry(tmp_path)
+    routed = [registry.route(data).version for data in payloads(4000)]
+
+    assert 0.70 < routed.count("v1") / len(routed) < 0.80
+
+    # The same bytes always reach the same version
+    assert routed == [registry.route(data).version for data in payloads(4000)]
+
+
+def test_unknown_and_zero_weight_versions_get_no_traffic(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    write_bundle(str(tmp_path), "v2", mtime=2000)
+    write_routing(str(tmp_path), {"v1": 100, "v2": 0, "v9": 50})
+
+    registry = make_registry(tmp_path)
+
+    assert registry.describe() == [
+        {"version": "v1", "traffic": 100.0, "loaded": False, "description": None}
+    ]
+
+
+def test_describe_and_primary(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1", description="baseline")
+    write_bundle(str(tmp_path), "v2")
+    write_routing(str(tmp_path), {"v1": 1, "v2": 3})
+
+    registry = make_registry(tmp_path)
+
+    assert [(d["version"], d["traffic"]) for d in registry.describe()] == [("v1", 25.0), ("v2", 75.0)]
+    assert registry.describe()[0]["description"] == "baseline"
+    assert registry.primary().version == "v2"
+
+
+# ---------------------------------------------
+# LOADING
+# ---------------------------------------------
+def test_versions_load_lazily_and_once(tmp_path, make_registry, events):
+
+    write_bundle(str(tmp_path), "v1", img_size=[256, 256])
+    registry = make_registry(tmp_path)
+
+    model = registry.route(b"x")
+    assert model.predictor is None
+    assert registry.loaded_models() == []
+
+    registry.ensure_loaded(model)
+    registry.ensure_loaded(model)
+
+    assert model.predictor.bundle["img_size"] == [256, 256]
+    assert model.predictor.model_dir == model.model_dir
+    assert events == [("load", "v1")]
+    assert registry.loaded_models() == [model]
+
+
+# ---------------------------------------------
+# HOT RELOAD
+# ---------------------------------------------
+def test_reload_without_changes_is_a_no_op(tmp_path, make_registry):
+
+    write_bundle(str(tmp_path), "v1")
+    registry = make_registry(tmp_path)
+
+    assert registry.reload() is False
+
+
+def test_reload_swaps_versions_and_unloads_retired_ones(tmp_path, make_registry, events):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    write_routing(str(tmp_path), {"v1": 100}, mtime=1000)
+
+    registry = make_registry(tmp_path)
+    registry.load_all()
+    old = registry.route(b"x")
+
+    write_bundle(str(tmp_path), "v2", mtime=2000)
+    write_routing(str(tmp_path), {"v2": 100}, mtime=2000)
+
+    assert registry.reload() is True
+
+    new = registry.route(b"x")
+    assert new.version == "v2"
+
+    # Warm registry: the new version was loaded before it got traffic
+    assert new.predictor is not None
+    assert events == [("load", "v1"), ("load", "v2"), ("unload", "v1")]
+
+    # A request routed before the swap still holds a working predictor
+    assert old.predictor is not None
+
+
+def test_reload_keeps_unchanged_versions(tmp_path, make_registry, events):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    write_routing(str(tmp_path), {"v1": 100}, mtime=1000)
+
+    registry = make_registry(tmp_path)
+    registry.load_all()
+    v1 = registry.route(b"x")
+
+    write_bundle(str(tmp_path), "v2", mtime=2000)
+    write_routing(str(tmp_path), {"v1": 50, "v2": 50}, mtime=2000)
+    registry.reload()
+
+    assert any(registry.route(data) is v1 for data in payloads(50))
+    assert ("unload", "v1") not in events
+
+
+def test_republished_version_is_reloaded(tmp_path, make_registry, events):
+
+    write_bundle(str(tmp_path), "v1", mtime=1000)
+    registry = make_registry(tmp_path)
+    registry.load_all()
+    old = registry.route(b"x")
+
+    # publish_bundle.py --force: same name, new files
+    write_bundle(str(tmp_path), "v1", mtime=2000)
+    registry.reload()
+
+    new = registry.route(b"x")
+    assert new is not old
+    assert new.stamp != old.stamp
+    assert events == [("load", "v1"), ("load", "v1"), ("unload", "v1")]
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from utils.tta import MAX_VIEWS, VIEWS, augment, tta_batch
+
+
+@pytest.fixture
+def batch():
+
+    # Two different images, already scaled like the model input
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (2, 32, 48, 3), dtype=np.uint8)
+
+    return pixels.astype(np.float32) / 255
+
+
+def test_views_of_each_image_are_adjacent(batch):
+
+    out = tta_batch(batch, views=4)
+
+    assert out.shape == (8, 32, 48, 3)
+    assert out.dtype == np.float32
+
+    # The first view of each image is the image itself
+    np.testing.assert_array_equal(out[0], batch[0])
+    np.testing.assert_array_equal(out[4], batch[1])
+
+
+def test_second_view_is_a_horizontal_flip(batch):
+
+    out = tta_batch(batch, views=2)
+
+    np.testing.assert_array_equal(out[1], batch[0][:, ::-1])
+    np.testing.assert_array_equal(out[3], batch[1][:, ::-1])
+
+
+def test_all_views_stay_in_range(batch):
+
+    out = tta_batch(batch, views=MAX_VIEWS)
+
+    assert out.shape == (2 * len(VIEWS),) + batch.shape[1:]
+    assert out.min() >= 0 and out.max() <= 1
+
+
+@pytest.mark.parametrize("views", [0, MAX_VIEWS + 1])
+def test_view_count_is_bounded(batch, views):
+
+    with pytest.raises(ValueError):
+        tta_batch(batch, views=views)
+
+
+def test_identity_augment_returns_input():
+
+    pixels = np.zeros((10, 20, 3), dtype=np.uint8)
+
+    assert augment(pixels, False, 0, 1.0) is pixels
+
+
+def test_rotation_keeps_shape_and_centre():
+
+    pixels = np.zeros((41, 61, 3), dtype=np.uint8)
+    pixels[20, 30] = 255
+
+    rotated = augment(pixels, False, 7, 1.0)
+    zoomed = augment(pixels, False, 0, 1.1)
+
+    assert rotated.shape == zoomed.shape == pixels.shape
+
+    # Rotation and scale are about the centre, so the centre pixel stays put
+    assert rotated[20, 30].max() > 0
+    assert zoomed[20, 30].max() > 0
@@ -0,0 +1,102 @@
+"""
+Build a dataset manifest from the YOLO export
+
+One row per image with its split, detection label, fracture class and the
+YOLO boxes, written as CSV or JSONL (by file extension):
+
+    image_path,split,detection_label,fracture_class,boxes
+    train/images/a.jpg,train,fracture,wrist fracture,"[[6, 0.5, 0.5, 0.1, 0.2]]"
+
+Image paths are relative to the manifest's folder. The training scripts read
+it with --manifest, so no dataset_detection/ or dataset_classification/
+copies are needed, and the train/valid splits come from the export instead of
+a random validation_split.
+"""
+
+import argparse
+import csv
+import json
+import os
+
+from convert_dataset import (
+    dataset_path,
+    fracture_types,
+    index_images,
+    read_objects,
+    splits,
+)
+
+
+MANIFEST_FIELDS = ["image_path", "split", "detection_label", "fracture_class", "boxes"]
+
+
+def manifest_rows(source, manifest_dir):
+
+    for split in splits:
+
+        labels_dir = os.path.join(source, split, "labels")
+        images_dir = os.path.join(source, split, "images")
+
+        if not os.path.isdir(labels_dir) or not os.path.isdir(images_dir):
+            continue
+
+        image_index = index_images(images_dir)
+
+        for label_file in sorted(os.listdir(labels_dir)):
+
+            if not label_file.endswith(".txt"):
+                continue
+
+            image_path = image_index.get(label_file[:-len(".txt")])
+            if image_path is None:
+                continue
+
+            objects = read_objects(os.path.join(labels_dir, label_file))
+            # Single class per image, the same rule convert_dataset.py uses
+            types = fracture_types([obj[0] for obj in objects])
+
+            yield {
+                "image_path": os.path.relpath(image_path, manifest_dir),
+                "split": split,
+                "detection_label": "fracture" if objects else "normal",
+                "fracture_class": types[0] if types else "",
+                "boxes": objects
+            }
+
+
+def write_manifest(rows, output):
+
+    count = 0
+
+    with open(output, "w", newline="") as f:
+
+        if output.endswith(".jsonl"):
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                count += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "boxes": json.dumps(row["boxes"])})
+                count += 1
+
+    return count
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Write a CSV/JSONL manifest of the YOLO export")
+    parser.add_argument("--source", default=dataset_path, help="YOLO dataset root")
+    parser.add_argument("--output", default="manifest.csv", help="manifest.csv or manifest.jsonl")
+    args = parser.parse_args()
+
+    manifest_dir = os.path.dirname(os.path.abspath(args.output))
+    rows = manifest_rows(args.source, manifest_dir)
+    count = write_manifest(rows, args.output)
+
+    print(f"✅ {count} images written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
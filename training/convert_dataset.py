@@ -1,5 +1,8 @@
+import argparse
 import os
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 dataset_path = "bone fracture detection.v4-v4.yolov8"
 
@@ -16,58 +19,252 @@ class_mapping = {
     6: 'wrist fracture'
 }
 
-os.makedirs(detect_path, exist_ok=True)
-os.makedirs(classify_path, exist_ok=True)
+image_exts = [".jpg", ".jpeg", ".png"]
 
-for c in ["normal", "fracture"]:
-    os.makedirs(os.path.join(detect_path, c), exist_ok=True)
+detect_classes = ["normal", "fracture"]
+classify_classes = sorted(set(class_mapping.values()))
 
-for c in set(class_mapping.values()):
-    os.makedirs(os.path.join(classify_path, c), exist_ok=True)
+splits = ['train','valid','test']
 
-image_exts = [".jpg", ".jpeg", ".png"]
 
-for split in ['train','valid','test']:
+# ---------------------------------------------
+# INDEXING AND LABELS
+# ---------------------------------------------
+def index_images(images_dir):
 
-    print(f"\nProcessing {split} dataset...")
+    # One directory scan per split instead of an exists() probe per extension
+    index = {}
+
+    with os.scandir(images_dir) as entries:
+        for entry in entries:
+            base_name, ext = os.path.splitext(entry.name)
+            if ext.lower() not in image_exts or not entry.is_file():
+                continue
+            # Keep the image_exts priority when a name exists twice
+            current = index.get(base_name)
+            if current is None or image_exts.index(ext.lower()) < image_exts.index(
+                    os.path.splitext(current)[1].lower()):
+                index[base_name] = entry.path
+
+    return index
+
+
+def read_objects(label_path):
+
+    # Every object in the file as [class_id, cx, cy, w, h], not only the first line
+    objects = []
+
+    with open(label_path) as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                objects.append([int(parts[0])] + [float(v) for v in parts[1:5]])
+
+    return objects
+
+
+def read_class_ids(label_path):
+
+    return [obj[0] for obj in read_objects(label_path)]
+
+
+def fracture_types(class_ids, multi_object="majority"):
+
+    types = [class_mapping[c] for c in class_ids if c in class_mapping]
+    if not types:
+        return []
+
+    if multi_object == "all":
+        return sorted(set(types))
+
+    # Most frequent type; ties go to the first object in the file
+    counts = Counter(types)
+    return [max(types, key=lambda t: (counts[t], -types.index(t)))]
+
+
+# ---------------------------------------------
+# LINKING
+# ---------------------------------------------
+def is_current(src_stat, dest):
+
+    try:
+        dest_stat = os.stat(dest)
+    except OSError:
+        return False
+
+    return (dest_stat.st_size == src_stat.st_size
+            and int(dest_stat.st_mtime) == int(src_stat.st_mtime))
+
+
+def place(src, dest, link="hardlink"):
+
+    src_stat = os.stat(src)
+
+    if is_current(src_stat, dest):
+        return "skipped"
+
+    if os.path.lexists(dest):
+        os.remove(dest)
+
+    try:
+        if link == "hardlink":
+            os.link(src, dest)
+            return "linked"
+        if link == "symlink":
+            os.symlink(os.path.abspath(src), dest)
+            return "linked"
+    except OSError:
+        # Different filesystem or no link support, fall back to a copy
+        pass
+
+    # copy2 keeps the mtime so the next run can skip the file
+    shutil.copy2(src, dest)
+    return "copied"
+
+
+def remove_stale(name, root, classes, keep):
+
+    # A relabeled image must not stay behind in its old class folders
+    removed = 0
+
+    for class_name in classes:
+        if class_name in keep:
+            continue
+        path = os.path.join(root, class_name, name)
+        if os.path.lexists(path):
+            os.remove(path)
+            removed += 1
+
+    return removed
+
+
+# ---------------------------------------------
+# CONVERSION
+# ---------------------------------------------
+def convert_image(image_path, label_path, link, multi_object):
+
+    name = os.path.basename(image_path)
+    class_ids = read_class_ids(label_path)
+    actions = []
+
+    # NORMAL IMAGE
+    if not class_ids:
+        detect_class, types = "normal", []
+
+    # FRACTURE IMAGE
+    else:
+        detect_class, types = "fracture", fracture_types(class_ids, multi_object)
+
+    actions.append((detect_class, None,
+                    place(image_path, os.path.join(detect_path, detect_class, name), link)))
+
+    for fracture_type in types:
+        actions.append((None, fracture_type,
+                        place(image_path, os.path.join(classify_path, fracture_type, name), link)))
+
+    # Outputs of an earlier run under a different label
+    removed = (remove_stale(name, detect_path, detect_classes, [detect_class])
+               + remove_stale(name, classify_path, classify_classes, types))
+    actions.extend([(None, None, "removed")] * removed)
+
+    return actions
+
+
+def convert_split(split, executor, link, multi_object):
 
     labels_dir = os.path.join(dataset_path, split, "labels")
     images_dir = os.path.join(dataset_path, split, "images")
 
-    for label_file in os.listdir(labels_dir):
+    if not os.path.isdir(labels_dir) or not os.path.isdir(images_dir):
+        print(f"⚠️ Skipping {split}: no images/labels folders")
+        return Counter()
 
-        label_path = os.path.join(labels_dir, label_file)
-        base_name = label_file.replace(".txt","")
+    print(f"\nProcessing {split} dataset...")
 
-        # Find image
-        image_path = None
-        for ext in image_exts:
-            temp = os.path.join(images_dir, base_name + ext)
-            if os.path.exists(temp):
-                image_path = temp
-                break
+    image_index = index_images(images_dir)
 
-        if image_path is None:
-            continue
+    jobs = []
+    missing = 0
 
-        with open(label_path) as f:
-            line = f.readline().strip()
+    with os.scandir(labels_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt"):
+                continue
+            image_path = image_index.get(entry.name[:-len(".txt")])
+            if image_path is None:
+                missing += 1
+                continue
+            jobs.append((image_path, entry.path))
 
-        # NORMAL IMAGE
-        if not line:
-            shutil.copy(image_path,
-                os.path.join(detect_path,"normal",os.path.basename(image_path)))
-            continue
+    counts = Counter()
+
+    for actions in executor.map(lambda job: convert_image(*job, link, multi_object), jobs):
+        for detect_class, classify_class, action in actions:
+            if detect_class:
+                counts[("detection", detect_class)] += 1
+            if classify_class:
+                counts[("classification", classify_class)] += 1
+            counts[("files", action)] += 1
+
+    counts[("files", "missing image")] += missing
+
+    print(f"  {len(jobs)} images, "
+          f"{counts[('detection', 'normal')]} normal / {counts[('detection', 'fracture')]} fracture")
+
+    return counts
+
+
+def report(counts):
+
+    for group in ["detection", "classification", "files"]:
+        print(f"\n{group.capitalize()}:")
+        for (g, name), count in sorted(counts.items()):
+            if g == group and count:
+                print(f"  {name:<20} {count}")
+
+
+def main():
+
+    global dataset_path, detect_path, classify_path
+
+    parser = argparse.ArgumentParser(
+        description="Build dataset_detection/ and dataset_classification/ from the YOLO export"
+    )
+    parser.add_argument("--source", default=dataset_path, help="YOLO dataset root")
+    parser.add_argument("--detect-dir", default=detect_path)
+    parser.add_argument("--classify-dir", default=classify_path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="Parallel file workers")
+    parser.add_argument("--link", choices=["hardlink", "symlink", "copy"], default="hardlink",
+                        help="How images are placed; links fall back to copies when unsupported")
+    parser.add_argument("--multi-object", choices=["majority", "all"], default="majority",
+                        help="Fracture class for multi-object labels: the most frequent one, "
+                             "or every class present")
+    args = parser.parse_args()
+
+    dataset_path = args.source
+    detect_path = args.detect_dir
+    classify_path = args.classify_dir
+
+    os.makedirs(detect_path, exist_ok=True)
+    os.makedirs(classify_path, exist_ok=True)
+
+    for c in detect_classes:
+        os.makedirs(os.path.join(detect_path, c), exist_ok=True)
+
+    for c in classify_classes:
+        os.makedirs(os.path.join(classify_path, c), exist_ok=True)
+
+    counts = Counter()
 
-        # FRACTURE IMAGE
-        class_id = int(line.split()[0])
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for split in splits:
+            counts += convert_split(split, executor, args.link, args.multi_object)
 
-        shutil.copy(image_path,
-            os.path.join(detect_path,"fracture",os.path.basename(image_path)))
+    report(counts)
 
-        fracture_type = class_mapping[class_id]
+    print("\n✅ Dual dataset creation completed!")
 
-        shutil.copy(image_path,
-            os.path.join(classify_path,fracture_type,os.path.basename(image_path)))
 
-print("\n✅ Dual dataset creation completed!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+tf.data input pipeline for the training scripts
+
+Drop-in replacement for ImageDataGenerator.flow_from_directory:
+    - same class indices (sorted class folder names)
+    - same validation split (the first `validation_split` of each class's
+      sorted file list is validation, the rest is training)
+    - one-hot labels, images rescaled to [0, 1]
+
+It can also read a manifest written by build_manifest.py instead of a
+class-folder tree; the train/valid split then comes from the manifest.
+
+Decoding runs in parallel, decoded 224x224 images are cached as uint8 (in
+memory or on disk), augmentation runs as vectorized Keras layers on whole
+batches and batches are prefetched while the model trains.
+"""
+
+import csv
+import json
+import os
+
+import tensorflow as tf
+from tensorflow.keras import layers
+
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Same formats flow_from_directory accepts
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".ppm", ".tif", ".tiff")
+
+
+# ---------------------------------------------
+# FILE LISTING AND SPLIT
+# ---------------------------------------------
+def list_class_files(dataset_path):
+
+    classes = sorted(
+        d for d in os.listdir(dataset_path)
+        if os.path.isdir(os.path.join(dataset_path, d))
+    )
+    class_indices = {name: i for i, name in enumerate(classes)}
+
+    files = {}
+    for name in classes:
+        class_files = []
+        class_dir = os.path.join(dataset_path, name)
+        for root, _, fnames in sorted(os.walk(class_dir), key=lambda x: x[0]):
+            for fname in sorted(fnames):
+                if fname.lower().endswith(IMAGE_EXTS):
+                    class_files.append(os.path.join(root, fname))
+        files[name] = class_files
+
+    return class_indices, files
+
+
+def split_files(dataset_path, validation_split=0.2):
+
+    class_indices, files = list_class_files(dataset_path)
+
+    train, val = ([], []), ([], [])
+
+    for name, class_files in files.items():
+
+        # Matches flow_from_directory(subset=...) split boundaries
+        n_val = int(validation_split * len(class_files))
+
+        val[0].extend(class_files[:n_val])
+        val[1].extend([class_indices[name]] * n_val)
+
+        train[0].extend(class_files[n_val:])
+        train[1].extend([class_indices[name]] * (len(class_files) - n_val))
+
+    return train, val, class_indices
+
+
+# ---------------------------------------------
+# MANIFEST
+# ---------------------------------------------
+MANIFEST_LABELS = {
+    "detection": "detection_label",
+    "classification": "fracture_class"
+}
+
+
+def read_manifest(manifest_path):
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, newline="") as f:
+        if manifest_path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    for row in rows:
+        row["image_path"] = os.path.join(base_dir, row["image_path"])
+        if isinstance(row.get("boxes"), str):
+            row["boxes"] = json.loads(row["boxes"] or "[]")
+
+    return rows
+
+
+def split_manifest(manifest_path, task, train_split="train", val_split="valid"):
+
+    label_field = MANIFEST_LABELS[task]
+
+    # Classification only trains on fracture images
+    rows = [r for r in read_manifest(manifest_path) if r[label_field]]
+
+    classes = sorted({r[label_field] for r in rows})
+    class_indices = {name: i for i, name in enumerate(classes)}
+
+    def subset(split):
+        chosen = [r for r in rows if r["split"] == split]
+        return (
+            [r["image_path"] for r in chosen],
+            [class_indices[r[label_field]] for r in chosen]
+        )
+
+    return subset(train_split), subset(val_split), class_indices
+
+
+def load_splits(source, validation_split=0.2, task=None):
+
+    # A manifest file carries its own splits, a folder is split per class
+    if os.path.isfile(source):
+        if task not in MANIFEST_LABELS:
+            raise ValueError(f"Manifest input needs task in {sorted(MANIFEST_LABELS)}")
+        return split_manifest(source, task)
+
+    return split_files(source, validation_split)
+
+
+# ---------------------------------------------
+# DATASETS
+# ---------------------------------------------
+def build_augmentation(rotation_range=0, zoom_range=0.0, horizontal_flip=False):
+
+    # Vectorized equivalents of the ImageDataGenerator options
+    augment = []
+
+    if horizontal_flip:
+        augment.append(layers.RandomFlip("horizontal"))
+    if rotation_range:
+        augment.append(layers.RandomRotation(rotation_range / 360.0, fill_mode="nearest"))
+    if zoom_range:
+        augment.append(layers.RandomZoom(zoom_range, fill_mode="nearest"))
+
+    return tf.keras.Sequential(augment) if augment else None
+
+
+def decode_image(path, img_size=(224, 224)):
+
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, img_size)
+
+    # uint8 keeps the cache at a quarter of the float32 size
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+def build_dataset(paths, labels, num_classes, img_size=(224, 224), batch_size=16,
+                  cache="memory", shuffle=False, augmentation=None, seed=None):
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+
+    ds = ds.map(
+        lambda path, label: (decode_image(path, img_size), tf.one_hot(label, num_classes)),
+        num_parallel_calls=AUTOTUNE
+    )
+
+    # "memory" caches in RAM, any other string is an on-disk cache prefix
+    if cache == "memory":
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(cache)
+
+    if shuffle:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y), num_parallel_calls=AUTOTUNE)
+
+    if augmentation is not None:
+        ds = ds.map(
+            lambda x, y: (augmentation(x, training=True), y),
+            num_parallel_calls=AUTOTUNE
+        )
+
+    return ds.prefetch(AUTOTUNE)
+
+
+def make_datasets(dataset_path, img_size=(224, 224), batch_size=16, validation_split=0.2,
+                  cache="memory", augmentation=None, seed=None, task=None):
+
+    (train_paths, train_labels), (val_paths, val_labels), class_indices = load_splits(
+        dataset_path, validation_split, task
+    )
+    num_classes = len(class_indices)
+
+    def cache_for(subset):
+        if cache and cache != "memory":
+            os.makedirs(cache, exist_ok=True)
+            return os.path.join(cache, subset)
+        return cache
+
+    train_data = build_dataset(
+        train_paths, train_labels, num_classes, img_size, batch_size,
+        cache=cache_for("train"), shuffle=True, augmentation=augmentation, seed=seed
+    )
+    val_data = build_dataset(
+        val_paths, val_labels, num_classes, img_size, batch_size,
+        cache=cache_for("val")
+    )
+
+    print(f"Found {len(train_paths)} training and {len(val_paths)} validation images "
+          f"belonging to {num_classes} classes.")
+
+    return train_data, val_data, class_indices
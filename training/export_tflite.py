@@ -0,0 +1,249 @@
+"""
+Export trained Keras models to TFLite for the lightweight deployment backend
+
+Produces two variants next to each .h5 model:
+    <name>.fp16.tflite  - float16 weights
+    <name>.int8.tflite  - int8 dynamic-range quantized weights
+
+With --evaluate, each variant is compared against the .h5 model on a labeled
+folder (one sub-folder per class) for latency, peak memory, accuracy and
+agreement with the .h5 model's predictions.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "deployment"))
+
+from utils.memory import peak_rss_mb, reset_peak_rss
+
+
+VARIANTS = ["fp16", "int8"]
+
+IMG_SIZE = (224, 224)
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+
+# ---------------------------------------------
+# EXPORT
+# ---------------------------------------------
+def tflite_path(model_path, variant):
+    return os.path.splitext(model_path)[0] + f".{variant}.tflite"
+
+
+def export_model(model_path, variants=VARIANTS):
+
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    outputs = []
+
+    for variant in variants:
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        # Without supported_types the DEFAULT optimization is int8
+        # dynamic-range quantization of the weights
+        if variant == "fp16":
+            converter.target_spec.supported_types = [tf.float16]
+
+        output_path = tflite_path(model_path, variant)
+        with open(output_path, "wb") as f:
+            f.write(converter.convert())
+
+        size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        print(f"✅ {output_path} ({size_mb:.1f} MB)")
+        outputs.append(output_path)
+
+    return outputs
+
+
+# ---------------------------------------------
+# EVALUATION
+# ---------------------------------------------
+def load_labeled_images(data_dir, class_indices):
+
+    samples = []
+
+    for class_name, class_idx in sorted(class_indices.items()):
+
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+
+        for fname in sorted(os.listdir(class_dir)):
+            if fname.lower().endswith(IMAGE_EXTS):
+                samples.append((os.path.join(class_dir, fname), class_idx))
+
+    return samples
+
+
+def preprocess(image_path):
+
+    # Same preprocessing as FracturePredictor.preprocess_image
+    from utils.preprocess import load_image_array
+    return load_image_array(image_path, IMG_SIZE)
+
+
+def _evaluate_variant(model_path, samples, result_queue):
+
+    labels = np.array([label for _, label in samples])
+
+    reset_peak_rss()
+    start = time.perf_counter()
+
+    if model_path.endswith(".tflite"):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        interpreter = Interpreter(model_path=model_path)
+        interpreter.allocate_tensors()
+        input_index = interpreter.get_input_details()[0]["index"]
+        output_index = interpreter.get_output_details()[0]["index"]
+
+        def run(x):
+            interpreter.set_tensor(input_index, x)
+            interpreter.invoke()
+            return interpreter.get_tensor(output_index)
+    else:
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(model_path)
+
+        def run(x):
+            return model(x, training=False).numpy()
+
+    run(preprocess(samples[0][0]))
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    predictions = []
+
+    for image_path, label in samples:
+
+        x = preprocess(image_path)
+
+        t0 = time.perf_counter()
+        pred = run(x)
+        latencies.append(time.perf_counter() - t0)
+
+        predictions.append(int(np.argmax(pred)))
+
+    result_queue.put({
+        "model": os.path.basename(model_path),
+        "size_mb": round(os.path.getsize(model_path) / (1024 * 1024), 2),
+        "load_seconds": round(load_seconds, 3),
+        "latency_ms_p50": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "accuracy": round(float(np.mean(np.array(predictions) == labels)), 4),
+        "predictions": predictions
+    })
+
+
+def evaluate(model_path, data_dir, classes_path, variants=VARIANTS):
+
+    with open(classes_path) as f:
+        class_indices = json.load(f)
+
+    samples = load_labeled_images(data_dir, class_indices)
+    if not samples:
+        raise SystemExit(f"No labeled images found in {data_dir}")
+
+    print(f"\nEvaluating on {len(samples)} images from {data_dir}")
+
+    # Each variant runs in a fresh process so peak RSS is not shared
+    ctx = multiprocessing.get_context("spawn")
+    candidates = [model_path] + [tflite_path(model_path, v) for v in variants]
+    results = []
+
+    for candidate in candidates:
+
+        result_queue = ctx.Queue()
+        proc = ctx.Process(
+            target=_evaluate_variant, args=(candidate, samples, result_queue)
+        )
+        proc.start()
+        results.append(result_queue.get())
+        proc.join()
+
+    # Share of images where the variant picks the same class as the .h5
+    # model; unlike accuracy this isolates the quantization error
+    reference = np.array(results[0]["predictions"])
+    for r in results:
+        r["agreement"] = round(float(np.mean(np.array(r.pop("predictions")) == reference)), 4)
+
+    print("\n| Model | Size (MB) | Load (s) | p50 (ms) | p95 (ms) | Peak RSS (MB) | Accuracy | Agreement |")
+    print("|-------|-----------|----------|----------|----------|---------------|----------|-----------|")
+    for r in results:
+        print(
+            f"| {r['model']} | {r['size_mb']} | {r['load_seconds']} | "
+            f"{r['latency_ms_p50']} | {r['latency_ms_p95']} | "
+            f"{r['peak_rss_mb']} | {r['accuracy']:.2%} | {r['agreement']:.2%} |"
+        )
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Export FractureSense models to float16 / int8 TFLite"
+    )
+    parser.add_argument(
+        "models",
+        nargs="*",
+        default=["fracture_detection_model.h5", "fracture_classification_model.h5"],
+        help="Keras .h5 models to export"
+    )
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        choices=VARIANTS,
+        default=VARIANTS,
+        help="TFLite variants to produce"
+    )
+    parser.add_argument(
+        "--evaluate",
+        metavar="DATA_DIR",
+        help="Labeled folder (one sub-folder per class) to compare against the .h5 model"
+    )
+    parser.add_argument(
+        "--classes",
+        help="Class index JSON for --evaluate (e.g. detect_classes.json)"
+    )
+    parser.add_argument(
+        "--report",
+        help="Write the evaluation results to this JSON file"
+    )
+
+    args = parser.parse_args()
+
+    for model_path in args.models:
+        export_model(model_path, args.variants)
+
+    if args.evaluate:
+
+        if len(args.models) != 1 or not args.classes:
+            parser.error("--evaluate needs exactly one model and --classes")
+
+        results = evaluate(args.models[0], args.evaluate, args.classes, args.variants)
+
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\n✅ Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Frozen-backbone feature store for fast head training
+
+Both models use an ImageNet MobileNetV2 with `trainable=False`, so its output
+for a given image never changes during training. This runs the backbone once
+per image and stores the pooled 1280-d embeddings and labels as
+memory-mapped .npy files:
+
+    <store>/meta.json
+    <store>/train_features.npy   <store>/train_labels.npy
+    <store>/val_features.npy     <store>/val_labels.npy
+
+The dense heads are then trained from the store in seconds and re-attached to
+the backbone, so the saved .h5 has the same layout as a full training run.
+Augmentation is approximated by a fixed number of augmented copies of every
+training image.
+"""
+
+import json
+import os
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+from tensorflow.keras.applications import MobileNetV2
+
+from data_pipeline import build_dataset, load_splits
+
+
+STORE_DTYPE = np.float16
+
+
+def build_backbone(img_size=(224, 224)):
+
+    base_model = MobileNetV2(input_shape=img_size + (3,),
+                             include_top=False,
+                             weights='imagenet')
+    base_model.trainable = False
+
+    return base_model
+
+
+# ---------------------------------------------
+# EXTRACTION
+# ---------------------------------------------
+def _extract_subset(backbone, paths, labels, num_classes, store_dir, subset,
+                    img_size, batch_size, copies, augmentation):
+
+    feature_dim = backbone.output_shape[-1]
+    total = len(paths) * copies
+
+    features = np.lib.format.open_memmap(
+        os.path.join(store_dir, f"{subset}_features.npy"),
+        mode="w+", dtype=STORE_DTYPE, shape=(total, feature_dim)
+    )
+    np.save(os.path.join(store_dir, f"{subset}_labels.npy"),
+            np.tile(np.asarray(labels, dtype=np.int32), copies))
+
+    @tf.function
+    def embed(x):
+        return tf.reduce_mean(backbone(x, training=False), axis=[1, 2])
+
+    row = 0
+
+    for copy in range(copies):
+
+        # Copy 0 is always the un-augmented image
+        ds = build_dataset(
+            paths, labels, num_classes, img_size, batch_size, cache=None,
+            augmentation=augmentation if copy > 0 else None
+        )
+
+        for x, _ in ds:
+            batch = embed(x).numpy()
+            features[row:row + len(batch)] = batch
+            row += len(batch)
+
+        print(f"  {subset}: copy {copy + 1}/{copies} done ({row}/{total})")
+
+    features.flush()
+
+
+def build_store(dataset_path, store_dir, img_size=(224, 224), batch_size=64,
+                validation_split=0.2, augmentation=None, augmented_copies=0,
+                rebuild=False, task=None):
+
+    meta_path = os.path.join(store_dir, "meta.json")
+
+    if os.path.exists(meta_path) and not rebuild:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        print(f"✅ Using feature store {store_dir} "
+              f"({meta['train_count']} train / {meta['val_count']} val rows)")
+        return meta["class_indices"]
+
+    os.makedirs(store_dir, exist_ok=True)
+
+    (train_paths, train_labels), (val_paths, val_labels), class_indices = load_splits(
+        dataset_path, validation_split, task
+    )
+    num_classes = len(class_indices)
+
+    backbone = build_backbone(img_size)
+    train_copies = 1 + (augmented_copies if augmentation is not None else 0)
+
+    print(f"Extracting features for {len(train_paths)} training and "
+          f"{len(val_paths)} validation images...")
+
+    _extract_subset(backbone, train_paths, train_labels, num_classes, store_dir,
+                    "train", img_size, batch_size, train_copies, augmentation)
+    _extract_subset(backbone, val_paths, val_labels, num_classes, store_dir,
+                    "val", img_size, batch_size, 1, None)
+
+    meta = {
+        "class_indices": class_indices,
+        "feature_dim": int(backbone.output_shape[-1]),
+        "img_size": list(img_size),
+        "train_count": len(train_paths) * train_copies,
+        "val_count": len(val_paths),
+        "augmented_copies": train_copies - 1,
+        "backbone": "MobileNetV2/imagenet"
+    }
+
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+    print(f"✅ Feature store written to {store_dir}")
+
+    return class_indices
+
+
+# ---------------------------------------------
+# HEAD TRAINING
+# ---------------------------------------------
+def load_store(store_dir, subset):
+
+    features = np.load(os.path.join(store_dir, f"{subset}_features.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(store_dir, f"{subset}_labels.npy"))
+
+    return features, labels
+
+
+def train_head(store_dir, head_layers, epochs=10, batch_size=16, optimizer='adam', callbacks=None):
+
+    with open(os.path.join(store_dir, "meta.json")) as f:
+        meta = json.load(f)
+
+    num_classes = len(meta["class_indices"])
+
+    def dataset(subset, shuffle):
+        features, labels = load_store(store_dir, subset)
+        ds = tf.data.Dataset.from_tensor_slices(
+            (features.astype(np.float32), tf.one_hot(labels, num_classes))
+        )
+        if shuffle:
+            ds = ds.shuffle(len(labels), reshuffle_each_iteration=True)
+        return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    head = models.Sequential([layers.Input(shape=(meta["feature_dim"],))] + head_layers)
+
+    head.compile(optimizer=optimizer,
+                 loss='categorical_crossentropy',
+                 metrics=['accuracy'])
+
+    head.fit(dataset("train", True), validation_data=dataset("val", False),
+             epochs=epochs, callbacks=callbacks)
+
+    return assemble_model(head, tuple(meta["img_size"]))
+
+
+def assemble_model(head, img_size=(224, 224)):
+
+    # Same layout as the full training run: [MobileNetV2, GAP, head...]
+    model = models.Sequential(
+        [build_backbone(img_size), layers.GlobalAveragePooling2D()] + head.layers
+    )
+    model.build((None,) + img_size + (3,))
+
+    model.compile(optimizer='adam',
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'])
+
+    return model
@@ -1,79 +1,117 @@
 """
 Test Image Generator for FractureSense AI
 Generates sample X-ray-like test images for testing the system
+
+Images are drawn with NumPy from a seeded generator, so the same seed always
+produces the same images. Besides the small test suite it can write large
+YOLO-format datasets ({split}/images, {split}/labels) for load tests and for
+smoke-testing convert_dataset.py and the training scripts.
 """
 
-from PIL import Image, ImageDraw, ImageFont
-import random
+from PIL import Image, ImageDraw
+from multiprocessing import Pool
+import argparse
+import numpy as np
 import os
 
+from convert_dataset import class_mapping
+
+
+# Noise density of the original 1000 points on a 400x400 image
+NOISE_DENSITY = 1000 / (400 * 400)
+
+SPLITS = {"train": 0.8, "valid": 0.1, "test": 0.1}
+
+
+def render_xray(size=(400, 400), has_fracture=True, rng=None):
+    """
+    Draw a synthetic X-ray
+
+    Args:
+        size: (width, height) in pixels
+        has_fracture: Whether to draw a fracture line
+        rng: numpy Generator (a fresh unseeded one if None)
+
+    Returns:
+        (PIL 'L' image, fracture box as (cx, cy, w, h) normalized, or None)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    width, height = size
+
+    # Dark background with a bone-like ellipse, slightly jittered per image
+    cx = width * rng.uniform(0.45, 0.55)
+    cy = height * rng.uniform(0.45, 0.55)
+    rx = width * rng.uniform(0.2, 0.3)
+    ry = height * rng.uniform(0.33, 0.42)
+
+    yy, xx = np.ogrid[0:height, 0:width]
+    dist = ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2
+
+    pixels = np.full((height, width), 40, dtype=np.uint8)
+    pixels[dist <= 1.0] = 200
+    pixels[(dist > 0.97) & (dist <= 1.0)] = 220
+
+    # Sparse dark noise points, same density as the original point loop
+    noise = rng.random((height, width)) < NOISE_DENSITY
+    pixels[noise] = rng.integers(30, 61, size=int(noise.sum()), dtype=np.uint8)
+
+    img = Image.fromarray(pixels, mode="L")
+    box = None
 
-def generate_test_xray(filename="test_xray.png", has_fracture=True):
+    if has_fracture:
+        # Jagged fracture line inside the bone, scaled to the resolution
+        scale = min(width, height) / 400
+        points = [(cx + rx * rng.uniform(-0.8, -0.5), cy - ry * rng.uniform(0.5, 0.7))]
+        for _ in range(8):
+            points.append((
+                points[-1][0] + rng.uniform(-15, 15) * scale,
+                points[-1][1] + rng.uniform(20, 35) * scale
+            ))
+
+        draw = ImageDraw.Draw(img)
+        draw.line(points, fill=80, width=max(3, round(3 * scale)), joint="curve")
+
+        xs, ys = zip(*points)
+        pad = 5 * scale
+        x0, x1 = max(min(xs) - pad, 0), min(max(xs) + pad, width)
+        y0, y1 = max(min(ys) - pad, 0), min(max(ys) + pad, height)
+        box = ((x0 + x1) / 2 / width, (y0 + y1) / 2 / height,
+               (x1 - x0) / width, (y1 - y0) / height)
+
+    return img, box
+
+
+def generate_test_xray(filename="test_xray.png", has_fracture=True, size=(400, 400), seed=None):
     """
     Generate a simple test X-ray image
-    
+
     Args:
         filename: Output filename
         has_fracture: Whether to draw a fracture line
+        size: (width, height) in pixels
+        seed: Random seed for a reproducible image
     """
-    # Create a grayscale image (typical X-ray appearance)
-    width, height = 400, 400
-    img = Image.new('L', (width, height), color=40)  # Dark background
-    draw = ImageDraw.Draw(img)
-    
-    # Draw a bone-like structure (ellipse)
-    bone_color = 200  # Light gray (bone appears light in X-rays)
-    draw.ellipse([100, 50, 300, 350], fill=bone_color, outline=220)
-    
-    # Add some texture/noise to make it look more realistic
-    for _ in range(1000):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        noise = random.randint(30, 60)
-        draw.point((x, y), fill=noise)
-    
-    # Draw fracture if requested
-    if has_fracture:
-        # Draw a jagged fracture line
-        fracture_color = 80  # Darker line
-        start_x = random.randint(120, 150)
-        start_y = random.randint(100, 150)
-        
-        # Create zigzag fracture line
-        points = [(start_x, start_y)]
-        for i in range(8):
-            x_offset = random.randint(-15, 15)
-            y_offset = random.randint(20, 35)
-            new_x = points[-1][0] + x_offset
-            new_y = points[-1][1] + y_offset
-            points.append((new_x, new_y))
-        
-        # Draw the fracture
-        for i in range(len(points) - 1):
-            draw.line([points[i], points[i + 1]], fill=fracture_color, width=3)
-    
+    img, _ = render_xray(size, has_fracture, np.random.default_rng(seed))
+
     # Add label
-    try:
-        label = "TEST X-RAY - " + ("FRACTURE" if has_fracture else "NO FRACTURE")
-        draw.text((10, 10), label, fill=220)
-    except:
-        pass  # Skip if font not available
-    
+    label = "TEST X-RAY - " + ("FRACTURE" if has_fracture else "NO FRACTURE")
+    ImageDraw.Draw(img).text((10, 10), label, fill=220)
+
     # Save image
     img.save(filename)
     print(f"✓ Generated test image: {filename}")
 
 
-def generate_test_suite():
+def generate_test_suite(seed=0):
     """
     Generate a complete suite of test images
     """
     # Create test_images folder
     os.makedirs('test_images', exist_ok=True)
-    
+
     print("Generating test X-ray images...")
     print("=" * 50)
-    
+
     # Generate various test cases
     test_cases = [
         ("test_images/no_fracture_1.png", False),
@@ -83,18 +121,138 @@ def generate_test_suite():
         ("test_images/simple_fracture_1.png", True),
         ("test_images/simple_fracture_2.png", True),
     ]
-    
-    for filename, has_fracture in test_cases:
-        generate_test_xray(filename, has_fracture)
-    
+
+    for i, (filename, has_fracture) in enumerate(test_cases):
+        generate_test_xray(filename, has_fracture, seed=None if seed is None else seed + i)
+
     print("=" * 50)
     print(f"✓ Generated {len(test_cases)} test images")
     print(f"✓ Images saved in 'test_images/' folder")
     print("\nYou can now use these images to test the application!")
 
 
-if __name__ == "__main__":
+# ---------------------------------------------
+# YOLO DATASET
+# ---------------------------------------------
+def plan_dataset(count, seed, fracture_ratio=0.5, class_weights=None, splits=SPLITS):
+    """
+    Decide split, fracture and class for every image up front, so the
+    dataset is identical whatever the number of workers
+
+    Returns:
+        List of (index, split, class_id or None)
+    """
+    rng = np.random.default_rng(seed)
+
+    class_ids = sorted(class_mapping)
+    weights = np.asarray(class_weights or [1.0] * len(class_ids), dtype=np.float64)
+    if len(weights) != len(class_ids):
+        raise ValueError(f"Expected {len(class_ids)} class weights, got {len(weights)}")
+    weights = weights / weights.sum()
+
+    names = list(splits)
+    split_probs = np.asarray([splits[n] for n in names], dtype=np.float64)
+    split_probs = split_probs / split_probs.sum()
+
+    split_idx = rng.choice(len(names), size=count, p=split_probs)
+    fractured = rng.random(count) < fracture_ratio
+    classes = rng.choice(class_ids, size=count, p=weights)
+
+    return [
+        (i, names[split_idx[i]], int(classes[i]) if fractured[i] else None)
+        for i in range(count)
+    ]
+
+
+def _write_sample(job):
+
+    (index, split, class_id), output, size, seed, ext = job
+
+    # Per-image seed: the image does not depend on which worker draws it
+    rng = np.random.default_rng([seed, index])
+    img, box = render_xray(size, class_id is not None, rng)
+
+    name = f"xray_{index:06d}"
+    img.save(os.path.join(output, split, "images", f"{name}.{ext}"))
+
+    with open(os.path.join(output, split, "labels", f"{name}.txt"), "w") as f:
+        if box is not None:
+            f.write(f"{class_id} {box[0]:.6f} {box[1]:.6f} {box[2]:.6f} {box[3]:.6f}\n")
+
+    return split, class_id
+
+
+def generate_dataset(output, count, size=(400, 400), seed=0, fracture_ratio=0.5,
+                     class_weights=None, splits=SPLITS, workers=None, ext="jpg"):
+    """
+    Write a YOLO-format dataset: {output}/{split}/images and {split}/labels
+
+    Returns:
+        {split: {"normal": n, class_id: n, ...}}
+    """
+    for split in splits:
+        os.makedirs(os.path.join(output, split, "images"), exist_ok=True)
+        os.makedirs(os.path.join(output, split, "labels"), exist_ok=True)
+
+    plan = plan_dataset(count, seed, fracture_ratio, class_weights, splits)
+    jobs = [(sample, output, size, seed, ext) for sample in plan]
+
+    counts = {split: {} for split in splits}
+    chunksize = max(1, count // ((workers or os.cpu_count() or 1) * 8))
+
+    with Pool(workers) as pool:
+        for split, class_id in pool.imap_unordered(_write_sample, jobs, chunksize=chunksize):
+            key = "normal" if class_id is None else class_mapping[class_id]
+            counts[split][key] = counts[split].get(key, 0) + 1
+
+    return counts
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Generate synthetic X-ray test images")
+    parser.add_argument("--dataset", metavar="DIR",
+                        help="Write a YOLO dataset here instead of the small test suite")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--size", type=int, nargs=2, default=[400, 400], metavar=("W", "H"),
+                        help="Image size, e.g. 2500 3000 for radiograph-sized images")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fracture-ratio", type=float, default=0.5)
+    parser.add_argument("--class-weights", type=float, nargs=len(class_mapping),
+                        help="Relative frequency of each YOLO fracture class id")
+    parser.add_argument("--splits", type=float, nargs=3, default=list(SPLITS.values()),
+                        metavar=("TRAIN", "VALID", "TEST"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=["jpg", "png"], default="jpg")
+    args = parser.parse_args()
+
     print("=" * 50)
     print("FractureSense AI - Test Image Generator")
     print("=" * 50)
-    generate_test_suite()
+
+    if not args.dataset:
+        generate_test_suite(args.seed)
+        return
+
+    counts = generate_dataset(
+        args.dataset,
+        args.count,
+        size=tuple(args.size),
+        seed=args.seed,
+        fracture_ratio=args.fracture_ratio,
+        class_weights=args.class_weights,
+        splits=dict(zip(SPLITS, args.splits)),
+        workers=args.workers,
+        ext=args.format
+    )
+
+    for split, split_counts in counts.items():
+        print(f"\n{split}:")
+        for name, n in sorted(split_counts.items()):
+            print(f"  {name:<20} {n}")
+
+    print(f"\n✓ Generated {args.count} images in '{args.dataset}'")
+
+
+if __name__ == "__main__":
+    main()
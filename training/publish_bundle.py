@@ -0,0 +1,160 @@
+"""
+Publish trained models as a versioned bundle for the API's model registry
+
+Copies the .h5 models, any exported .tflite variants and the class maps into
+<registry>/<version>/ with a bundle.json. The bundle is written to a hidden
+folder and renamed into place, so the API never sees a half-copied bundle.
+A running server picks it up on its next registry poll (MODEL_POLL_SECONDS).
+
+    python publish_bundle.py --registry ../deployment/model/registry --version v3
+    python publish_bundle.py --registry ../deployment/model/registry --version v3 --weight 10
+
+Without routing.json the newest bundle takes all traffic. --weight instead
+gives the new version that percentage of traffic, and the rest stays on the
+current versions (an A/B split). Use --weight 100 to move all traffic over.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+
+
+REQUIRED_FILES = [
+    "fracture_detection_model.h5",
+    "fracture_classification_model.h5",
+    "detect_classes.json",
+    "classify_classes.json",
+]
+
+BUNDLE_FILE = "bundle.json"
+ROUTING_FILE = "routing.json"
+
+
+def write_json_atomic(path, data):
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+
+    os.replace(tmp_path, path)
+
+
+def current_weights(registry):
+
+    path = os.path.join(registry, ROUTING_FILE)
+
+    if os.path.isfile(path):
+        with open(path) as f:
+            return json.load(f).get("weights", {})
+
+    # No routing.json: the server sends everything to the newest bundle
+    bundles = glob.glob(os.path.join(registry, "[!.]*", BUNDLE_FILE))
+    if not bundles:
+        return {}
+
+    newest = max(bundles, key=os.path.getmtime)
+    return {os.path.basename(os.path.dirname(newest)): 100}
+
+
+def split_weights(weights, version, weight):
+
+    # The other versions keep their relative shares of the remaining traffic
+    others = {v: w for v, w in weights.items() if v != version and w > 0}
+    total = sum(others.values())
+
+    split = {
+        v: round(w / total * (100 - weight), 2)
+        for v, w in others.items()
+    } if total else {}
+
+    if weight > 0:
+        split[version] = weight
+
+    return {v: w for v, w in split.items() if w > 0}
+
+
+def build_bundle(args, staging):
+
+    os.makedirs(staging)
+
+    files = [os.path.join(args.source, name) for name in REQUIRED_FILES]
+    files += sorted(glob.glob(os.path.join(args.source, "fracture_*_model.*.tflite")))
+
+    for path in files:
+        shutil.copy2(path, staging)
+
+    bundle = {
+        "version": args.version,
+        "img_size": args.img_size,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "description": args.description,
+        "files": sorted(os.path.basename(p) for p in files)
+    }
+    if args.gate_policy:
+        bundle["gate_policy"] = args.gate_policy
+    if args.gate_threshold is not None:
+        bundle["gate_threshold"] = args.gate_threshold
+
+    write_json_atomic(os.path.join(staging, BUNDLE_FILE), bundle)
+
+    return bundle
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Publish a model bundle to the registry")
+    parser.add_argument("--registry", required=True, help="Registry folder served by the API (MODEL_DIR)")
+    parser.add_argument("--version", required=True, help="Version name, e.g. v3")
+    parser.add_argument("--source", default=".", help="Folder with the trained models and class maps")
+    parser.add_argument("--img-size", type=int, nargs=2, default=[224, 224], metavar=("W", "H"))
+    parser.add_argument("--description", default="")
+    parser.add_argument("--gate-policy", choices=["none", "skip", "uncertain", "tta"],
+                        help="Override GATE_POLICY for this version")
+    parser.add_argument("--gate-threshold", type=float,
+                        help="Override GATE_THRESHOLD for this version (see sweep_gating.py)")
+    parser.add_argument("--weight", type=float,
+                        help="Percentage of traffic for this version (updates routing.json)")
+    parser.add_argument("--force", action="store_true", help="Replace an existing version")
+    args = parser.parse_args()
+
+    missing = [n for n in REQUIRED_FILES if not os.path.isfile(os.path.join(args.source, n))]
+    if missing:
+        print(f"❌ Missing in '{args.source}': {', '.join(missing)}")
+        sys.exit(1)
+
+    os.makedirs(args.registry, exist_ok=True)
+
+    target = os.path.join(args.registry, args.version)
+    if os.path.exists(target) and not args.force:
+        print(f"❌ Version '{args.version}' already exists (use --force to replace it)")
+        sys.exit(1)
+
+    # Hidden while copying: the server skips dot-folders
+    staging = os.path.join(args.registry, f".{args.version}.{os.getpid()}")
+    bundle = build_bundle(args, staging)
+
+    # Routing first, so the bundle never briefly takes all traffic
+    if args.weight is not None:
+        weights = split_weights(current_weights(args.registry), args.version, args.weight)
+        write_json_atomic(os.path.join(args.registry, ROUTING_FILE), {"weights": weights})
+        print(f"✅ Routing: {weights}")
+    elif os.path.isfile(os.path.join(args.registry, ROUTING_FILE)):
+        print("⚠️ routing.json exists; the new version gets no traffic until it is listed there")
+
+    if os.path.exists(target):
+        retired = os.path.join(args.registry, f".{args.version}.retired.{os.getpid()}")
+        os.rename(target, retired)
+        os.rename(staging, target)
+        shutil.rmtree(retired)
+    else:
+        os.rename(staging, target)
+
+    print(f"✅ Published {args.version} to {target} ({len(bundle['files'])} files)")
+
+
+if __name__ == "__main__":
+    main()
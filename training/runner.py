@@ -0,0 +1,377 @@
+"""
+Shared training runner for train_detection.py and train_classification.py
+
+    - inter/intra-op thread pool sizes
+    - larger batches with linearly scaled learning rate
+    - optional bfloat16 mixed precision on CPUs with native bf16 support
+    - data-parallel training over N logical CPU devices (MirroredStrategy)
+    - checkpoint/resume across interruptions (BackupAndRestore)
+    - images/sec per epoch, so configurations can be compared
+    - two-phase training: head only, then the top MobileNetV2 blocks at a
+      low learning rate, with early stopping, LR decay on plateau and
+      best-checkpoint saving
+
+configure() must run before the first TensorFlow op, i.e. right after the
+arguments are parsed.
+"""
+
+import os
+import time
+
+import tensorflow as tf
+
+
+BASE_BATCH_SIZE = 16
+BASE_LEARNING_RATE = 1e-3
+
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16")
+
+# MobileNetV2 has inverted residual blocks block_1 .. block_16, then Conv_1
+MOBILENET_BLOCKS = 16
+
+# Filled by PhaseLog, printed by print_phase_summary()
+PHASES = []
+
+
+def add_runner_args(parser, epochs):
+
+    group = parser.add_argument_group("runner")
+    group.add_argument("--epochs", type=int, default=epochs)
+    group.add_argument("--batch-size", type=int, default=BASE_BATCH_SIZE)
+    group.add_argument("--learning-rate", type=float, default=None,
+                       help=f"Defaults to {BASE_LEARNING_RATE} scaled by batch-size/{BASE_BATCH_SIZE}")
+    group.add_argument("--inter-op-threads", type=int, default=0,
+                       help="Parallel independent ops (0 = TensorFlow default)")
+    group.add_argument("--intra-op-threads", type=int, default=0,
+                       help="Threads inside one op (0 = TensorFlow default)")
+    group.add_argument("--replicas", type=int, default=1,
+                       help="Data-parallel replicas over logical CPU devices")
+    group.add_argument("--mixed-precision", choices=["off", "auto", "bf16"], default="off",
+                       help="bfloat16 compute; 'auto' enables it only if the CPU supports bf16")
+    group.add_argument("--checkpoint-dir",
+                       help="Back up training state here every epoch and resume from it")
+
+    group.add_argument("--fine-tune-blocks", type=int, default=0,
+                       help=f"After head training, unfreeze the last N of {MOBILENET_BLOCKS} "
+                            "MobileNetV2 blocks and fine-tune them (0 = head only)")
+    group.add_argument("--fine-tune-epochs", type=int, default=10)
+    group.add_argument("--fine-tune-learning-rate", type=float, default=None,
+                       help="Defaults to 1/100 of the head learning rate")
+    group.add_argument("--patience", type=int, default=None,
+                       help="Early stopping patience on val_accuracy "
+                            "(default 3 with --fine-tune-blocks, otherwise off)")
+    group.add_argument("--target-accuracy", type=float, default=None,
+                       help="Stop a phase as soon as val_accuracy reaches this value")
+
+    return group
+
+
+# ---------------------------------------------
+# SETUP
+# ---------------------------------------------
+def cpu_supports_bf16():
+
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+
+    return any(flag in flags for flag in BF16_CPU_FLAGS)
+
+
+def configure(args):
+
+    tf.config.threading.set_inter_op_parallelism_threads(args.inter_op_threads)
+    tf.config.threading.set_intra_op_parallelism_threads(args.intra_op_threads)
+
+    if args.mixed_precision == "bf16" or (args.mixed_precision == "auto" and cpu_supports_bf16()):
+        tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+        print("✅ bfloat16 mixed precision enabled")
+    elif args.mixed_precision == "auto":
+        print("⚠️ CPU has no native bfloat16 support, training in float32")
+
+    if args.replicas > 1:
+        cpu = tf.config.list_physical_devices("CPU")[0]
+        tf.config.set_logical_device_configuration(
+            cpu, [tf.config.LogicalDeviceConfiguration()] * args.replicas
+        )
+        devices = [d.name for d in tf.config.list_logical_devices("CPU")]
+        strategy = tf.distribute.MirroredStrategy(devices=devices)
+        print(f"✅ Data-parallel training on {len(devices)} CPU replicas")
+    else:
+        strategy = tf.distribute.get_strategy()
+
+    return strategy
+
+
+def learning_rate(args):
+
+    if args.learning_rate is not None:
+        return args.learning_rate
+
+    # Linear scaling rule: keep the per-sample step size of the batch-16 runs
+    return BASE_LEARNING_RATE * args.batch_size / BASE_BATCH_SIZE
+
+
+def fine_tune_learning_rate(args):
+
+    if args.fine_tune_learning_rate is not None:
+        return args.fine_tune_learning_rate
+
+    return learning_rate(args) / 100
+
+
+def build_optimizer(args, lr=None):
+
+    return tf.keras.optimizers.Adam(learning_rate=lr or learning_rate(args))
+
+
+# ---------------------------------------------
+# TRAINING
+# ---------------------------------------------
+class ThroughputCallback(tf.keras.callbacks.Callback):
+
+    def __init__(self, batch_size):
+
+        super().__init__()
+        self.batch_size = batch_size
+        self.images_per_sec = []
+
+
+    def on_epoch_begin(self, epoch, logs=None):
+
+        self._steps = 0
+        self._start = time.perf_counter()
+
+
+    def on_train_batch_end(self, batch, logs=None):
+
+        self._steps += 1
+
+
+    def on_epoch_end(self, epoch, logs=None):
+
+        elapsed = time.perf_counter() - self._start
+        # Counts full batches, so the last partial batch is slightly over-counted
+        rate = self._steps * self.batch_size / elapsed
+        self.images_per_sec.append(rate)
+
+        if logs is not None:
+            logs["images_per_sec"] = rate
+
+        print(f"  {rate:.1f} images/sec")
+
+
+class PhaseLog(tf.keras.callbacks.Callback):
+
+    def __init__(self, phase):
+
+        super().__init__()
+        self.phase = phase
+
+
+    def on_train_begin(self, logs=None):
+
+        self._start = time.perf_counter()
+        self._epochs = 0
+        self._best = None
+
+
+    def on_epoch_end(self, epoch, logs=None):
+
+        self._epochs += 1
+        accuracy = (logs or {}).get("val_accuracy")
+        if accuracy is not None and (self._best is None or accuracy > self._best):
+            self._best = accuracy
+
+
+    def on_train_end(self, logs=None):
+
+        PHASES.append({
+            "phase": self.phase,
+            "epochs": self._epochs,
+            "seconds": time.perf_counter() - self._start,
+            "best_val_accuracy": self._best
+        })
+
+
+class BestWeights(tf.keras.callbacks.EarlyStopping):
+
+    # EarlyStopping only restores the best weights when it actually stops;
+    # this also restores them when the phase runs to its last epoch
+    def on_train_end(self, logs=None):
+
+        super().on_train_end(logs)
+
+        if self.stopped_epoch == 0 and self.best_weights is not None:
+            self.model.set_weights(self.best_weights)
+
+
+class TargetAccuracy(tf.keras.callbacks.Callback):
+
+    def __init__(self, target):
+
+        super().__init__()
+        self.target = target
+
+
+    def on_epoch_end(self, epoch, logs=None):
+
+        if (logs or {}).get("val_accuracy", 0) >= self.target:
+            print(f"  val_accuracy reached {self.target}, ending phase")
+            self.model.stop_training = True
+
+
+def patience(args):
+
+    if args.patience is not None:
+        return args.patience
+
+    return 3 if args.fine_tune_blocks else 0
+
+
+def runner_callbacks(args, name, phase="head"):
+
+    callbacks = [ThroughputCallback(args.batch_size), PhaseLog(phase)]
+
+    if args.checkpoint_dir:
+        callbacks.append(tf.keras.callbacks.BackupAndRestore(
+            os.path.join(args.checkpoint_dir, f"{name}_{phase}")
+        ))
+
+    if patience(args):
+        callbacks += [
+            BestWeights(monitor="val_accuracy", patience=patience(args),
+                        restore_best_weights=True, verbose=1),
+            tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.2,
+                                                 patience=max(1, patience(args) // 2),
+                                                 min_lr=1e-7, verbose=1),
+            tf.keras.callbacks.ModelCheckpoint(
+                os.path.join(args.checkpoint_dir or ".", f"{name}_{phase}_best.h5"),
+                monitor="val_accuracy", save_best_only=True, save_weights_only=True
+            )
+        ]
+
+    if args.target_accuracy:
+        callbacks.append(TargetAccuracy(args.target_accuracy))
+
+    return callbacks
+
+
+def fit(model, train_data, val_data, args, name, epochs=None, callbacks=None, phase="head"):
+
+    run_callbacks = runner_callbacks(args, name, phase) + list(callbacks or [])
+    throughput = run_callbacks[0]
+
+    start = time.perf_counter()
+    history = model.fit(train_data, validation_data=val_data,
+                        epochs=epochs or args.epochs, callbacks=run_callbacks)
+    elapsed = time.perf_counter() - start
+
+    report(throughput, elapsed)
+
+    return history
+
+
+def unfreeze_top_blocks(base_model, blocks):
+
+    first_block = MOBILENET_BLOCKS + 1 - blocks
+    base_model.trainable = True
+
+    for layer in base_model.layers:
+
+        if layer.name.startswith("block_"):
+            trainable = int(layer.name.split("_")[1]) >= first_block
+        else:
+            # Conv_1 / Conv_1_bn / out_relu sit on top of the last block
+            trainable = layer.name.startswith("Conv_1") or layer.name == "out_relu"
+
+        # Frozen BatchNorm keeps its ImageNet statistics and runs in inference mode
+        if isinstance(layer, tf.keras.layers.BatchNormalization):
+            trainable = False
+
+        layer.trainable = trainable
+
+    return sum(int(tf.size(w)) for w in base_model.trainable_weights)
+
+
+def fine_tune(model, train_data, val_data, args, name, strategy):
+
+    # model is [MobileNetV2, GAP, head...]
+    with strategy.scope():
+
+        trainable = unfreeze_top_blocks(model.layers[0], args.fine_tune_blocks)
+
+        model.compile(optimizer=build_optimizer(args, fine_tune_learning_rate(args)),
+                      loss='categorical_crossentropy',
+                      metrics=['accuracy'])
+
+    print(f"\nFine-tuning the last {args.fine_tune_blocks} backbone blocks "
+          f"({trainable:,} weights) at lr={fine_tune_learning_rate(args):g}")
+
+    return fit(model, train_data, val_data, args, name,
+               epochs=args.fine_tune_epochs, phase="fine-tune")
+
+
+def print_phase_summary():
+
+    if not PHASES:
+        return
+
+    print("\n| Phase | Epochs | Wall time (s) | Best val_accuracy |")
+    print("|-------|--------|---------------|-------------------|")
+    for p in PHASES:
+        accuracy = "-" if p["best_val_accuracy"] is None else f"{p['best_val_accuracy']:.4f}"
+        print(f"| {p['phase']} | {p['epochs']} | {p['seconds']:.1f} | {accuracy} |")
+
+
+def report(throughput, elapsed):
+
+    rates = throughput.images_per_sec
+    if not rates:
+        return
+
+    # The first epoch includes tracing and cache filling
+    steady = rates[1:] or rates
+    print(f"✅ Trained in {elapsed:.1f}s, {sum(steady) / len(steady):.1f} images/sec "
+          f"(steady state)")
+
+
+# ---------------------------------------------
+# SAVING
+# ---------------------------------------------
+def _float32_config(config):
+
+    if isinstance(config, dict):
+        if config.get("class_name") in ("Policy", "DTypePolicy"):
+            return "float32"
+        return {k: _float32_config(v) for k, v in config.items()}
+
+    if isinstance(config, list):
+        return [_float32_config(v) for v in config]
+
+    return config
+
+
+def to_float32(model):
+
+    # Mixed-precision layers keep float32 variables, only the compute dtype
+    # in the config changes, so the weights copy over unchanged
+    if tf.keras.mixed_precision.global_policy().name == "float32":
+        return model
+
+    config = _float32_config(model.get_config())
+
+    tf.keras.mixed_precision.set_global_policy("float32")
+    clone = model.__class__.from_config(config)
+    clone.set_weights(model.get_weights())
+    clone.compile(loss=model.loss, metrics=["accuracy"])
+
+    return clone
+
+
+def save_model(model, path):
+
+    # Deployment loads the .h5 in float32
+    to_float32(model).save(path)
@@ -0,0 +1,260 @@
+"""
+Confidence gate sweep for FractureSense AI
+
+Runs the deployed models once over a labeled hold-out set and keeps the raw
+detection and classification probabilities. With --tta-views it also keeps
+the TTA-averaged ones. Every gate policy is then replayed at every threshold
+offline, reporting:
+
+    - accuracy of the fracture/normal decision and of the final label
+    - coverage (share of images not answered "Uncertain")
+    - share of images that reach the classifier or are escalated to TTA
+    - estimated images/sec from the measured per-stage times
+
+The labeled input is either a manifest from build_manifest.py, with --split
+picking the hold-out split, or a folder with one subfolder per label:
+normal/ plus one per fracture class.
+
+    python training/sweep_gating.py --folder holdout/ --tta-views 4
+    python training/sweep_gating.py --manifest dataset/manifest.csv --split test --json gate.json
+
+The chosen policy and threshold go into GATE_POLICY / GATE_THRESHOLD.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from data_pipeline import list_class_files, read_manifest
+
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_DIR = os.path.join(REPO_DIR, "deployment")
+
+NORMAL = "normal"
+
+
+# ---------------------------------------------
+# LABELED INPUT
+# ---------------------------------------------
+def load_labeled(args):
+
+    # -> [(absolute image path, "normal" or fracture class name)]
+    if args.manifest:
+        return [
+            (row["image_path"],
+             row["fracture_class"] if row["detection_label"] != NORMAL else NORMAL)
+            for row in read_manifest(args.manifest)
+            if row["split"] == args.split
+        ]
+
+    _, files = list_class_files(args.folder)
+
+    return [
+        (os.path.abspath(path), name)
+        for name, class_files in files.items()
+        for path in class_files
+    ]
+
+
+# ---------------------------------------------
+# MODEL OUTPUTS
+# ---------------------------------------------
+def collect_outputs(predictor, paths, batch_size, tta_views):
+
+    from utils.tta import tta_batch
+
+    detect, classify = [], []
+    tta_detect, tta_classify = [], []
+    seconds = {"detect": 0.0, "classify": 0.0, "tta": 0.0}
+
+    for start in range(0, len(paths), batch_size):
+
+        # Multi-frame DICOM: the first frame stands for the file
+        batch = np.concatenate([
+            predictor.preprocess_image(path)[:1] for path in paths[start:start + batch_size]
+        ])
+
+        # Every row is classified here so any policy can be replayed; replay()
+        # charges the classify time only for the rows a policy classifies
+        outputs = predictor.stage_outputs(batch)
+        detect.append(outputs["detect"])
+        classify.append(outputs["classify"])
+        seconds["detect"] += outputs["seconds"]["detect"]
+        seconds["classify"] += outputs["seconds"]["classify"]
+
+        if tta_views:
+            views = predictor.stage_outputs(tta_batch(batch, tta_views))
+            view_detect = views["detect"].reshape(len(batch), tta_views, -1).mean(axis=1)
+            tta_detect.append(view_detect)
+            tta_classify.append(views["classify"].reshape(len(batch), tta_views, -1).mean(axis=1))
+
+            # The app only classifies the views of images TTA calls a fracture
+            positive = np.argmax(view_detect, axis=1) != predictor.detect_classes[NORMAL]
+            seconds["tta"] += views["seconds"]["detect"] + positive.mean() * views["seconds"]["classify"]
+
+        print(f"  {min(start + batch_size, len(paths))}/{len(paths)} images", end="\r")
+
+    print()
+
+    outputs = {
+        "detect": np.concatenate(detect),
+        "classify": np.concatenate(classify),
+        # Per-image cost of each stage
+        "seconds": {k: v / len(paths) for k, v in seconds.items()}
+    }
+
+    if tta_views:
+        outputs["tta_detect"] = np.concatenate(tta_detect)
+        outputs["tta_classify"] = np.concatenate(tta_classify)
+
+    return outputs
+
+
+def decisions(predictor, detect, classify):
+
+    normal_idx = predictor.detect_classes[NORMAL]
+
+    labels = np.array([predictor.classify_labels[i] for i in np.argmax(classify, axis=1)],
+                      dtype=object)
+    is_normal = np.argmax(detect, axis=1) == normal_idx
+
+    # Final label as the ungated pipeline would report it
+    return np.where(is_normal, NORMAL, labels), ~is_normal
+
+
+# ---------------------------------------------
+# POLICY REPLAY
+# ---------------------------------------------
+def replay(policy, threshold, truth, outputs, base, tta):
+
+    predicted, fracture = base
+    confidence = outputs["detect"].max(axis=1)
+    marginal = confidence < threshold if policy != "none" else np.zeros(len(truth), bool)
+
+    predicted = predicted.copy()
+    answered = np.ones(len(truth), bool)
+    classified = fracture.copy()
+    escalated = np.zeros(len(truth), bool)
+
+    if policy == "skip":
+        skipped = marginal & fracture
+        predicted[skipped] = "fracture (unclassified)"
+        classified &= ~skipped
+
+    elif policy == "uncertain":
+        answered = ~marginal
+        classified &= ~marginal
+
+    elif policy == "tta":
+        predicted[marginal] = tta[0][marginal]
+        classified &= ~marginal
+        escalated = marginal
+
+    truth_fracture = truth != NORMAL
+    predicted_fracture = predicted != NORMAL
+
+    covered = max(int(answered.sum()), 1)
+    seconds = outputs["seconds"]
+    cost = (seconds["detect"] + classified.mean() * seconds["classify"]
+            + escalated.mean() * seconds["tta"])
+
+    return {
+        "policy": policy,
+        "threshold": round(float(threshold), 3),
+        "coverage": float(answered.mean()),
+        "detection_accuracy": float((predicted_fracture == truth_fracture)[answered].sum() / covered),
+        "accuracy": float((predicted == truth)[answered].sum() / covered),
+        "classified": float(classified.mean()),
+        "escalated": float(escalated.mean()),
+        "images_per_sec": float(1 / cost) if cost > 0 else None
+    }
+
+
+def sweep(truth, outputs, base, tta, thresholds):
+
+    policies = ["skip", "uncertain"] + (["tta"] if tta is not None else [])
+
+    rows = [replay("none", 0.0, truth, outputs, base, tta)]
+    for policy in policies:
+        for threshold in thresholds:
+            rows.append(replay(policy, threshold, truth, outputs, base, tta))
+
+    return rows
+
+
+def print_sweep(rows):
+
+    print("\n| Policy | Threshold | Coverage | Detection acc | Accuracy | Classified | Escalated | Images/sec |")
+    print("|--------|-----------|----------|---------------|----------|------------|-----------|------------|")
+    for r in rows:
+        threshold = "-" if r["policy"] == "none" else f"{r['threshold']:.2f}"
+        rate = "-" if r["images_per_sec"] is None else f"{r['images_per_sec']:.1f}"
+        print(f"| {r['policy']} | {threshold} | {r['coverage']:.3f} | {r['detection_accuracy']:.4f} "
+              f"| {r['accuracy']:.4f} | {r['classified']:.3f} | {r['escalated']:.3f} | {rate} |")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Sweep detection confidence gate thresholds")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--folder", help="Labeled folder: normal/ and one subfolder per fracture class")
+    source.add_argument("--manifest", help="Manifest from build_manifest.py")
+    parser.add_argument("--split", default="test", help="Manifest split to evaluate on")
+    parser.add_argument("--thresholds", nargs="+", type=float,
+                        default=[round(t, 2) for t in np.arange(0.5, 1.0, 0.05)])
+    parser.add_argument("--tta-views", type=int, default=0,
+                        help="Also replay the 'tta' policy with this many views (0 = skip)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backend", default="keras", help="keras or tflite")
+    parser.add_argument("--app-dir", default=APP_DIR,
+                        help="Folder containing model/ (defaults to deployment/)")
+    parser.add_argument("--json", help="Write the sweep to this JSON file")
+    args = parser.parse_args()
+
+    labeled = load_labeled(args)
+    if not labeled:
+        print("❌ No labeled images found")
+        sys.exit(1)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # Model paths are relative to the working directory (model/...)
+    os.chdir(args.app_dir)
+    sys.path.insert(0, APP_DIR)
+    from utils.predict import FracturePredictor
+
+    predictor = FracturePredictor(backend=args.backend)
+
+    paths, truth = zip(*labeled)
+    truth = np.array(truth, dtype=object)
+
+    unknown = set(truth) - set(predictor.classify_classes) - {NORMAL}
+    if unknown:
+        print(f"⚠️ Labels not known to the classifier (always counted wrong): {sorted(unknown)}")
+
+    print(f"Running {len(paths)} images")
+    outputs = collect_outputs(predictor, list(paths), args.batch_size, args.tta_views)
+
+    base = decisions(predictor, outputs["detect"], outputs["classify"])
+    tta = None
+    if args.tta_views:
+        tta = decisions(predictor, outputs["tta_detect"], outputs["tta_classify"])
+
+    rows = sweep(truth, outputs, base, tta, args.thresholds)
+    print_sweep(rows)
+
+    seconds = {k: round(v * 1000, 2) for k, v in outputs["seconds"].items()}
+    print(f"\nPer-image ms: {seconds}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"images": len(paths), "stage_ms": seconds, "sweep": rows}, f, indent=2)
+        print(f"\n✅ Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
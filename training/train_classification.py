@@ -1,54 +1,151 @@
 import tensorflow as tf
+import argparse
 import json
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import MobileNetV2
 from tensorflow.keras import layers, models
 
-dataset_path="dataset_classification"
-
-datagen=ImageDataGenerator(
-    rescale=1./255,
-    validation_split=0.2,
-    rotation_range=20,
-    zoom_range=0.2,
-    horizontal_flip=True
-)
-
-train_data=datagen.flow_from_directory(
-    dataset_path,
-    target_size=(224,224),
-    batch_size=16,
-    subset='training'
-)
-
-val_data=datagen.flow_from_directory(
-    dataset_path,
-    target_size=(224,224),
-    batch_size=16,
-    subset='validation'
-)
+import runner
+
+parser=argparse.ArgumentParser(description="Train the fracture classification model")
+parser.add_argument("--pipeline",choices=["generator","tfdata"],default="generator",
+                    help="ImageDataGenerator or the parallel tf.data input pipeline")
+parser.add_argument("--cache",default="memory",
+                    help="tf.data cache: 'memory', a directory for an on-disk cache, or 'none'")
+parser.add_argument("--manifest",
+                    help="Stream the images listed in a build_manifest.py manifest (implies tfdata)")
+parser.add_argument("--feature-store",
+                    help="Train the head from precomputed backbone features in this directory")
+parser.add_argument("--augmented-copies",type=int,default=2,
+                    help="Augmented copies of each training image stored in the feature store")
+parser.add_argument("--rebuild-store",action="store_true",
+                    help="Re-run feature extraction even if the store already exists")
+runner.add_runner_args(parser,epochs=15)
+args=parser.parse_args()
+
+strategy=runner.configure(args)
+
+dataset_path=args.manifest or "dataset_classification"
+
+
+def build_head(num_classes):
+    return [
+        layers.Dense(128,activation='relu'),
+        layers.Dropout(0.3),
+        # float32 output keeps softmax stable under bfloat16 mixed precision
+        layers.Dense(num_classes,activation='softmax',dtype='float32')
+    ]
+
+
+def build_augmentation():
+    from data_pipeline import build_augmentation
+    return build_augmentation(rotation_range=20,zoom_range=0.2,horizontal_flip=True)
+
+
+if args.feature_store:
+
+    from feature_store import build_store
+
+    class_indices=build_store(
+        dataset_path,
+        args.feature_store,
+        augmentation=build_augmentation(),
+        augmented_copies=args.augmented_copies,
+        rebuild=args.rebuild_store,
+        task="classification"
+    )
+
+elif args.pipeline=="tfdata" or args.manifest:
+
+    from data_pipeline import make_datasets
+
+    train_data,val_data,class_indices=make_datasets(
+        dataset_path,
+        img_size=(224,224),
+        batch_size=args.batch_size,
+        validation_split=0.2,
+        cache=None if args.cache=="none" else args.cache,
+        augmentation=build_augmentation(),
+        task="classification"
+    )
+
+else:
+
+    datagen=ImageDataGenerator(
+        rescale=1./255,
+        validation_split=0.2,
+        rotation_range=20,
+        zoom_range=0.2,
+        horizontal_flip=True
+    )
+
+    train_data=datagen.flow_from_directory(
+        dataset_path,
+        target_size=(224,224),
+        batch_size=args.batch_size,
+        subset='training'
+    )
+
+    val_data=datagen.flow_from_directory(
+        dataset_path,
+        target_size=(224,224),
+        batch_size=args.batch_size,
+        subset='validation'
+    )
+
+    class_indices=train_data.class_indices
 
 with open("classify_classes.json","w") as f:
-    json.dump(train_data.class_indices,f)
+    json.dump(class_indices,f)
+
+if args.feature_store:
+
+    from feature_store import train_head
+
+    with strategy.scope():
+        model=train_head(args.feature_store,build_head(len(class_indices)),
+                         epochs=args.epochs,batch_size=args.batch_size,
+                         optimizer=runner.build_optimizer(args),
+                         callbacks=runner.runner_callbacks(args,"classification"))
+
+else:
+
+    with strategy.scope():
+
+        base_model=MobileNetV2(input_shape=(224,224,3),
+                               include_top=False,
+                               weights='imagenet')
+
+        base_model.trainable=False
+
+        model=models.Sequential([
+            base_model,
+            layers.GlobalAveragePooling2D()
+        ]+build_head(len(class_indices)))
+
+        model.compile(optimizer=runner.build_optimizer(args),
+                      loss='categorical_crossentropy',
+                      metrics=['accuracy'])
+
+    runner.fit(model,train_data,val_data,args,"classification")
+
+if args.fine_tune_blocks:
 
-base_model=MobileNetV2(input_shape=(224,224,3),
-                       include_top=False,
-                       weights='imagenet')
+    if args.feature_store:
 
-base_model.trainable=False
+        # The backbone changes now, so fine-tuning needs the images
+        from data_pipeline import make_datasets
 
-model=models.Sequential([
-    base_model,
-    layers.GlobalAveragePooling2D(),
-    layers.Dense(128,activation='relu'),
-    layers.Dropout(0.3),
-    layers.Dense(train_data.num_classes,activation='softmax')
-])
+        train_data,val_data,_=make_datasets(
+            dataset_path,
+            batch_size=args.batch_size,
+            cache=None if args.cache=="none" else args.cache,
+            augmentation=build_augmentation(),
+            task="classification"
+        )
 
-model.compile(optimizer='adam',
-              loss='categorical_crossentropy',
-              metrics=['accuracy'])
+    runner.fine_tune(model,train_data,val_data,args,"classification",strategy)
 
-model.fit(train_data,validation_data=val_data,epochs=15)
+runner.print_phase_summary()
 
-model.save("fracture_classification_model.h5")
+runner.save_model(model,"fracture_classification_model.h5")